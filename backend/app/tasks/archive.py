@@ -0,0 +1,249 @@
+import json
+import zipfile
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .export import StreamBuffer
+from .models import Category, EnergyProfile, Goal, Task, TaskOccurrence, UserPreference
+from .suggestions import invalidate_title_suggestions
+from .utils import invalidate_user_cache
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele o arquivo é gerado com o json da biblioteca padrão
+    orjson = None
+
+ARCHIVE_VERSION = 1
+
+# Linhas lidas do banco por vez na exportação e registros gravados por bulk_create na importação
+ARCHIVE_BATCH_SIZE = 2000
+
+# Arquivos do pacote (JSON Lines), na ordem das chaves estrangeiras
+ARCHIVE_MODELS = [
+    ('categories', Category),
+    ('goals', Goal),
+    ('tasks', Task),
+    ('occurrences', TaskOccurrence),
+    ('preferences', UserPreference),
+    ('energy_profile', EnergyProfile),
+]
+
+# Campos que não vão para o pacote: o dono é o usuário do destino, as datas de
+# criação/alteração são as da importação e o token do feed ICS é secreto
+ARCHIVE_EXCLUDED_FIELDS = {'user_id', 'created_at', 'updated_at', 'calendar_token'}
+
+
+class ArchiveError(ValueError):
+    """Pacote de conta inválido ou incompatível com a conta de destino"""
+
+
+def archive_fields(model):
+    """Colunas (attname) de um modelo gravadas no pacote, incluindo o id"""
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname not in ARCHIVE_EXCLUDED_FIELDS
+    ]
+
+
+def dump_line(record):
+    """Registro -> linha JSON (bytes)"""
+    if orjson is not None:
+        return orjson.dumps(record, default=DjangoJSONEncoder().default) + b'\n'
+    return json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False).encode() + b'\n'
+
+
+def load_line(line):
+    """Linha JSON -> registro"""
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def account_querysets(user):
+    """QuerySets dos dados da conta, na ordem de ARCHIVE_MODELS"""
+    # Categorias são compartilhadas: vão as usadas pelas tarefas e metas do usuário
+    categories = Category.objects.filter(
+        Q(id__in=Task.objects.filter(user=user).values('category_id'))
+        | Q(id__in=Goal.objects.filter(user=user).values('category_id'))
+    )
+    return {
+        'categories': categories,
+        'goals': Goal.objects.filter(user=user),
+        'tasks': Task.objects.filter(user=user),
+        'occurrences': TaskOccurrence.objects.filter(task__user=user),
+        'preferences': UserPreference.objects.filter(user=user),
+        'energy_profile': EnergyProfile.objects.filter(user=user),
+    }
+
+
+def write_account_archive(user):
+    """
+    Gera o pacote da conta (zip) em blocos (bytes).
+
+    Cada modelo vai em um arquivo JSON Lines comprimido (ex: tasks.jsonl), lido
+    do banco com values() e iterator(); o manifest.json com a versão e as
+    contagens é gravado por último.
+    """
+    buffer = StreamBuffer()
+    counts = {}
+    querysets = account_querysets(user)
+
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, model in ARCHIVE_MODELS:
+            rows = querysets[name].order_by('id').values(*archive_fields(model))
+            counts[name] = 0
+            with archive.open(f'{name}.jsonl', 'w', force_zip64=True) as stream:
+                lines = []
+                for row in rows.iterator(chunk_size=ARCHIVE_BATCH_SIZE):
+                    lines.append(dump_line(row))
+                    if len(lines) >= ARCHIVE_BATCH_SIZE:
+                        stream.write(b''.join(lines))
+                        counts[name] += len(lines)
+                        lines = []
+                        yield buffer.pop()
+                stream.write(b''.join(lines))
+                counts[name] += len(lines)
+            yield buffer.pop()
+
+        archive.writestr('manifest.json', json.dumps({
+            'version': ARCHIVE_VERSION,
+            'exported_at': timezone.now().isoformat(),
+            'username': user.username,
+            'counts': counts,
+        }, indent=2))
+    yield buffer.pop()
+
+
+class AccountArchiveImporter:
+    """
+    Restaura um pacote de write_account_archive() em uma conta sem tarefas nem metas.
+
+    Os registros são gravados com bulk_create em blocos, na ordem das chaves
+    estrangeiras e em uma única transação, com os ids remapeados (os do pacote
+    são os da instância de origem). Categorias com o mesmo nome de uma categoria
+    existente são reaproveitadas; as demais são criadas. Como bulk_create não
+    envia sinais, o cache do usuário e as sugestões de título são invalidados ao
+    final.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.ids = {name: {} for name, _ in ARCHIVE_MODELS}
+        self.counts = {name: 0 for name, _ in ARCHIVE_MODELS}
+
+    def run(self, fileobj):
+        """
+        Importa o pacote (arquivo binário com seek, como um upload ou open(..., 'rb')).
+
+        Returns:
+            dict {modelo: registros importados}; categorias reaproveitadas contam
+            em 'categories_matched'
+
+        Raises:
+            ArchiveError: Pacote inválido ou conta de destino com dados
+        """
+        try:
+            with zipfile.ZipFile(fileobj) as archive:
+                self._check_manifest(archive)
+                if Task.objects.filter(user=self.user).exists() or Goal.objects.filter(user=self.user).exists():
+                    raise ArchiveError('A conta de destino já tem tarefas ou metas; importe em uma conta vazia')
+
+                with transaction.atomic():
+                    self._import_categories(self._records(archive, 'categories'))
+                    self._import_rows(archive, 'goals', Goal, {'category_id': 'categories'})
+                    self._import_rows(archive, 'tasks', Task, {'category_id': 'categories', 'goal_id': 'goals'})
+                    self._import_rows(archive, 'occurrences', TaskOccurrence, {'task_id': 'tasks'})
+                    self._import_single(archive, 'preferences', UserPreference)
+                    self._import_single(archive, 'energy_profile', EnergyProfile)
+        except zipfile.BadZipFile:
+            raise ArchiveError('Arquivo inválido: esperado o .zip gerado pela exportação da conta')
+        except (KeyError, TypeError, ValueError, ValidationError, IntegrityError) as e:
+            if isinstance(e, ArchiveError):
+                raise
+            raise ArchiveError(f'Pacote corrompido ou incompatível: {e}')
+
+        invalidate_user_cache(self.user.id)
+        invalidate_title_suggestions(self.user.id)
+        return self.counts
+
+    def _check_manifest(self, archive):
+        try:
+            manifest = json.loads(archive.read('manifest.json'))
+        except KeyError:
+            raise ArchiveError('Pacote sem manifest.json')
+        if manifest.get('version') != ARCHIVE_VERSION:
+            raise ArchiveError(f"Versão do pacote não suportada: {manifest.get('version')}")
+
+    def _records(self, archive, name):
+        """Registros de um arquivo JSON Lines do pacote (vazio se o arquivo não existir)"""
+        try:
+            stream = archive.open(f'{name}.jsonl')
+        except KeyError:
+            return
+        with stream:
+            for line in stream:
+                if line.strip():
+                    yield load_line(line)
+
+    def _import_categories(self, records):
+        records = list(records)
+        existing = {}
+        for category in Category.objects.filter(name__in=[record['name'] for record in records]).order_by('id'):
+            existing.setdefault(category.name, category.id)
+
+        fields = set(archive_fields(Category)) - {'id'}
+        new_records = []
+        for record in records:
+            if record['name'] in existing:
+                self.ids['categories'][record['id']] = existing[record['name']]
+            else:
+                new_records.append(record)
+
+        created = Category.objects.bulk_create([
+            Category(**{field: value for field, value in record.items() if field in fields})
+            for record in new_records
+        ])
+        for record, category in zip(new_records, created):
+            self.ids['categories'][record['id']] = category.id
+        self.counts['categories'] = len(created)
+        self.counts['categories_matched'] = len(records) - len(created)
+
+    def _import_rows(self, archive, name, model, foreign_keys):
+        """Grava os registros de um modelo em blocos, trocando as chaves estrangeiras pelos novos ids"""
+        fields = set(archive_fields(model)) - {'id'}
+        has_user = any(field.attname == 'user_id' for field in model._meta.concrete_fields)
+        records = self._records(archive, name)
+
+        while True:
+            batch = list(islice(records, ARCHIVE_BATCH_SIZE))
+            if not batch:
+                break
+
+            objects = []
+            for record in batch:
+                values = {field: value for field, value in record.items() if field in fields}
+                for field, target in foreign_keys.items():
+                    if values.get(field) is not None:
+                        # KeyError para referência a um registro que não está no pacote
+                        values[field] = self.ids[target][values[field]]
+                if has_user:
+                    values['user_id'] = self.user.id
+                objects.append(model(**values))
+
+            model.objects.bulk_create(objects)
+            for record, obj in zip(batch, objects):
+                self.ids[name][record['id']] = obj.id
+            self.counts[name] += len(objects)
+
+    def _import_single(self, archive, name, model):
+        """Preferências e perfil de energia: um registro por usuário, criado ou atualizado"""
+        fields = set(archive_fields(model)) - {'id'}
+        for record in self._records(archive, name):
+            model.objects.update_or_create(
+                user=self.user,
+                defaults={field: value for field, value in record.items() if field in fields}
+            )
+            self.counts[name] += 1
@@ -0,0 +1,111 @@
+import json
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+
+class InvalidBatch(ValueError):
+    """Lista de sub-requisições do /api/batch/ malformada"""
+
+
+def parse_batch(data):
+    """
+    Valida o corpo do /api/batch/ e devolve [(nome, caminho)].
+
+    O corpo é {"requests": {"nome": "/api/caminho/?query", ...}}; a ordem das
+    chaves é mantida na resposta. Apenas caminhos da própria API são aceitos.
+    """
+    requests = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(requests, dict) or not requests:
+        raise InvalidBatch('Informe "requests" como um objeto {nome: caminho}')
+    if len(requests) > settings.BATCH_MAX_REQUESTS:
+        raise InvalidBatch(f'Máximo de {settings.BATCH_MAX_REQUESTS} sub-requisições por lote')
+
+    items = []
+    for name, path in requests.items():
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise InvalidBatch(f'Caminho inválido em "{name}": use um caminho da API (ex: /api/goals/)')
+        items.append((name, path))
+    return items
+
+
+def build_subrequest(request, path):
+    """
+    Monta a requisição GET de um item do lote a partir da requisição do lote.
+
+    O usuário já autenticado é repassado com _force_auth_user (o mesmo mecanismo
+    do force_authenticate do DRF), então cada sub-requisição não decodifica o JWT
+    nem busca o usuário de novo: todas compartilham a mesma instância de User e,
+    com ela, o cache das relações já carregadas (energy_profile, preferences).
+    """
+    parent = request._request
+    url = urlsplit(path)
+
+    subrequest = HttpRequest()
+    subrequest.method = 'GET'
+    subrequest.path = subrequest.path_info = url.path
+    subrequest.META = {
+        **parent.META,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'HTTP_ACCEPT': 'application/json',
+        'CONTENT_LENGTH': '',
+    }
+    subrequest.GET = QueryDict(url.query)
+    subrequest.COOKIES = parent.COOKIES
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    return subrequest
+
+
+def run_batch(request, items, batch_view):
+    """
+    Executa as sub-requisições do lote, em ordem, no contexto da requisição atual.
+
+    As views são chamadas diretamente (sem passar de novo pelos middlewares).
+    Cada resultado traz o status e o corpo da sub-requisição; o corpo de uma
+    Response do DRF é usado sem renderizar, e a resposta do lote é renderizada
+    uma única vez.
+
+    Args:
+        request: Requisição (DRF) do lote
+        items: Lista [(nome, caminho)] de parse_batch()
+        batch_view: View do próprio lote, recusada nas sub-requisições
+
+    Returns:
+        dict {nome: {'status': int, 'body': ...}}
+    """
+    results = {}
+    for name, path in items:
+        subrequest = build_subrequest(request, path)
+
+        try:
+            match = resolve(subrequest.path_info)
+        except Resolver404:
+            results[name] = {'status': 404, 'body': {'error': 'Caminho não encontrado'}}
+            continue
+        if getattr(match.func, 'cls', None) is batch_view:
+            results[name] = {'status': 400, 'body': {'error': 'Lotes não podem ser aninhados'}}
+            continue
+
+        subrequest.resolver_match = match
+        response = match.func(subrequest, *match.args, **match.kwargs)
+        results[name] = {'status': response.status_code, 'body': response_body(response)}
+    return results
+
+
+def response_body(response):
+    """Corpo de uma resposta de sub-requisição, como dados serializáveis"""
+    if hasattr(response, 'data'):
+        return response.data
+    if response.streaming:
+        return None
+
+    if hasattr(response, 'render'):
+        response.render()
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(response.content or b'null')
+    return response.content.decode(response.charset)
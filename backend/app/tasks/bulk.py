@@ -0,0 +1,489 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Category, Goal, Task, TaskOccurrence
+from .serializers import (
+    PrefetchedPrimaryKeyRelatedField, TaskOccurrenceSerializer, TaskSerializer, TaskStatusChangeSerializer
+)
+from .suggestions import invalidate_title_suggestions
+from .utils import initial_occurrence_dates, invalidate_user_cache, times_overlap
+
+# Ações aceitas em cada operação e os campos obrigatórios de cada uma
+BULK_ACTIONS = {
+    'create': ('data',),
+    'update': ('id', 'data'),
+    'status': ('id', 'status'),
+    'delete': ('id',),
+}
+
+# Campos que mudam a posição da tarefa na agenda (exigem verificação de sobreposição)
+SCHEDULE_FIELDS = ('date', 'start_time', 'end_time')
+
+OCCURRENCE_UPDATE_FIELDS = ['status', 'actual_value', 'notes', 'updated_at']
+
+
+class InvalidBulkRequest(ValueError):
+    """Corpo do /api/tasks/bulk/ malformado"""
+
+
+def parse_operations(data):
+    """
+    Valida o formato do corpo do /api/tasks/bulk/ e devolve a lista de operações.
+
+    O conteúdo de cada operação (campos da tarefa, ids) é validado depois, item a
+    item; aqui só a estrutura é conferida.
+    """
+    operations = data.get('operations') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise InvalidBulkRequest('Informe "operations" como uma lista de operações')
+    if len(operations) > settings.TASK_BULK_MAX_OPERATIONS:
+        raise InvalidBulkRequest(f'Máximo de {settings.TASK_BULK_MAX_OPERATIONS} operações por lote')
+
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('action') not in BULK_ACTIONS:
+            raise InvalidBulkRequest(f'Operação {index}: "action" deve ser um de {", ".join(BULK_ACTIONS)}')
+        missing = [key for key in BULK_ACTIONS[operation['action']] if key not in operation]
+        if missing:
+            raise InvalidBulkRequest(f'Operação {index}: campos obrigatórios ausentes: {", ".join(missing)}')
+        if 'data' in operation and not isinstance(operation['data'], dict):
+            raise InvalidBulkRequest(f'Operação {index}: "data" deve ser um objeto')
+    return operations
+
+
+def goal_contribution(item):
+    """Valor que uma tarefa ou ocorrência soma à meta (concluída e com valor realizado)"""
+    if item.status == 'completed' and item.actual_value:
+        return item.actual_value
+    return 0
+
+
+class TaskBulkProcessor:
+    """
+    Aplica operações em lote nas tarefas e ocorrências do usuário, em uma transação.
+
+    Operações (na ordem recebida, cada uma vendo o resultado das anteriores):
+    - create: {"action": "create", "data": {...}} (mesmos campos do POST /api/tasks/)
+    - update: {"action": "update", "id": 1, "data": {...}} (atualização parcial)
+    - status: {"action": "status", "id": 1, "status": "completed", "actual_value": 2,
+      "notes": "...", "date": "2026-01-06"} (em tarefa recorrente, altera a ocorrência
+      da data, hoje por padrão, como o update_status)
+    - delete: {"action": "delete", "id": 1, "date": "2026-01-06"} (com data em tarefa
+      recorrente, exclui só a ocorrência, como o delete_recurring com only_this)
+
+    Tudo é validado antes de gravar: tarefas e relações são lidas com poucas
+    queries para o lote inteiro, a sobreposição de horários é verificada em
+    memória, e se algum item falhar nada é gravado. Depois as gravações são feitas
+    com bulk_create/bulk_update e cada meta afetada é recalculada uma única vez com
+    a soma das diferenças de todos os itens. Como na criação individual, criar uma
+    tarefa já concluída com valor realizado soma esse valor na meta.
+    """
+
+    def __init__(self, user, operations, context=None, ignore_overlap=False):
+        self.user = user
+        self.operations = operations
+        self.context = context or {}
+        self.ignore_overlap = ignore_overlap
+
+        self.results = [None] * len(operations)
+        self.failed = False
+
+        self.created = []              # [(índice, tarefa, serializer)]
+        self.created_by_index = {}
+        self.changed_fields = set()
+        self.dirty_tasks = {}
+        self.schedule_checks = []      # [(índice, tarefa)] que precisam de verificação de sobreposição
+        self.new_occurrences = {}
+        self.dirty_occurrences = {}
+        self.deleted_task_ids = set()
+        self.deleted_occurrence_ids = set()
+        self.goal_deltas = defaultdict(int)
+        # Diferença no total concluído das ocorrências de cada tarefa feita por este lote
+        self.occurrence_adjustments = defaultdict(int)
+        self.titles_changed = False
+
+    def run(self):
+        """
+        Valida e, se tudo estiver correto, aplica as operações.
+
+        Returns:
+            tuple: (aplicado, resultados por item na ordem das operações)
+        """
+        with transaction.atomic():
+            self._load()
+            for index, operation in enumerate(self.operations):
+                handler = getattr(self, f"_{operation['action']}")
+                handler(index, operation)
+            self._check_overlaps()
+
+            if self.failed:
+                for index, result in enumerate(self.results):
+                    if result is None or result['status'] < 400:
+                        # Válido, mas não aplicado por causa dos outros itens
+                        self.results[index] = self._result(index, status=424)
+                return False, self.results
+
+            self._apply()
+
+        self._serialize_results()
+        return True, self.results
+
+    # Carga
+
+    def _load(self):
+        """Lê tarefas, categorias, metas e ocorrências referenciadas por todo o lote"""
+        task_ids = {self._int(operation.get('id')) for operation in self.operations} - {None}
+        self.tasks = Task.objects.filter(user=self.user, id__in=task_ids).select_related(
+            'category', 'goal'
+        ).select_for_update(of=('self',)).in_bulk()
+
+        category_ids = set()
+        goal_ids = set()
+        for operation in self.operations:
+            data = operation.get('data') or {}
+            category_ids.add(self._int(data.get('category')))
+            goal_ids.add(self._int(data.get('goal')))
+        self.categories = Category.objects.in_bulk(category_ids - {None})
+        # Apenas metas do próprio usuário podem ser vinculadas
+        self.goals = Goal.objects.filter(user=self.user).in_bulk(goal_ids - {None})
+
+        # Ocorrências das datas citadas em status/delete de tarefas recorrentes
+        keys = set()
+        for operation in self.operations:
+            task = self.tasks.get(self._int(operation.get('id')))
+            if operation['action'] in ('status', 'delete') and task is not None:
+                occurrence_date = self._date(operation.get('date'))
+                if occurrence_date is not None:
+                    keys.add((task.id, occurrence_date))
+                elif operation['action'] == 'status':
+                    keys.add((task.id, timezone.localdate()))
+
+        self.occurrences = {}
+        if keys:
+            occurrences = TaskOccurrence.objects.filter(
+                task_id__in={task_id for task_id, _ in keys},
+                date__in={occurrence_date for _, occurrence_date in keys}
+            ).select_for_update()
+            for occurrence in occurrences:
+                occurrence.task = self.tasks[occurrence.task_id]
+                self.occurrences[(occurrence.task_id, occurrence.date)] = occurrence
+
+        # Total concluído das ocorrências das tarefas excluídas por inteiro (sai da meta)
+        deleted_ids = {
+            self._int(operation['id']) for operation in self.operations
+            if operation['action'] == 'delete' and not operation.get('date')
+        }
+        self.completed_totals = dict(
+            TaskOccurrence.objects.filter(
+                task_id__in=deleted_ids & set(self.tasks), status='completed'
+            ).values('task_id').annotate(total=Sum('actual_value')).values_list('task_id', 'total')
+        )
+
+    # Operações
+
+    def _create(self, index, operation):
+        serializer = self._task_serializer(data=operation['data'])
+        if not serializer.is_valid():
+            return self._fail(index, 400, errors=serializer.errors)
+
+        data = dict(serializer.validated_data)
+        ignore_overlap = data.pop('ignore_overlap', False)
+        task = Task(user=self.user, **data)
+        if task.goal_id:
+            # Como no Task.save() da criação individual, tarefa já concluída soma na meta
+            self.goal_deltas[task.goal_id] += goal_contribution(task)
+
+        self.created.append((index, task, serializer))
+        self.created_by_index[index] = task
+        if not (self.ignore_overlap or ignore_overlap):
+            self.schedule_checks.append((index, task))
+
+    def _update(self, index, operation):
+        task = self._get_task(index, operation)
+        if task is None:
+            return
+
+        serializer = self._task_serializer(task, data=operation['data'], partial=True)
+        if not serializer.is_valid():
+            return self._fail(index, 400, errors=serializer.errors)
+
+        data = dict(serializer.validated_data)
+        ignore_overlap = data.pop('ignore_overlap', False)
+
+        old_goal_id, old_value = task.goal_id, goal_contribution(task)
+        for attr, value in data.items():
+            setattr(task, attr, value)
+        self._move_goal_value(old_goal_id, old_value, task.goal_id, goal_contribution(task))
+
+        self.dirty_tasks[task.id] = task
+        self.changed_fields.update(data)
+        self.titles_changed = self.titles_changed or 'title' in data
+        if not (self.ignore_overlap or ignore_overlap) and any(field in data for field in SCHEDULE_FIELDS):
+            self.schedule_checks.append((index, task))
+
+    def _status(self, index, operation):
+        task = self._get_task(index, operation)
+        if task is None:
+            return
+
+        serializer = TaskStatusChangeSerializer(data=operation)
+        if not serializer.is_valid():
+            return self._fail(index, 400, errors=serializer.errors)
+        data = serializer.validated_data
+        actual_value = data.get('actual_value')
+        notes = data.get('notes')
+
+        if task.repeat_pattern == 'none':
+            old_value = goal_contribution(task)
+            task.status = data['status']
+            if actual_value is not None:
+                task.actual_value = actual_value
+            if notes:
+                task.notes = notes
+            self._move_goal_value(task.goal_id, old_value, task.goal_id, goal_contribution(task))
+
+            self.dirty_tasks[task.id] = task
+            self.changed_fields.update(('status', 'actual_value', 'notes'))
+            return
+
+        occurrence_date = data.get('date') or timezone.localdate()
+        occurrence = self.occurrences.get((task.id, occurrence_date))
+        if occurrence is None:
+            occurrence = TaskOccurrence(task=task, date=occurrence_date)
+            self.occurrences[(task.id, occurrence_date)] = occurrence
+            self.new_occurrences[(task.id, occurrence_date)] = occurrence
+            old_value = 0
+        else:
+            old_value = goal_contribution(occurrence)
+
+        occurrence.status = data['status']
+        occurrence.actual_value = actual_value
+        occurrence.notes = notes
+        new_value = goal_contribution(occurrence)
+        self._move_goal_value(task.goal_id, old_value, task.goal_id, new_value)
+        self.occurrence_adjustments[task.id] += new_value - old_value
+
+        if occurrence.pk:
+            self.dirty_occurrences[occurrence.pk] = occurrence
+        self.results[index] = self._result(index, occurrence=occurrence)
+
+    def _delete(self, index, operation):
+        task = self._get_task(index, operation)
+        if task is None:
+            return
+
+        occurrence_date = None
+        if operation.get('date'):
+            try:
+                occurrence_date = serializers.DateField().run_validation(operation['date'])
+            except serializers.ValidationError as e:
+                return self._fail(index, 400, errors={'date': e.detail})
+
+        if occurrence_date is None or task.repeat_pattern == 'none':
+            # Tarefa inteira: sai da meta o valor da tarefa e de todas as ocorrências concluídas
+            total = (
+                goal_contribution(task)
+                + (self.completed_totals.get(task.id) or 0)
+                + self.occurrence_adjustments[task.id]
+            )
+            self._move_goal_value(task.goal_id, total, None, 0)
+            self.deleted_task_ids.add(task.id)
+            self.dirty_tasks.pop(task.id, None)
+            self.results[index] = self._result(index, status=204)
+            return
+
+        key = (task.id, occurrence_date)
+        occurrence = self.occurrences.pop(key, None)
+        if occurrence is not None:
+            value = goal_contribution(occurrence)
+            self._move_goal_value(task.goal_id, value, None, 0)
+            self.occurrence_adjustments[task.id] -= value
+            self.new_occurrences.pop(key, None)
+            if occurrence.pk:
+                self.dirty_occurrences.pop(occurrence.pk, None)
+                self.deleted_occurrence_ids.add(occurrence.pk)
+        else:
+            # Data gerada pela recorrência: registrar como pulada
+            occurrence = TaskOccurrence(task=task, date=occurrence_date, status='skipped', notes="Excluída pelo usuário")
+            self.occurrences[key] = occurrence
+            self.new_occurrences[key] = occurrence
+        self.results[index] = self._result(index, status=204)
+
+    # Validação
+
+    def _check_overlaps(self):
+        """Verifica a sobreposição de horários das tarefas criadas/movidas com uma única query"""
+        checks = [
+            (index, task) for index, task in self.schedule_checks
+            if self.results[index] is None and task.id not in self.deleted_task_ids
+        ]
+        if not checks:
+            return
+
+        dates = {task.date for _, task in checks}
+        scheduled = defaultdict(list)
+        for row in Task.objects.filter(user=self.user, date__in=dates).exclude(
+            id__in=set(self.tasks)
+        ).values('id', 'title', 'date', 'start_time', 'end_time'):
+            scheduled[row['date']].append((None, row))
+
+        # Tarefas do lote, na posição final
+        batch_tasks = [(None, task) for task in self.tasks.values() if task.id not in self.deleted_task_ids]
+        batch_tasks.extend((index, task) for index, task, _ in self.created if self.results[index] is None)
+        for index, task in batch_tasks:
+            if task.date in dates:
+                scheduled[task.date].append((index, {
+                    'id': task.id, 'title': task.title, 'date': task.date,
+                    'start_time': task.start_time, 'end_time': task.end_time,
+                }))
+
+        for index, task in checks:
+            candidates = sorted(scheduled[task.date], key=lambda item: item[1]['start_time'])
+            for other_index, other in candidates:
+                if other_index == index or (task.id is not None and other['id'] == task.id):
+                    continue
+                if times_overlap(task.start_time, task.end_time, other['start_time'], other['end_time']):
+                    overlapping_task = {
+                        'id': other['id'],
+                        'title': other['title'],
+                        'start_time': other['start_time'],
+                        'end_time': other['end_time'],
+                        'date': other['date'],
+                    }
+                    if other_index is not None and other['id'] is None:
+                        overlapping_task['index'] = other_index
+                    self._fail(index, 409, error='Sobreposição de horário detectada', overlapping_task=overlapping_task)
+                    break
+
+    # Gravação
+
+    def _apply(self):
+        now = timezone.now()
+
+        # Ocorrências iniciais das tarefas recorrentes criadas (as mesmas do TaskSerializer.create),
+        # gravadas no mesmo bulk_create das ocorrências do lote
+        initial_occurrences = []
+        if self.created:
+            created_tasks = Task.objects.bulk_create([task for _, task, _ in self.created])
+            for task in created_tasks:
+                if task.repeat_pattern != 'none' and task.repeat_end_date:
+                    initial_occurrences.extend(
+                        TaskOccurrence(task=task, date=occurrence_date, status='pending')
+                        for occurrence_date in initial_occurrence_dates(task)
+                    )
+
+        if self.dirty_tasks:
+            for task in self.dirty_tasks.values():
+                task.updated_at = now
+            Task.objects.bulk_update(self.dirty_tasks.values(), sorted(self.changed_fields | {'updated_at'}))
+
+        new_occurrences = initial_occurrences + [
+            occurrence for occurrence in self.new_occurrences.values()
+            if occurrence.task_id not in self.deleted_task_ids
+        ]
+        if new_occurrences:
+            TaskOccurrence.objects.bulk_create(new_occurrences)
+
+        dirty_occurrences = [
+            occurrence for occurrence in self.dirty_occurrences.values()
+            if occurrence.task_id not in self.deleted_task_ids
+        ]
+        if dirty_occurrences:
+            for occurrence in dirty_occurrences:
+                occurrence.updated_at = now
+            TaskOccurrence.objects.bulk_update(dirty_occurrences, OCCURRENCE_UPDATE_FIELDS)
+
+        if self.deleted_occurrence_ids:
+            TaskOccurrence.objects.filter(id__in=self.deleted_occurrence_ids).delete()
+        if self.deleted_task_ids:
+            Task.objects.filter(id__in=self.deleted_task_ids).delete()
+
+        # Uma atualização por meta, com a soma das diferenças de todos os itens
+        goal_ids = [goal_id for goal_id, delta in self.goal_deltas.items() if delta]
+        for goal in Goal.objects.filter(id__in=goal_ids).select_for_update():
+            goal.current_value = max(0, goal.current_value + self.goal_deltas[goal.id])
+            goal.update_progress()
+
+        # bulk_create/bulk_update não disparam os sinais de post_save
+        invalidate_user_cache(self.user.id)
+        if self.created or self.titles_changed:
+            invalidate_title_suggestions(self.user.id)
+
+    def _serialize_results(self):
+        for index, operation in enumerate(self.operations):
+            result = self.results[index]
+            if result is not None:
+                if 'occurrence' in result:
+                    occurrence = result.pop('occurrence')
+                    result['data'] = TaskOccurrenceSerializer(occurrence, context=self.context).data
+                continue
+
+            if operation['action'] == 'create':
+                task = self.created_by_index[index]
+                self.results[index] = self._result(index, status=201, data=self._task_data(task))
+            else:
+                task = self.tasks[self._int(operation['id'])]
+                self.results[index] = self._result(index, data=self._task_data(task))
+
+    # Auxiliares
+
+    def _task_serializer(self, *args, **kwargs):
+        """TaskSerializer cujas relações (categoria e meta) são resolvidas nos objetos já carregados"""
+        serializer = TaskSerializer(*args, context=self.context, **kwargs)
+        for name, objects in (('category', self.categories), ('goal', self.goals)):
+            field = serializer.fields[name]
+            serializer.fields[name] = PrefetchedPrimaryKeyRelatedField(
+                objects, queryset=field.queryset, required=field.required, allow_null=field.allow_null
+            )
+        return serializer
+
+    def _task_data(self, task):
+        return TaskSerializer(task, context=self.context).data
+
+    def _get_task(self, index, operation):
+        """Tarefa da operação, ou None (com o item marcado como não encontrado)"""
+        task_id = self._int(operation.get('id'))
+        task = self.tasks.get(task_id)
+        if task is None or task_id in self.deleted_task_ids:
+            self._fail(index, 404, error='Tarefa não encontrada')
+            return None
+        return task
+
+    def _move_goal_value(self, old_goal_id, old_value, new_goal_id, new_value):
+        """Acumula a saída de `old_value` da meta antiga e a entrada de `new_value` na nova"""
+        if old_goal_id and old_value:
+            self.goal_deltas[old_goal_id] -= old_value
+        if new_goal_id and new_value:
+            self.goal_deltas[new_goal_id] += new_value
+
+    def _result(self, index, status=200, **extra):
+        operation = self.operations[index]
+        result = {'index': index, 'action': operation['action'], 'status': status}
+        if 'id' in operation:
+            result['id'] = operation['id']
+        result.update(extra)
+        return result
+
+    def _fail(self, index, status, **extra):
+        self.failed = True
+        self.results[index] = self._result(index, status=status, **extra)
+
+    @staticmethod
+    def _int(value):
+        if isinstance(value, bool):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _date(value):
+        try:
+            return serializers.DateField().run_validation(value) if value else None
+        except serializers.ValidationError:
+            return None
@@ -0,0 +1,358 @@
+import csv
+import heapq
+import io
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import groupby
+from xml.sax.saxutils import escape
+
+from django.db.models import Q
+
+from .metrics import RECURRENCE_EXPANSION
+from .models import Goal, Task, TaskOccurrence
+from .utils import recurring_task_applies
+
+# Linhas lidas do banco por vez (QuerySet.iterator) e gravadas por bloco enviado ao cliente
+EXPORT_CHUNK_SIZE = 1000
+
+TASK_COLUMNS = [
+    'date', 'start_time', 'end_time', 'title', 'category', 'goal', 'status', 'priority',
+    'duration_minutes', 'target_value', 'actual_value', 'recurring', 'task_id', 'occurrence_id', 'notes',
+]
+
+GOAL_COLUMNS = [
+    'id', 'title', 'category', 'period', 'start_date', 'end_date', 'target_value', 'current_value',
+    'measurement_unit', 'custom_unit', 'progress_percentage', 'is_completed',
+]
+
+DAILY_COLUMNS = ['date', 'total', 'completed', 'pending', 'in_progress', 'failed', 'skipped', 'completion_rate']
+
+TASK_ROW_FIELDS = [
+    'id', 'title', 'date', 'start_time', 'end_time', 'status', 'priority', 'duration_minutes',
+    'target_value', 'actual_value', 'notes', 'category__name', 'goal__title',
+]
+
+
+def iter_task_rows(user, start_date, end_date):
+    """
+    Tarefas do usuário no período, uma linha (dict com TASK_COLUMNS) por tarefa em cada data.
+
+    As tarefas recorrentes são expandidas como em expand_recurring_tasks(), com
+    o resultado da ocorrência registrada (ou 'pending' sem registro). As
+    tarefas avulsas e as ocorrências são lidas com cursores (iterator) em ordem
+    de data e combinadas dia a dia, então a memória não cresce com o período:
+    só as tarefas recorrentes ativas e as ocorrências de um dia ficam carregadas.
+    """
+    one_off_rows = (
+        {
+            'date': row['date'],
+            'start_time': row['start_time'],
+            'end_time': row['end_time'],
+            'title': row['title'],
+            'category': row['category__name'],
+            'goal': row['goal__title'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'duration_minutes': row['duration_minutes'],
+            'target_value': row['target_value'],
+            'actual_value': row['actual_value'],
+            'recurring': False,
+            'task_id': row['id'],
+            'occurrence_id': None,
+            'notes': row['notes'],
+        }
+        for row in Task.objects.filter(
+            user=user, repeat_pattern='none', date__range=[start_date, end_date]
+        ).order_by('date', 'start_time', 'id').values(*TASK_ROW_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    return heapq.merge(
+        one_off_rows,
+        iter_recurring_rows(user, start_date, end_date),
+        key=lambda row: (row['date'], row['start_time'])
+    )
+
+
+def iter_recurring_rows(user, start_date, end_date):
+    """Linhas das tarefas recorrentes expandidas no período, em ordem de data e horário"""
+    recurring_tasks = sorted(
+        Task.objects.filter(user=user, date__lte=end_date).exclude(repeat_pattern='none').filter(
+            Q(repeat_end_date__isnull=True) | Q(repeat_end_date__gte=start_date)
+        ).select_related('category', 'goal'),
+        key=lambda task: (task.start_time, task.id)
+    )
+    if not recurring_tasks:
+        return
+
+    occurrences = TaskOccurrence.objects.filter(
+        task__in=recurring_tasks, date__range=[start_date, end_date]
+    ).order_by('date').values(
+        'id', 'task_id', 'date', 'status', 'actual_value', 'notes'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    occurrences_by_date = groupby(occurrences, key=lambda occurrence: occurrence['date'])
+    next_group = next(occurrences_by_date, None)
+
+    current_date = max(start_date, min(task.date for task in recurring_tasks))
+    RECURRENCE_EXPANSION.observe(len(recurring_tasks) * ((end_date - current_date).days + 1), 'export')
+    while current_date <= end_date:
+        day_occurrences = {}
+        # Avança o cursor das ocorrências até a data atual
+        while next_group is not None and next_group[0] <= current_date:
+            if next_group[0] == current_date:
+                day_occurrences = {occurrence['task_id']: occurrence for occurrence in next_group[1]}
+            next_group = next(occurrences_by_date, None)
+
+        for task in recurring_tasks:
+            if not recurring_task_applies(task, current_date):
+                continue
+            occurrence = day_occurrences.get(task.id)
+            yield {
+                'date': current_date,
+                'start_time': task.start_time,
+                'end_time': task.end_time,
+                'title': task.title,
+                'category': task.category.name,
+                'goal': task.goal.title if task.goal else None,
+                'status': occurrence['status'] if occurrence else 'pending',
+                'priority': task.priority,
+                'duration_minutes': task.duration_minutes,
+                'target_value': task.target_value,
+                'actual_value': occurrence['actual_value'] if occurrence else None,
+                'recurring': True,
+                'task_id': task.id,
+                'occurrence_id': occurrence['id'] if occurrence else None,
+                'notes': occurrence['notes'] if occurrence else None,
+            }
+        current_date += timedelta(days=1)
+
+
+def iter_daily_rows(user, start_date, end_date):
+    """
+    Totais por dia no período, calculados sobre iter_task_rows(). As tarefas
+    puladas aparecem em 'skipped' e ficam fora do total e da taxa de conclusão.
+    """
+    for day, rows in groupby(iter_task_rows(user, start_date, end_date), key=lambda row: row['date']):
+        counts = dict.fromkeys(['completed', 'pending', 'in_progress', 'failed', 'skipped'], 0)
+        for row in rows:
+            counts[row['status']] += 1
+        total = sum(counts.values()) - counts['skipped']
+        yield {
+            'date': day,
+            'total': total,
+            **counts,
+            'completion_rate': round(counts['completed'] * 100 / total, 2) if total else 0,
+        }
+
+
+def iter_goal_rows(user):
+    """Metas do usuário, uma linha (dict com GOAL_COLUMNS) por meta"""
+    goals = Goal.objects.filter(user=user).order_by('start_date', 'id').values(
+        *[column for column in GOAL_COLUMNS if column != 'category'], 'category__name'
+    )
+    for goal in goals.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        goal['category'] = goal.pop('category__name')
+        yield goal
+
+
+def format_csv_value(value):
+    """Valor de uma célula no CSV"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, time):
+        return value.strftime('%H:%M')
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(columns, rows):
+    """
+    Gera o CSV em blocos (bytes) de EXPORT_CHUNK_SIZE linhas.
+
+    Começa com o BOM do UTF-8 para que o Excel reconheça a codificação.
+    """
+    buffer = io.StringIO()
+    buffer.write('\ufeff')
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    pending = 1
+
+    for row in rows:
+        writer.writerow([format_csv_value(row[column]) for column in columns])
+        pending += 1
+        if pending >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode()
+
+
+class StreamBuffer:
+    """
+    Arquivo somente de escrita que acumula os bytes até serem retirados com pop().
+
+    Sem tell()/seek(), o zipfile grava em modo de fluxo (data descriptor após
+    cada arquivo), então o .xlsx pode ser enviado enquanto é gerado.
+    """
+
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+XLSX_NAMESPACE = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+XLSX_RELATIONSHIPS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+XLSX_PACKAGE_RELATIONSHIPS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+
+XLSX_STATIC_FILES = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{XLSX_PACKAGE_RELATIONSHIPS}">'
+        f'<Relationship Id="rId1" Type="{XLSX_RELATIONSHIPS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<Relationships xmlns="{XLSX_PACKAGE_RELATIONSHIPS}">'
+        f'<Relationship Id="rId1" Type="{XLSX_RELATIONSHIPS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{XLSX_RELATIONSHIPS}/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilos 1 e 2: formatos nativos de data (14) e hora (20) do Excel
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<styleSheet xmlns="{XLSX_NAMESPACE}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="20" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# Caracteres de controle não são permitidos em XML 1.0
+XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+def xlsx_cell(value):
+    """Célula <c> da planilha para um valor (vazia para None)"""
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return f'<c s="1"><v>{(value - EXCEL_EPOCH).days}</v></c>'
+    if isinstance(value, time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second
+        return f'<c s="2"><v>{seconds / 86400}</v></c>'
+    text = escape(XML_INVALID_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(columns, rows, sheet_name):
+    """
+    Gera uma planilha .xlsx (uma aba) em blocos (bytes), sem dependências externas.
+
+    As linhas vão direto para o XML da aba dentro do zip, com textos em linha
+    (inlineStr) em vez da tabela de textos compartilhados, que exigiria manter
+    todos os textos em memória até o fim.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_FILES.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            f'<workbook xmlns="{XLSX_NAMESPACE}" xmlns:r="{XLSX_RELATIONSHIPS}">'
+            f'<sheets><sheet name="{escape(sheet_name)}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield buffer.pop()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            header = ''.join(xlsx_cell(column) for column in columns)
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<worksheet xmlns="{XLSX_NAMESPACE}"><sheetData><row>{header}</row>'
+            ).encode())
+
+            pending = []
+            for row in rows:
+                pending.append('<row>' + ''.join(xlsx_cell(row[column]) for column in columns) + '</row>')
+                if len(pending) >= EXPORT_CHUNK_SIZE:
+                    sheet.write(''.join(pending).encode())
+                    pending = []
+                    yield buffer.pop()
+            pending.append('</sheetData></worksheet>')
+            sheet.write(''.join(pending).encode())
+    yield buffer.pop()
+
+
+EXPORT_DATASETS = {
+    # dataset: (colunas, nome da aba, usa período)
+    'tasks': (TASK_COLUMNS, 'Tarefas', True),
+    'daily': (DAILY_COLUMNS, 'Resumo diário', True),
+    'goals': (GOAL_COLUMNS, 'Metas', False),
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def export_rows(dataset, user, start_date=None, end_date=None):
+    """Linhas do conjunto de dados exportado"""
+    if dataset == 'tasks':
+        return iter_task_rows(user, start_date, end_date)
+    if dataset == 'daily':
+        return iter_daily_rows(user, start_date, end_date)
+    return iter_goal_rows(user)
+
+
+def stream_export(dataset, extension, rows):
+    """Conteúdo do arquivo exportado, em blocos (bytes)"""
+    columns, sheet_name, _ = EXPORT_DATASETS[dataset]
+    if extension == 'xlsx':
+        return stream_xlsx(columns, rows, sheet_name)
+    return stream_csv(columns, rows)
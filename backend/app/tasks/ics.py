@@ -0,0 +1,803 @@
+import codecs
+import hashlib
+import re
+import secrets
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .models import DeletionLog, Task, TaskOccurrence, UserPreference
+from .suggestions import invalidate_title_suggestions
+from .utils import ScheduleIndex, invalidate_user_cache, recurring_task_applies
+
+# Eventos gravados por bulk_create (e verificados contra a agenda) de cada vez
+IMPORT_CHUNK_SIZE = 500
+
+# Conflitos listados no resumo da importação (os demais são apenas contados)
+MAX_REPORTED_CONFLICTS = 20
+
+# COUNT acima disto (décadas de repetição) é tratado como repetição sem data de término
+MAX_RRULE_COUNT = 10000
+
+ICS_WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+DURATION_RE = re.compile(
+    r'^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?'
+    r'(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$'
+)
+
+
+def unfold_lines(chunks):
+    """
+    Converte os blocos de um arquivo ICS nas linhas lógicas (RFC 5545, seção 3.1).
+
+    Os blocos (bytes ou str) são decodificados de forma incremental e as linhas
+    dobradas (continuação iniciada por espaço ou tab) são reunidas; só a linha
+    atual fica em memória.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    current = None
+
+    def lines_of(text):
+        nonlocal current
+        for line in text:
+            line = line.rstrip('\r')
+            if line[:1] in (' ', '\t') and current is not None:
+                current += line[1:]
+            else:
+                if current:
+                    yield current
+                current = line
+
+    for chunk in chunks:
+        text = pending + (decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        lines = text.split('\n')
+        pending = lines.pop()
+        yield from lines_of(lines)
+
+    yield from lines_of([pending + decoder.decode(b'', final=True)])
+    if current:
+        yield current
+
+
+def split_unquoted(text, separator):
+    """Divide `text` em `separator`, ignorando separadores entre aspas"""
+    parts = []
+    start = 0
+    in_quotes = False
+    for index, char in enumerate(text):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == separator and not in_quotes:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_content_line(line):
+    """
+    Converte "NOME;PARAM=valor:conteúdo" em (nome, {param: valor}, conteúdo).
+
+    Retorna None para linhas malformadas.
+    """
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            break
+    else:
+        return None
+
+    name, *raw_params = split_unquoted(line[:index], ';')
+    params = {}
+    for param in raw_params:
+        key, _, value = param.partition('=')
+        params[key.upper()] = value.strip('"')
+    return name.upper(), params, line[index + 1:]
+
+
+def unescape_text(value):
+    """Remove o escape de valores TEXT do ICS (\\n, \\, \\; e \\\\)"""
+    return re.sub(r'\\([nN,;\\])', lambda match: '\n' if match.group(1) in 'nN' else match.group(1), value)
+
+
+def iter_events(chunks):
+    """
+    Percorre os VEVENTs de um arquivo ICS sem carregá-lo inteiro.
+
+    Cada evento é um dict {NOME: [(params, valor), ...]} com as propriedades do
+    próprio evento (componentes internos, como VALARM, são ignorados).
+    """
+    event = None
+    depth = 0
+    for line in unfold_lines(chunks):
+        parsed = parse_content_line(line)
+        if parsed is None:
+            continue
+        name, params, value = parsed
+
+        if name == 'BEGIN':
+            if event is not None:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                event = {}
+        elif name == 'END':
+            if event is None:
+                continue
+            if depth:
+                depth -= 1
+            elif value.upper() == 'VEVENT':
+                yield event
+                event = None
+        elif event is not None and not depth:
+            event.setdefault(name, []).append((params, value))
+
+
+def parse_ics_datetime(value, params):
+    """
+    Converte um valor DATE ou DATE-TIME do ICS.
+
+    Returns:
+        date para eventos de dia inteiro; datetime sem fuso, no horário local
+        (TIME_ZONE), para os demais. UTC ("Z") e TZID conhecidos são convertidos;
+        horários flutuantes ou com TZID desconhecido são mantidos como estão.
+    """
+    value = value.strip()
+    if len(value) < 8 or not value[:8].isdigit():
+        raise ValueError(value)
+    day = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    if params.get('VALUE', '').upper() == 'DATE' or len(value) == 8:
+        return day
+
+    # Mais rápido que strptime, que pesa em arquivos com dezenas de milhares de eventos
+    clock = value[9:15]
+    if value[8:9] not in ('T', 't') or len(clock) != 6 or not clock.isdigit():
+        raise ValueError(value)
+    moment = datetime(day.year, day.month, day.day, int(clock[:2]), int(clock[2:4]), int(clock[4:6]))
+    if value[-1:] in ('Z', 'z'):
+        moment = moment.replace(tzinfo=dt_timezone.utc)
+    elif params.get('TZID'):
+        try:
+            moment = moment.replace(tzinfo=ZoneInfo(params['TZID']))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+
+    if timezone.is_aware(moment):
+        moment = timezone.make_naive(moment)
+    return moment
+
+
+def parse_ics_duration(value):
+    """Converte uma DURATION do ICS (ex: PT1H30M) em timedelta"""
+    match = DURATION_RE.match(value.strip())
+    if not match:
+        raise ValueError(value)
+    parts = {key: int(amount or 0) for key, amount in match.groupdict().items() if key != 'sign'}
+    duration = timedelta(**parts)
+    return -duration if match.group('sign') == '-' else duration
+
+
+def map_rrule(rule, start_date):
+    """
+    Converte uma RRULE no padrão de repetição das tarefas.
+
+    Suporta DAILY, WEEKLY (com ou sem BYDAY) e MONTHLY no mesmo dia do mês, com
+    UNTIL ou COUNT. Regras sem equivalente (INTERVAL > 1, YEARLY, BYSETPOS,
+    "1MO"...) retornam None; valores malformados (COUNT=abc, UNTIL inválido)
+    levantam ValueError.
+
+    Returns:
+        (repeat_pattern, repeat_days, repeat_end_date) ou None
+    """
+    parts = {}
+    for item in rule.split(';'):
+        key, _, value = item.partition('=')
+        parts[key.strip().upper()] = value.strip().upper()
+
+    # WKST só muda o resultado com INTERVAL > 1, que não é suportado
+    parts.pop('WKST', None)
+    if parts.pop('INTERVAL', '1') != '1':
+        return None
+    unsupported = set(parts) - {'FREQ', 'BYDAY', 'BYMONTHDAY', 'UNTIL', 'COUNT'}
+    if unsupported:
+        return None
+
+    frequency = parts.get('FREQ')
+    if 'BYMONTHDAY' in parts and frequency != 'MONTHLY':
+        return None
+    weekdays = set()
+    for day in filter(None, parts.get('BYDAY', '').split(',')):
+        if day not in ICS_WEEKDAYS:
+            return None
+        weekdays.add(ICS_WEEKDAYS[day])
+
+    repeat_days = None
+    if frequency == 'DAILY' and not weekdays:
+        repeat_pattern = 'daily'
+    elif frequency in ('DAILY', 'WEEKLY'):
+        weekdays = weekdays or {start_date.weekday()}
+        if weekdays == {start_date.weekday()}:
+            repeat_pattern = 'weekly'
+        elif weekdays == {0, 1, 2, 3, 4}:
+            repeat_pattern = 'weekdays'
+        elif weekdays == {5, 6}:
+            repeat_pattern = 'weekends'
+        else:
+            repeat_pattern = 'custom'
+            repeat_days = ','.join(str(day) for day in sorted(weekdays))
+    elif frequency == 'MONTHLY' and not weekdays and parts.get('BYMONTHDAY', str(start_date.day)) == str(start_date.day):
+        repeat_pattern = 'monthly'
+    else:
+        return None
+
+    repeat_end_date = None
+    if parts.get('UNTIL'):
+        until = parse_ics_datetime(parts['UNTIL'], {})
+        repeat_end_date = until.date() if isinstance(until, datetime) else until
+    elif parts.get('COUNT'):
+        count = int(parts['COUNT'])
+        if count < 1:
+            raise ValueError(parts['COUNT'])
+        if count <= MAX_RRULE_COUNT:
+            repeat_end_date = recurrence_end_by_count(
+                Task(date=start_date, repeat_pattern=repeat_pattern, repeat_days=repeat_days), count
+            )
+
+    return repeat_pattern, repeat_days, repeat_end_date
+
+
+def recurrence_end_by_count(task, count):
+    """
+    Data da `count`-ésima ocorrência de uma tarefa recorrente (a primeira é task.date).
+
+    Para em date.max: a repetição que passaria dele termina ali.
+    """
+    current_date = task.date
+    # Limite de segurança: no padrão mensal um dia 31 se repete a cada dois meses no máximo
+    last_date = task.date + timedelta(days=min(62 * max(count, 1), (date.max - task.date).days))
+    found = 0
+    while current_date < last_date:
+        if recurring_task_applies(task, current_date):
+            found += 1
+            if found >= count:
+                return current_date
+        current_date += timedelta(days=1)
+    return last_date
+
+
+def ics_priority(value):
+    """Converte PRIORITY do ICS (1 = mais alta, 9 = mais baixa, 0 = indefinida) na prioridade da tarefa"""
+    try:
+        priority = int(value)
+    except (TypeError, ValueError):
+        return 2
+    if priority == 1:
+        return 4
+    if 2 <= priority <= 4:
+        return 3
+    if 6 <= priority <= 9:
+        return 1
+    return 2
+
+
+class ICSImporter:
+    """
+    Importa os eventos de um arquivo ICS como tarefas do usuário.
+
+    O arquivo é lido em streaming (iter_events) e os eventos gravados em blocos
+    de IMPORT_CHUNK_SIZE com bulk_create, tudo em uma transação. A sobreposição
+    com a agenda é verificada em memória: um ScheduleIndex por bloco, carregado
+    com uma query para as datas do bloco e alimentado com os eventos aceitos.
+    Assim a memória usada depende do tamanho do bloco, não do arquivo.
+
+    - RRULE vira repeat_pattern/repeat_days/repeat_end_date (ver map_rrule);
+      regras sem equivalente importam só a primeira ocorrência
+    - EXDATE vira uma ocorrência 'skipped', como a exclusão de uma ocorrência
+    - Eventos de dia inteiro, cancelados ou instâncias alteradas (RECURRENCE-ID)
+      são ignorados e contados no resumo
+    - Eventos com datas, duração ou RRULE malformadas são ignorados e contados
+      como 'invalid', sem interromper a importação do restante do arquivo
+
+    Args:
+        user: Dono das tarefas importadas
+        default_category: Categoria dos eventos sem CATEGORIES mapeada
+        category_map: {nome da categoria no ICS (minúsculo): Category}
+        on_conflict: 'skip' (ignora eventos que se sobrepõem à agenda) ou 'allow'
+    """
+
+    def __init__(self, user, default_category, category_map=None, on_conflict='skip'):
+        self.user = user
+        self.default_category = default_category
+        self.category_map = {name.lower(): category for name, category in (category_map or {}).items()}
+        self.on_conflict = on_conflict
+
+        self.counts = Counter()
+        self.conflicts = []
+
+    def run(self, chunks):
+        """
+        Importa os eventos lidos de `chunks` (iterável de bytes ou str).
+
+        Returns:
+            dict com as contagens (created, recurring, skipped_*, unsupported_rules,
+            invalid) e uma amostra dos conflitos
+        """
+        with transaction.atomic():
+            pending = []
+            for event in iter_events(chunks):
+                item = self._build(event)
+                if item is None:
+                    continue
+                pending.append(item)
+                if len(pending) >= IMPORT_CHUNK_SIZE:
+                    self._flush(pending)
+                    pending = []
+            self._flush(pending)
+
+        if self.counts['created']:
+            # bulk_create não dispara os sinais de post_save
+            invalidate_user_cache(self.user.id)
+            invalidate_title_suggestions(self.user.id)
+
+        summary = {
+            key: self.counts[key] for key in (
+                'created', 'recurring', 'skipped_conflicts', 'skipped_all_day',
+                'skipped_cancelled', 'skipped_exceptions', 'unsupported_rules', 'invalid',
+            )
+        }
+        summary['conflicts'] = self.conflicts
+        return summary
+
+    def _build(self, event):
+        """Converte um VEVENT em (Task, [datas excluídas]) ou None (contado no resumo)"""
+        def first(name, default=None):
+            values = event.get(name)
+            return values[0] if values else (None, default)
+
+        if 'RECURRENCE-ID' in event:
+            self.counts['skipped_exceptions'] += 1
+            return None
+        if (first('STATUS', '')[1] or '').upper() == 'CANCELLED':
+            self.counts['skipped_cancelled'] += 1
+            return None
+
+        try:
+            start_params, start_value = first('DTSTART')
+            if start_value is None:
+                raise ValueError('DTSTART ausente')
+            start = parse_ics_datetime(start_value, start_params)
+            if not isinstance(start, datetime):
+                self.counts['skipped_all_day'] += 1
+                return None
+
+            if 'DTEND' in event:
+                end = parse_ics_datetime(event['DTEND'][0][1], event['DTEND'][0][0])
+                if not isinstance(end, datetime):
+                    end = datetime.combine(end, start.time())
+            elif 'DURATION' in event:
+                end = start + parse_ics_duration(event['DURATION'][0][1])
+            else:
+                end = start
+
+            exdates = [
+                parse_ics_datetime(value, params)
+                for params, values in event.get('EXDATE', ())
+                for value in values.split(',')
+            ]
+            recurrence = map_rrule(event['RRULE'][0][1], start.date()) if 'RRULE' in event else None
+        except (ValueError, OverflowError):
+            # Um evento malformado não pode derrubar a importação (e a transação) do arquivo inteiro
+            self.counts['invalid'] += 1
+            return None
+
+        duration = max(end - start, timedelta(0))
+        task = Task(
+            user=self.user,
+            title=(unescape_text(first('SUMMARY', '')[1] or '').strip() or 'Sem título')[:200],
+            description=unescape_text(first('DESCRIPTION', '')[1] or '') or None,
+            category=self._category(event),
+            date=start.date(),
+            start_time=start.time().replace(microsecond=0),
+            end_time=(start + duration).time().replace(microsecond=0),
+            duration_minutes=int(duration.total_seconds() // 60),
+            priority=ics_priority(first('PRIORITY')[1]),
+        )
+
+        if recurrence is not None:
+            task.repeat_pattern, task.repeat_days, task.repeat_end_date = recurrence
+        else:
+            if 'RRULE' in event:
+                self.counts['unsupported_rules'] += 1
+            exdates = []
+
+        return task, [
+            value.date() if isinstance(value, datetime) else value
+            for value in exdates
+        ]
+
+    def _category(self, event):
+        for _, value in event.get('CATEGORIES', ()):
+            for name in split_unquoted(value, ','):
+                category = self.category_map.get(unescape_text(name).strip().lower())
+                if category is not None:
+                    return category
+        return self.default_category
+
+    def _flush(self, items):
+        """Verifica a sobreposição de um bloco de eventos e grava os aceitos"""
+        if not items:
+            return
+
+        schedule = ScheduleIndex.for_dates(self.user, {task.date for task, _ in items})
+        accepted = []
+        for task, exdates in items:
+            overlapping = schedule.find_overlap(task.date, task.start_time, task.end_time)
+            if overlapping and self.on_conflict == 'skip':
+                self.counts['skipped_conflicts'] += 1
+                if len(self.conflicts) < MAX_REPORTED_CONFLICTS:
+                    self.conflicts.append({
+                        'title': task.title,
+                        'date': task.date,
+                        'start_time': task.start_time,
+                        'end_time': task.end_time,
+                        'overlapping_task': overlapping,
+                    })
+                continue
+
+            schedule.add({
+                'id': None, 'title': task.title, 'date': task.date,
+                'start_time': task.start_time, 'end_time': task.end_time,
+            })
+            accepted.append((task, exdates))
+
+        Task.objects.bulk_create([task for task, _ in accepted])
+        TaskOccurrence.objects.bulk_create([
+            TaskOccurrence(task=task, date=exdate, status='skipped', notes='Excluída no calendário de origem')
+            for task, exdates in accepted
+            for exdate in set(exdates)
+            if exdate >= task.date
+        ], ignore_conflicts=True)
+
+        self.counts['created'] += len(accepted)
+        self.counts['recurring'] += sum(1 for task, _ in accepted if task.repeat_pattern != 'none')
+
+
+# Exportação: feed assinável (/api/calendar/<token>/calendar.ics)
+
+CALENDAR_PRODID = '-//TaskMaster//Tarefas//PT-BR'
+
+# Cache token do feed -> id do usuário (0 para token inexistente)
+FEED_TOKEN_CACHE_KEY = 'calendar-feed-token:{token}'
+
+# Eventos por bloco enviado ao cliente
+FEED_CHUNK_EVENTS = 200
+
+RRULE_WEEKDAYS = {number: name for name, number in ICS_WEEKDAYS.items()}
+
+# Prioridade da tarefa -> PRIORITY do ICS (1 = mais alta)
+ICS_PRIORITIES = {4: 1, 3: 3, 2: 5, 1: 9}
+
+# Anos antes e depois do início do feed cobertos pelas mudanças de fuso do VTIMEZONE
+VTIMEZONE_YEARS = 10
+
+
+def escape_text(value):
+    """Escapa um valor TEXT do ICS (inverso de unescape_text)"""
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Dobra uma linha do ICS em partes de até 75 octetos (RFC 5545, seção 3.1)"""
+    encoded = line.encode()
+    parts = []
+    limit = 75
+    while len(encoded) > limit:
+        cut = limit
+        # Não cortar no meio de um caractere UTF-8
+        while (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut])
+        encoded = encoded[cut:]
+        limit = 74  # a continuação começa com um espaço
+    parts.append(encoded)
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def format_local(moment):
+    """datetime local -> valor DATE-TIME usado com TZID"""
+    return moment.strftime('%Y%m%dT%H%M%S')
+
+
+def format_utc(moment):
+    """datetime com fuso -> valor DATE-TIME em UTC"""
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_offset(offset):
+    """timedelta -> TZOFFSETFROM/TZOFFSETTO (ex: -0300)"""
+    seconds = int(offset.total_seconds())
+    sign = '-' if seconds < 0 else '+'
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f'{sign}{hours:02d}{minutes:02d}' + (f'{seconds:02d}' if seconds else '')
+
+
+def zone_transitions(zone, start, end):
+    """
+    Mudanças de deslocamento do fuso entre os instantes UTC `start` e `end`.
+
+    O zoneinfo não expõe as transições: o deslocamento é amostrado dia a dia e
+    cada mudança é localizada por busca binária, com precisão de um minuto.
+
+    Returns:
+        lista de (instante UTC da mudança, deslocamento anterior, deslocamento novo)
+    """
+    transitions = []
+    moment = start
+    offset = moment.astimezone(zone).utcoffset()
+    while moment < end:
+        following = moment + timedelta(days=1)
+        following_offset = following.astimezone(zone).utcoffset()
+        if following_offset != offset:
+            low, high = moment, following
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if middle.astimezone(zone).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            transitions.append((high.replace(second=0, microsecond=0), offset, following_offset))
+            offset = following_offset
+        moment = following
+    return transitions
+
+
+def vtimezone_lines(tzid, start_year, end_year):
+    """
+    Linhas do VTIMEZONE de `tzid` entre o início de start_year e o fim de end_year.
+
+    A RFC 5545 (seção 3.2.19) exige um VTIMEZONE para cada TZID usado no
+    arquivo. Cada mudança de horário (de verão, ou de regra do fuso) no período
+    vira um STANDARD/DAYLIGHT com DTSTART próprio; antes da primeira mudança vale
+    o deslocamento do início do período.
+    """
+    zone = ZoneInfo(tzid)
+    start = datetime(start_year, 1, 1, tzinfo=zone).astimezone(dt_timezone.utc)
+    end = datetime(end_year + 1, 1, 1, tzinfo=zone).astimezone(dt_timezone.utc)
+
+    initial = start.astimezone(zone)
+    observances = [(
+        initial.replace(tzinfo=None), initial.utcoffset(), initial.utcoffset(),
+        bool(initial.dst()), initial.tzname(),
+    )]
+    for moment, offset_from, offset_to in zone_transitions(zone, start, end):
+        local = moment.astimezone(zone)
+        # DTSTART da observância é o horário local de antes da mudança
+        observances.append((
+            (moment + offset_from).replace(tzinfo=None), offset_from, offset_to, bool(local.dst()), local.tzname(),
+        ))
+
+    lines = ['BEGIN:VTIMEZONE', f'TZID:{tzid}']
+    for dtstart, offset_from, offset_to, daylight, name in observances:
+        kind = 'DAYLIGHT' if daylight else 'STANDARD'
+        lines += [
+            f'BEGIN:{kind}',
+            f'DTSTART:{format_local(dtstart)}',
+            f'TZOFFSETFROM:{format_offset(offset_from)}',
+            f'TZOFFSETTO:{format_offset(offset_to)}',
+        ]
+        if name:
+            lines.append(f'TZNAME:{escape_text(name)}')
+        lines.append(f'END:{kind}')
+    lines.append('END:VTIMEZONE')
+    return lines
+
+
+def task_rrule(task):
+    """
+    RRULE equivalente ao padrão de repetição da tarefa (inverso de map_rrule), ou None.
+
+    UNTIL vai em UTC, como exige a RFC 5545 quando DTSTART tem TZID, no fim do
+    dia de repeat_end_date.
+    """
+    pattern = task.repeat_pattern
+    if pattern == 'daily':
+        rule = 'FREQ=DAILY'
+    elif pattern == 'weekdays':
+        rule = 'FREQ=WEEKLY;BYDAY=MO,TU,WE,TH,FR'
+    elif pattern == 'weekends':
+        rule = 'FREQ=WEEKLY;BYDAY=SA,SU'
+    elif pattern == 'weekly':
+        rule = f'FREQ=WEEKLY;BYDAY={RRULE_WEEKDAYS[task.date.weekday()]}'
+    elif pattern == 'monthly':
+        rule = f'FREQ=MONTHLY;BYMONTHDAY={task.date.day}'
+    elif pattern == 'custom' and task.repeat_days:
+        days = sorted({int(day) for day in task.repeat_days.split(',') if day.strip().isdigit() and int(day) < 7})
+        if not days:
+            return None
+        rule = 'FREQ=WEEKLY;BYDAY=' + ','.join(RRULE_WEEKDAYS[day] for day in days)
+    else:
+        return None
+
+    if task.repeat_end_date:
+        until = timezone.make_aware(datetime.combine(task.repeat_end_date, time(23, 59, 59)))
+        rule += f';UNTIL={format_utc(until)}'
+    return rule
+
+
+def first_recurrence_date(task):
+    """
+    Primeira data em que a tarefa recorrente acontece (ou None).
+
+    No ICS o DTSTART sempre conta como ocorrência; já recurring_task_applies
+    ignora a data inicial se ela não segue o padrão (ex: 'weekdays' começando
+    num sábado), então o evento começa na primeira data válida.
+    """
+    for offset in range(7):
+        current_date = task.date + timedelta(days=offset)
+        if recurring_task_applies(task, current_date):
+            return current_date
+    return None
+
+
+def task_event(task, start_date, tzid, rrule=None, exdates=()):
+    """Linhas (bytes) do VEVENT de uma tarefa"""
+    start = datetime.combine(start_date, task.start_time)
+    end = datetime.combine(start_date, task.end_time)
+    if end <= start and task.duration_minutes:
+        # Tarefa que passa da meia-noite
+        end += timedelta(days=1)
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:task-{task.id}@taskmaster',
+        f'DTSTAMP:{format_utc(task.updated_at)}',
+        f'LAST-MODIFIED:{format_utc(task.updated_at)}',
+        f'DTSTART;TZID={tzid}:{format_local(start)}',
+        f'DTEND;TZID={tzid}:{format_local(end)}',
+        f'SUMMARY:{escape_text(task.title)}',
+    ]
+    if task.description:
+        lines.append(f'DESCRIPTION:{escape_text(task.description)}')
+    lines.append(f'CATEGORIES:{escape_text(task.category.name)}')
+    lines.append(f'PRIORITY:{ICS_PRIORITIES.get(task.priority, 5)}')
+    if rrule:
+        lines.append(f'RRULE:{rrule}')
+    if exdates:
+        values = ','.join(format_local(datetime.combine(exdate, task.start_time)) for exdate in sorted(exdates))
+        lines.append(f'EXDATE;TZID={tzid}:{values}')
+    lines.append('END:VEVENT')
+    return b''.join(fold_line(line) for line in lines)
+
+
+def iter_calendar(user_id, since):
+    """
+    Gera o feed ICS do usuário em blocos (bytes).
+
+    Tarefas avulsas a partir de `since` viram um VEVENT cada (as puladas ficam
+    de fora). Tarefas recorrentes ainda ativas em `since` viram um único VEVENT
+    com RRULE, e as ocorrências puladas ('skipped') viram EXDATE.
+
+    Os horários vão no fuso TIME_ZONE (TZID), descrito no VTIMEZONE do cabeçalho
+    desde o início da tarefa recorrente mais antiga (no máximo VTIMEZONE_YEARS
+    antes de `since`) até VTIMEZONE_YEARS depois de `since`.
+    """
+    tzid = settings.TIME_ZONE
+
+    recurring_tasks = list(
+        Task.objects.filter(user_id=user_id).exclude(repeat_pattern='none').filter(
+            Q(repeat_end_date__isnull=True) | Q(repeat_end_date__gte=since)
+        ).select_related('category').order_by('id')
+    )
+    exdates = defaultdict(list)
+    for task_id, skipped_date in TaskOccurrence.objects.filter(
+        task__in=recurring_tasks, status='skipped'
+    ).values_list('task_id', 'date'):
+        exdates[task_id].append(skipped_date)
+
+    recurring_events = []
+    for task in recurring_tasks:
+        rrule = task_rrule(task)
+        start_date = first_recurrence_date(task) if rrule else None
+        if start_date is not None:
+            recurring_events.append((task, start_date, rrule))
+
+    first_date = min([since, *(start_date for _, start_date, _ in recurring_events)])
+    first_year = max(first_date.year, since.year - VTIMEZONE_YEARS)
+    header = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{CALENDAR_PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:TaskMaster',
+        f'X-WR-TIMEZONE:{tzid}',
+        *vtimezone_lines(tzid, first_year, since.year + VTIMEZONE_YEARS),
+    ]
+    yield b''.join(fold_line(line) for line in header)
+
+    block = []
+    for task, start_date, rrule in recurring_events:
+        block.append(task_event(task, start_date, tzid, rrule, [
+            skipped_date for skipped_date in exdates[task.id] if skipped_date >= start_date
+        ]))
+        if len(block) >= FEED_CHUNK_EVENTS:
+            yield b''.join(block)
+            block = []
+
+    one_off_tasks = Task.objects.filter(
+        user_id=user_id, repeat_pattern='none', date__gte=since
+    ).exclude(status='skipped').select_related('category').order_by('date', 'start_time', 'id')
+    for task in one_off_tasks.iterator(chunk_size=FEED_CHUNK_EVENTS):
+        block.append(task_event(task, task.date, tzid))
+        if len(block) >= FEED_CHUNK_EVENTS:
+            yield b''.join(block)
+            block = []
+
+    block.append(fold_line('END:VCALENDAR'))
+    yield b''.join(block)
+
+
+def get_feed_user_id(token):
+    """Id do usuário dono do token do feed (consulta em cache), ou None"""
+    key = FEED_TOKEN_CACHE_KEY.format(token=token)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = UserPreference.objects.filter(calendar_token=token).values_list('user_id', flat=True).first()
+        cache.set(key, user_id or 0, settings.CALENDAR_FEED_CACHE_TIMEOUT)
+    return user_id or None
+
+
+def get_calendar_token(user, rotate=False):
+    """Token do feed do usuário, criado na primeira chamada; com rotate=True gera um novo (o antigo deixa de valer)"""
+    preferences, _ = UserPreference.objects.get_or_create(user=user)
+    if preferences.calendar_token and not rotate:
+        return preferences.calendar_token
+
+    if preferences.calendar_token:
+        cache.delete(FEED_TOKEN_CACHE_KEY.format(token=preferences.calendar_token))
+    preferences.calendar_token = secrets.token_urlsafe(32)
+    preferences.save(update_fields=['calendar_token', 'updated_at'])
+    return preferences.calendar_token
+
+
+def feed_last_modified(user_id):
+    """Momento da última alteração nas tarefas, ocorrências ou exclusões do usuário"""
+    moments = [
+        Task.objects.filter(user_id=user_id).aggregate(value=Max('updated_at'))['value'],
+        TaskOccurrence.objects.filter(task__user_id=user_id).aggregate(value=Max('updated_at'))['value'],
+        DeletionLog.objects.filter(user_id=user_id).aggregate(value=Max('deleted_at'))['value'],
+    ]
+    return max((moment for moment in moments if moment), default=timezone.now())
+
+
+def feed_etag(cache_key, last_modified):
+    """ETag do feed: muda com a versão dos dados do usuário (na chave de cache) e com a última alteração"""
+    return quote_etag(hashlib.md5(f'{cache_key}:{last_modified.isoformat()}'.encode()).hexdigest())
+
+
+def cache_feed(cache_key, etag, last_modified, chunks):
+    """Repassa os blocos do feed e, ao final, guarda o conteúdo completo em cache"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(cache_key, {
+        'etag': etag,
+        'last_modified': last_modified,
+        'content': b''.join(parts),
+    }, settings.CALENDAR_FEED_CACHE_TIMEOUT)
+
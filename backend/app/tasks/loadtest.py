@@ -0,0 +1,391 @@
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.core.signals import got_request_exception
+from django.db import connection, connections
+from django.db.models import F, Sum
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Goal, Task, TaskOccurrence
+from .seed import SEED_FUTURE_DAYS, seed_user
+
+# Peso de cada cenário na mistura padrão (proporção das requisições)
+DEFAULT_LOAD_MIX = {
+    'today': 4, 'day': 2, 'week': 2, 'month': 2, 'dashboard': 2, 'tasks-report': 1, 'goals-report': 1,
+    'energy-recommendations': 1, 'create': 1, 'complete': 2, 'goal-progress': 1,
+}
+
+# Mensagens de exceção que indicam disputa por lock no banco
+LOCK_ERROR_MARKERS = ('database is locked', 'deadlock detected', 'lock timeout', 'could not obtain lock')
+
+
+def percentile(values, percent):
+    """Percentil pelo método do posto mais próximo (values já ordenados)"""
+    index = max(0, math.ceil(percent / 100 * len(values)) - 1)
+    return values[index]
+
+
+async def asgi_request(application, method, path, headers=(), body=b''):
+    """
+    Envia uma requisição HTTP direto para a aplicação ASGI, sem rede.
+
+    Returns:
+        tupla (status, corpo em bytes)
+    """
+    url = urlsplit(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': url.path,
+        'raw_path': url.path.encode(),
+        'query_string': url.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'content-length', str(len(body)).encode()), *headers],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    request_sent = False
+    response_done = asyncio.Event()
+    response = {'status': None, 'body': []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        # O cliente só "desconecta" depois de receber a resposta inteira
+        await response_done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'].append(message.get('body', b''))
+            if not message.get('more_body', False):
+                response_done.set()
+
+    try:
+        await application(scope, receive, send)
+    finally:
+        response_done.set()
+    return response['status'], b''.join(response['body'])
+
+
+class LoadAccount:
+    """Usuário da carga: token JWT e os ids usados pelos cenários de escrita"""
+
+    def __init__(self, user):
+        self.user_id = user.id
+        self.authorization = f'Bearer {AccessToken.for_user(user)}'.encode()
+        self.goal_ids = list(Goal.objects.filter(user=user).values_list('id', flat=True))
+        self.goal_task_ids = list(
+            Task.objects.filter(user=user, goal__isnull=False).values_list('id', flat=True)[:50]
+        )
+        self.category_id = Task.objects.filter(user=user).values_list('category_id', flat=True).first()
+        # Metas com valor definido pelo cenário goal-progress: ficam fora da conferência
+        self.overwritten_goal_ids = set()
+
+
+def prepare_accounts(count, preset='small', seed=None, prefix='loadtest'):
+    """
+    Usuários <prefix>-1 ... <prefix>-<count>, gerados com seed_user() se ainda não existirem.
+
+    Usuários já existentes são reaproveitados como estão, então rodadas
+    seguidas não precisam gerar os dados de novo.
+    """
+    rng = random.Random(seed)
+    accounts = []
+    for index in range(1, count + 1):
+        username = f'{prefix}-{index}'
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            user = User.objects.create_user(username=username, email=f'{username}@example.com')
+            seed_user(user, preset, rng)
+        accounts.append(LoadAccount(user))
+    return accounts
+
+
+def load_scenarios(today):
+    """Cenários da carga: nome -> função (conta, rng) que devolve (método, caminho, corpo ou None)"""
+    period = f'start_date={(today - timedelta(days=30)).isoformat()}&end_date={today.isoformat()}'
+
+    def get(path):
+        return lambda account, rng: ('GET', path, None)
+
+    def day(account, rng):
+        return 'GET', f'/api/tasks/day/?date={(today + timedelta(days=rng.randint(-7, 7))).isoformat()}', None
+
+    def create(account, rng):
+        # Sem verificação de sobreposição: o foco é a gravação concorrente
+        start = rng.randrange(6, 21)
+        return 'POST', '/api/tasks/?ignore_overlap=true', {
+            'title': 'Tarefa da carga',
+            'category': account.category_id,
+            'date': (today + timedelta(days=rng.randint(1, SEED_FUTURE_DAYS))).isoformat(),
+            'start_time': f'{start:02d}:00',
+            'end_time': f'{start + 1:02d}:00',
+            'duration_minutes': 60,
+        }
+
+    def complete(account, rng):
+        # Conclui uma tarefa ligada a meta: tarefa e meta são gravadas na mesma requisição
+        if not account.goal_task_ids:
+            return get('/api/tasks/today/')(account, rng)
+        return 'POST', f'/api/tasks/{rng.choice(account.goal_task_ids)}/complete/', {'actual_value': 1}
+
+    def goal_progress(account, rng):
+        if not account.goal_ids:
+            return get('/api/goals/')(account, rng)
+        goal_id = rng.choice(account.goal_ids)
+        account.overwritten_goal_ids.add(goal_id)
+        return 'POST', f'/api/goals/{goal_id}/update_progress/', {'value': rng.randint(0, 100)}
+
+    return {
+        'day': day,
+        'today': get('/api/tasks/today/'),
+        'week': get('/api/tasks/week/'),
+        'month': get('/api/tasks/month/'),
+        'dashboard': get('/api/tasks/dashboard/'),
+        'tasks-report': get(f'/api/tasks/report/?{period}'),
+        'goals-report': get(f'/api/goals/report/?{period}'),
+        'energy-recommendations': get('/api/tasks/energy_recommendations/'),
+        'create': create,
+        'complete': complete,
+        'goal-progress': goal_progress,
+    }
+
+
+def parse_mix(value):
+    """'today=4,month=1' -> {'today': 4, 'month': 1}"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.strip().partition('=')
+        if name not in DEFAULT_LOAD_MIX:
+            raise ValueError(f"Cenário desconhecido: {name} (use {', '.join(DEFAULT_LOAD_MIX)})")
+        try:
+            mix[name] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f'Peso inválido para {name}: {weight}')
+    if not any(mix.values()):
+        raise ValueError('A mistura precisa de pelo menos um cenário com peso maior que zero')
+    return mix
+
+
+class LockWaitSampler(threading.Thread):
+    """
+    Amostra, em uma conexão própria, as sessões do PostgreSQL esperando por lock.
+
+    A cada `interval` segundos conta as sessões do banco com wait_event_type
+    'Lock' em pg_stat_activity. O tempo de espera estimado é a soma de
+    sessões esperando × intervalo.
+    """
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples = 0
+        self.waiting_samples = 0
+        self.waiting_total = 0
+        self.max_waiting = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self.stopped.wait(self.interval):
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity "
+                        "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+                    )
+                    waiting = cursor.fetchone()[0]
+                    self.samples += 1
+                    self.waiting_total += waiting
+                    self.max_waiting = max(self.max_waiting, waiting)
+                    if waiting:
+                        self.waiting_samples += 1
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return {
+            'samples': self.samples,
+            'samples_with_waits': self.waiting_samples,
+            'max_waiting_sessions': self.max_waiting,
+            'estimated_wait_seconds': round(self.waiting_total * self.interval, 3),
+        }
+
+
+async def run_load(application, accounts, mix, concurrency, duration, seed=None):
+    """
+    Gera carga na aplicação ASGI com `concurrency` clientes por `duration` segundos.
+
+    Cada cliente usa a conta de índice (cliente % contas), então com mais
+    clientes que contas o mesmo usuário faz requisições simultâneas (disputa
+    pelas mesmas tarefas e metas). Cada requisição sorteia um cenário pelos
+    pesos de `mix`.
+
+    Returns:
+        dict com os resultados por cenário e no total (ver summarize_load)
+    """
+    scenarios = load_scenarios(timezone.localdate())
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def client(index):
+        rng = random.Random(f'{seed}-{index}')
+        account = accounts[index % len(accounts)]
+        headers = [(b'authorization', account.authorization), (b'content-type', b'application/json')]
+        while loop.time() < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, data = scenarios[name](account, rng)
+            body = json.dumps(data).encode() if data is not None else b''
+            started = perf_counter()
+            try:
+                status, _ = await asgi_request(application, method, path, headers, body)
+            except Exception as e:
+                status = type(e).__name__
+            latencies[name].append((perf_counter() - started) * 1000)
+            statuses[name][status] += 1
+
+    started = perf_counter()
+    await asyncio.gather(*(client(index) for index in range(concurrency)))
+    return summarize_load(latencies, statuses, perf_counter() - started)
+
+
+def summarize_load(latencies, statuses, wall_time):
+    """Vazão, percentis de latência (ms) e taxa de erro (status >= 400 ou exceção) por cenário e no total"""
+    def summary(values, counts):
+        values = sorted(values)
+        errors = sum(
+            count for status, count in counts.items() if not isinstance(status, int) or status >= 400
+        )
+        return {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / wall_time, 2),
+            'p50_ms': round(percentile(values, 50), 2),
+            'p95_ms': round(percentile(values, 95), 2),
+            'p99_ms': round(percentile(values, 99), 2),
+            'error_rate': round(errors / len(values), 4),
+            'statuses': {str(status): count for status, count in sorted(counts.items(), key=str)},
+        }
+
+    scenarios = {name: summary(latencies[name], statuses[name]) for name in sorted(latencies)}
+    all_latencies = [value for values in latencies.values() for value in values]
+    all_statuses = sum(statuses.values(), Counter())
+    return {
+        'wall_seconds': round(wall_time, 3),
+        'total': summary(all_latencies, all_statuses) if all_latencies else None,
+        'scenarios': scenarios,
+    }
+
+
+class RequestExceptionRecorder:
+    """Conta as exceções não tratadas das views (got_request_exception), separando as de lock"""
+
+    def __init__(self):
+        self.exceptions = Counter()
+        self.lock_errors = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        got_request_exception.connect(self.record)
+        return self
+
+    def __exit__(self, *exc_info):
+        got_request_exception.disconnect(self.record)
+
+    def record(self, sender, request=None, **kwargs):
+        error = sys.exc_info()[1]
+        if error is None:
+            return
+        with self.lock:
+            self.exceptions[type(error).__name__] += 1
+            if any(marker in str(error).lower() for marker in LOCK_ERROR_MARKERS):
+                self.lock_errors += 1
+
+
+def goal_balances(goal_ids):
+    """
+    {meta: (current_value, soma dos actual_value concluídos)} das metas.
+
+    A soma cobre as tarefas avulsas concluídas e as ocorrências concluídas das
+    tarefas ligadas à meta, que é o que deveria ter entrado no current_value.
+    """
+    contributions = defaultdict(int)
+    one_off = Task.objects.filter(goal_id__in=goal_ids, repeat_pattern='none', status='completed')
+    occurrences = TaskOccurrence.objects.filter(task__goal_id__in=goal_ids, status='completed')
+    for rows in (
+        one_off.values('goal_id').annotate(total=Sum('actual_value')),
+        occurrences.values(goal_id=F('task__goal_id')).annotate(total=Sum('actual_value')),
+    ):
+        for row in rows:
+            contributions[row['goal_id']] += row['total'] or 0
+    return {
+        goal_id: (current_value, contributions[goal_id])
+        for goal_id, current_value in Goal.objects.filter(id__in=goal_ids).values_list('id', 'current_value')
+    }
+
+
+def check_goal_balances(before, after, skip_ids):
+    """
+    Metas cujo current_value mudou diferente dos valores concluídos na carga.
+
+    Contagem em dobro e atualizações perdidas entre requisições simultâneas
+    aparecem aqui. Metas em `skip_ids` (valor definido manualmente) são ignoradas.
+    """
+    mismatches = []
+    for goal_id, (current_value, contributed) in sorted(after.items()):
+        if goal_id in skip_ids or goal_id not in before:
+            continue
+        expected = contributed - before[goal_id][1]
+        actual = current_value - before[goal_id][0]
+        if expected != actual:
+            mismatches.append({'goal_id': goal_id, 'expected_delta': expected, 'actual_delta': actual})
+    return mismatches
+
+
+def run_load_test(application, accounts, mix, concurrency, duration, seed=None):
+    """
+    Executa run_load() medindo as esperas por lock e as exceções das views, e
+    confere depois o valor das metas das contas (ver check_goal_balances).
+
+    As conexões do processo são fechadas antes, para que cada requisição use
+    a sua (como no uvicorn, cada requisição roda as views síncronas em uma
+    thread própria).
+    """
+    goal_ids = [goal_id for account in accounts for goal_id in account.goal_ids]
+    before = goal_balances(goal_ids)
+    connections.close_all()
+    sampler = LockWaitSampler() if connection.vendor == 'postgresql' else None
+    if sampler is not None:
+        sampler.start()
+
+    with RequestExceptionRecorder() as recorder:
+        result = asyncio.run(run_load(application, accounts, mix, concurrency, duration, seed))
+
+    result['lock_waits'] = sampler.stop() if sampler is not None else None
+    result['lock_errors'] = recorder.lock_errors
+    result['exceptions'] = dict(recorder.exceptions)
+    skip_ids = set().union(*(account.overwritten_goal_ids for account in accounts))
+    result['goal_mismatches'] = check_goal_balances(before, goal_balances(goal_ids), skip_ids)
+    return result
@@ -0,0 +1,153 @@
+import time as timer
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from app.tasks.models import Category, Goal, Task, TaskOccurrence
+from app.tasks.row_serializers import RowSerializer
+from app.tasks.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    """
+    Mede a serialização do calendário em um mês com `--items` entradas.
+
+    1. Compara o TaskSerializer com o RowSerializer (values()) nas tarefas avulsas
+       e ocorrências, conferindo se o JSON é idêntico byte a byte.
+    2. Compara o endpoint de mês nos formatos v1 e v2 (compacto), em tamanho e tempo.
+
+    Os dados são descartados ao final.
+    """
+    help = 'Mede o ganho da serialização via values() e do formato v2 do calendário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000, help='Entradas no mês de teste')
+        parser.add_argument('--repeat', type=int, default=5, help='Repetições de cada medição (vale a melhor)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self._seed(options['items'])
+            start_date = date(2026, 1, 1)
+            end_date = date(2026, 1, 31)
+
+            tasks = Task.objects.filter(
+                user=user, date__range=[start_date, end_date], repeat_pattern='none'
+            ).with_relations()
+            occurrences = TaskOccurrence.objects.filter(
+                task__user=user, date__range=[start_date, end_date]
+            ).with_relations()
+
+            def serializer_path():
+                data = list(TaskSerializer(tasks, many=True).data)
+                data.extend(TaskSerializer(occurrence.task).data for occurrence in occurrences)
+                return JSONRenderer().render(data)
+
+            def row_path():
+                serializer = TaskSerializer()
+                data = RowSerializer(serializer).render(tasks)
+                data.extend(RowSerializer(serializer, prefix='task__').render(occurrences))
+                return JSONRenderer().render(data)
+
+            serializer_time, serializer_output = self._measure(serializer_path, options['repeat'])
+            row_time, row_output = self._measure(row_path, options['repeat'])
+
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user)
+            url = f'/api/tasks/month/?year={start_date.year}&month={start_date.month}'
+            v1_time, v1_output = self._measure(lambda: client.get(url).content, options['repeat'])
+            v2_time, v2_output = self._measure(lambda: client.get(f'{url}&format=v2').content, options['repeat'])
+
+            transaction.set_rollback(True)
+
+        if serializer_output != row_output:
+            raise CommandError('A saída do RowSerializer difere da saída do TaskSerializer')
+
+        self.stdout.write(f"Tarefas avulsas e ocorrências: {len(row_output)} bytes de JSON")
+        self.stdout.write(f"  TaskSerializer: {serializer_time * 1000:.1f} ms")
+        self.stdout.write(f"  RowSerializer:  {row_time * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(f"  Saída idêntica; {serializer_time / row_time:.1f}x mais rápido"))
+
+        self.stdout.write(f"Endpoint do mês ({options['items']} entradas)")
+        self.stdout.write(f"  v1: {len(v1_output)} bytes, {v1_time * 1000:.1f} ms")
+        self.stdout.write(f"  v2: {len(v2_output)} bytes, {v2_time * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"  v2 {100 - len(v2_output) * 100 / len(v1_output):.0f}% menor, {v1_time / v2_time:.1f}x mais rápido"
+        ))
+
+    def _measure(self, render, repeat):
+        """Executa `render` `repeat` vezes e retorna o menor tempo e a última saída"""
+        best = None
+        output = None
+        for _ in range(repeat):
+            started = timer.perf_counter()
+            output = render()
+            elapsed = timer.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def _seed(self, items):
+        """Cria um usuário com 1/4 das entradas como tarefas avulsas, 1/4 como ocorrências e 1/2 geradas"""
+        user = User.objects.create_user(username='calendar-benchmark', email='calendar-benchmark@example.com')
+        categories = [
+            Category.objects.create(name=f'Categoria {index}', icon='check', color='#000000')
+            for index in range(5)
+        ]
+        goal = Goal.objects.create(
+            user=user,
+            title='Meta',
+            category=categories[0],
+            period='monthly',
+            start_date=date(2026, 1, 1),
+            end_date=date(2026, 1, 31),
+            target_value=100,
+            measurement_unit='count',
+        )
+
+        occurrence_count = items // 4
+        generated_count = items // 2
+        Task.objects.bulk_create([
+            Task(
+                user=user,
+                title=f'Tarefa {index}',
+                description='Descrição' if index % 2 else None,
+                category=categories[index % len(categories)],
+                goal=goal if index % 3 == 0 else None,
+                date=date(2026, 1, 1) + timedelta(days=index % 31),
+                start_time=time(6 + index % 12),
+                end_time=time(7 + index % 12),
+                duration_minutes=60,
+                target_value=index % 7 or None,
+            )
+            for index in range(items - occurrence_count - generated_count)
+        ])
+
+        recurring_tasks = Task.objects.bulk_create([
+            Task(
+                user=user,
+                title=f'Tarefa recorrente {index}',
+                category=categories[index % len(categories)],
+                goal=goal if index % 2 else None,
+                date=date(2025, 12, 1),
+                start_time=time(5),
+                end_time=time(6),
+                duration_minutes=60,
+                repeat_pattern='daily',
+            )
+            # Tarefas diárias: cada uma ocupa os 31 dias do mês com ocorrências ou geradas
+            for index in range((occurrence_count + generated_count) // 31 + 1)
+        ])
+        TaskOccurrence.objects.bulk_create([
+            TaskOccurrence(
+                task=recurring_tasks[index // 31],
+                date=date(2026, 1, 1) + timedelta(days=index % 31),
+                status='completed',
+                actual_value=1,
+            )
+            for index in range(occurrence_count)
+        ])
+
+        return user
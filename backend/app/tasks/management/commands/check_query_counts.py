@@ -0,0 +1,121 @@
+from datetime import time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.tasks.models import Category, Goal, Task, TaskOccurrence
+
+
+class Command(BaseCommand):
+    """
+    Verifica se o número de queries dos endpoints de listagem é constante.
+
+    Cria dois conjuntos de dados temporários (um pequeno e um maior), chama cada
+    endpoint de listagem com os dois e falha se a quantidade de queries crescer
+    com o tamanho do resultado (sinal de N+1). Os dados são descartados ao final.
+    """
+    help = 'Falha se a quantidade de queries de algum endpoint de listagem crescer com o tamanho do resultado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--small', type=int, default=2, help='Tarefas de cada tipo no conjunto pequeno')
+        parser.add_argument('--large', type=int, default=12, help='Tarefas de cada tipo no conjunto grande')
+
+    def handle(self, *args, **options):
+        small = self._measure(options['small'])
+        large = self._measure(options['large'])
+
+        failures = []
+        for endpoint, small_count in small.items():
+            large_count = large[endpoint]
+            self.stdout.write(f"{endpoint}: {small_count} -> {large_count} queries")
+            if large_count > small_count:
+                failures.append(endpoint)
+
+        if failures:
+            raise CommandError(f"Queries crescem com o tamanho do resultado em: {', '.join(failures)}")
+
+        self.stdout.write(self.style.SUCCESS('Quantidade de queries constante em todos os endpoints de listagem'))
+
+    def _measure(self, size):
+        """Cria dados temporários com `size` tarefas de cada tipo e mede as queries de cada endpoint"""
+        counts = {}
+
+        with transaction.atomic():
+            user, goal = self._seed(size)
+            client = APIClient(SERVER_NAME='localhost')
+            client.force_authenticate(user)
+
+            today = timezone.localdate()
+            endpoints = {
+                'tasks-list': '/api/tasks/',
+                'tasks-day': f'/api/tasks/day/?date={today.isoformat()}',
+                'tasks-today': f'/api/tasks/today/?date={today.isoformat()}',
+                'tasks-week': '/api/tasks/week/',
+                'tasks-month': '/api/tasks/month/',
+                'tasks-energy-recommendations': '/api/tasks/energy_recommendations/',
+                'goals-list': '/api/goals/',
+                'goals-related-tasks': f'/api/goals/{goal.id}/related_tasks/',
+            }
+
+            for name, url in endpoints.items():
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f"{url} retornou {response.status_code}")
+                counts[name] = len(context.captured_queries)
+
+            transaction.set_rollback(True)
+
+        return counts
+
+    def _seed(self, size):
+        """Cria um usuário com tarefas avulsas e recorrentes, cada uma com categoria e meta próprias"""
+        today = timezone.localdate()
+        user = User.objects.create_user(username=f'query-check-{size}', email=f'query-check-{size}@example.com')
+
+        goal = None
+        for index in range(size):
+            category = Category.objects.create(name=f'Categoria {index}', icon='check', color='#000000')
+            goal = Goal.objects.create(
+                user=user,
+                title=f'Meta {index}',
+                category=category,
+                period='monthly',
+                start_date=today - timedelta(days=30),
+                end_date=today + timedelta(days=30),
+                target_value=100,
+                measurement_unit='count',
+            )
+
+            Task.objects.create(
+                user=user,
+                title=f'Tarefa {index}',
+                category=category,
+                goal=goal,
+                date=today,
+                start_time=time(8),
+                end_time=time(9),
+                duration_minutes=60,
+            )
+
+            recurring_task = Task.objects.create(
+                user=user,
+                title=f'Tarefa recorrente {index}',
+                category=category,
+                goal=goal,
+                date=today - timedelta(days=7),
+                start_time=time(10),
+                end_time=time(11),
+                duration_minutes=60,
+                repeat_pattern='daily',
+            )
+            TaskOccurrence.objects.create(task=recurring_task, date=today, status='pending')
+
+        # Todas as tarefas na mesma meta para que related_tasks cresça com `size`
+        Task.objects.filter(user=user).update(goal=goal)
+
+        return user, goal
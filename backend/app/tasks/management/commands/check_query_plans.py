@@ -0,0 +1,161 @@
+import re
+from datetime import time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Case, Count, IntegerField, Sum, When
+from django.utils import timezone
+
+from app.tasks.models import Category, Goal, Task, TaskOccurrence
+from app.tasks.utils import get_overlapping_tasks
+
+
+class Command(BaseCommand):
+    """
+    Captura os planos de execução (EXPLAIN) das queries mais acessadas e falha se
+    alguma delas fizer varredura completa de tabela.
+
+    Os dados de teste são criados dentro de uma transação que é desfeita ao final.
+    Funciona em SQLite e PostgreSQL; no PostgreSQL a varredura sequencial é
+    desabilitada na sessão para que o plano só a use quando nenhum índice servir.
+    """
+    help = 'Falha se as queries de calendário, dashboard, relatório ou sobreposição fizerem varredura completa de tabela'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5, help='Usuários criados nos dados de teste')
+        parser.add_argument('--tasks', type=int, default=200, help='Tarefas avulsas criadas por usuário')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"Banco de dados não suportado: {connection.vendor}")
+
+        failures = []
+
+        with transaction.atomic():
+            user = self._seed(options['users'], options['tasks'])
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for name, queryset in self._queries(user).items():
+                plan = queryset.explain()
+                scanned = self._full_scans(plan)
+
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f"--- {name}\n{plan}")
+
+                if scanned:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f"{name}: varredura completa em {', '.join(scanned)}"))
+                else:
+                    self.stdout.write(f"{name}: ok")
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"Varredura completa de tabela em: {', '.join(failures)}")
+
+        self.stdout.write(self.style.SUCCESS('Nenhuma query fez varredura completa de tabela'))
+
+    def _queries(self, user):
+        """Queries dos endpoints de calendário, dashboard, relatório e da verificação de sobreposição"""
+        today = timezone.localdate()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        tasks = Task.objects.filter(user=user)
+        completed = Sum(Case(When(status='completed', then=1), default=0, output_field=IntegerField()))
+
+        return {
+            'calendar-one-off': tasks.filter(date__range=[start_of_week, end_of_week], repeat_pattern='none'),
+            'calendar-recurring': tasks.exclude(repeat_pattern='none'),
+            'calendar-occurrences': TaskOccurrence.objects.filter(
+                date__range=[start_of_week, end_of_week],
+                task__user=user
+            ).with_relations(),
+            'dashboard-today': tasks.filter(date=today).values('status').annotate(count=Count('id')),
+            'dashboard-week': tasks.filter(date__range=[start_of_week, end_of_week], status='completed'),
+            'dashboard-trend': tasks.filter(
+                date__range=[today - timedelta(days=30), today]
+            ).values('date').annotate(total=Count('id'), completed=completed),
+            'dashboard-goals': Goal.objects.filter(user=user, end_date__gte=today, is_completed=False),
+            'report-status': tasks.filter(
+                date__gte=today - timedelta(days=30), date__lte=today
+            ).values('status').annotate(count=Count('id')),
+            'report-categories': tasks.filter(
+                date__gte=today - timedelta(days=30), date__lte=today
+            ).values('category__name', 'category__color').annotate(count=Count('id'), completed=completed),
+            'overlap': get_overlapping_tasks(user, today.isoformat(), '09:00', '10:00'),
+        }
+
+    def _full_scans(self, plan):
+        """Retorna as tabelas que o plano percorre por completo"""
+        if connection.vendor == 'postgresql':
+            return re.findall(r'Seq Scan on (\w+)', plan)
+        # SQLite: "SCAN tabela" percorre a tabela (ou um índice) inteira; "SEARCH" usa o índice
+        return [
+            table for table in re.findall(r'\bSCAN (\w+)', plan)
+            if table != 'CONSTANT'
+        ]
+
+    def _seed(self, users, tasks_per_user):
+        """Cria usuários com tarefas avulsas, recorrentes, ocorrências e metas; retorna o primeiro usuário"""
+        today = timezone.localdate()
+        category = Category.objects.create(name='Plano de execução', icon='check', color='#000000')
+        statuses = [choice for choice, _ in Task.STATUS_CHOICES]
+        first_user = None
+
+        for user_index in range(users):
+            user = User.objects.create_user(
+                username=f'query-plan-{user_index}',
+                email=f'query-plan-{user_index}@example.com'
+            )
+            first_user = first_user or user
+
+            Goal.objects.create(
+                user=user,
+                title='Meta',
+                category=category,
+                period='monthly',
+                start_date=today - timedelta(days=30),
+                end_date=today + timedelta(days=30),
+                target_value=100,
+                measurement_unit='count',
+            )
+
+            Task.objects.bulk_create([
+                Task(
+                    user=user,
+                    title=f'Tarefa {index}',
+                    category=category,
+                    date=today - timedelta(days=index % 90),
+                    start_time=time(index % 24),
+                    end_time=time(index % 24, 30),
+                    duration_minutes=30,
+                    status=statuses[index % len(statuses)],
+                )
+                for index in range(tasks_per_user)
+            ])
+
+            recurring_tasks = Task.objects.bulk_create([
+                Task(
+                    user=user,
+                    title=f'Tarefa recorrente {index}',
+                    category=category,
+                    date=today - timedelta(days=60),
+                    start_time=time(6),
+                    end_time=time(7),
+                    duration_minutes=60,
+                    repeat_pattern=pattern,
+                )
+                for index, pattern in enumerate(['daily', 'weekdays', 'weekly', 'monthly'])
+            ])
+
+            TaskOccurrence.objects.bulk_create([
+                TaskOccurrence(task=task, date=today - timedelta(days=offset), status='completed')
+                for task in recurring_tasks
+                for offset in range(30)
+            ])
+
+        return first_user
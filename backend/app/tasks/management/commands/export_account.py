@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from app.tasks.archive import write_account_archive
+
+
+class Command(BaseCommand):
+    """
+    Grava os dados de um usuário em um pacote .zip (mesmo formato do GET /api/account/archive/).
+
+    Ex: python manage.py export_account ana@exemplo.com ana.zip
+    """
+    help = 'Exporta categorias, metas, tarefas, ocorrências, preferências e perfil de energia de um usuário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='E-mail ou nome de usuário')
+        parser.add_argument('path', help='Arquivo .zip de saída')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(Q(email=options['user']) | Q(username=options['user'])).first()
+        if user is None:
+            raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        size = 0
+        try:
+            with open(options['path'], 'wb') as output:
+                for chunk in write_account_archive(user):
+                    output.write(chunk)
+                    size += len(chunk)
+        except OSError as e:
+            raise CommandError(f'Não foi possível gravar o arquivo: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f"Conta de {user.username} exportada em {options['path']} ({size} bytes)"))
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from app.tasks.archive import AccountArchiveImporter, ArchiveError
+
+
+class Command(BaseCommand):
+    """
+    Restaura um pacote de export_account em um usuário sem tarefas nem metas
+    (mesma lógica do POST /api/account/archive/).
+
+    Ex: python manage.py import_account ana.zip --user ana@exemplo.com
+    """
+    help = 'Importa um pacote de conta gerado por export_account'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo .zip gerado por export_account')
+        parser.add_argument('--user', required=True, help='E-mail ou nome de usuário de destino')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(Q(email=options['user']) | Q(username=options['user'])).first()
+        if user is None:
+            raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        try:
+            with open(options['path'], 'rb') as archive_file:
+                counts = AccountArchiveImporter(user).run(archive_file)
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler o arquivo: {e}')
+        except ArchiveError as e:
+            raise CommandError(str(e))
+
+        for key, value in counts.items():
+            self.stdout.write(f'{key}: {value}')
+        self.stdout.write(self.style.SUCCESS(f'Conta importada em {user.username}'))
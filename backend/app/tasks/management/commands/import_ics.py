@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from app.tasks.ics import ICSImporter
+from app.tasks.models import Category
+
+# Tamanho dos blocos lidos do arquivo
+READ_SIZE = 64 * 1024
+
+
+class Command(BaseCommand):
+    """
+    Importa um arquivo iCalendar como tarefas de um usuário (mesma lógica do /api/tasks/import_ics/).
+
+    Ex: python manage.py import_ics agenda.ics --user ana@exemplo.com --category 1 --map Trabalho=3
+    """
+    help = 'Importa os eventos de um arquivo ICS como tarefas de um usuário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Caminho do arquivo .ics')
+        parser.add_argument('--user', required=True, help='E-mail ou nome de usuário do dono das tarefas')
+        parser.add_argument('--category', type=int, required=True, help='Categoria dos eventos sem categoria mapeada')
+        parser.add_argument(
+            '--map', action='append', default=[], metavar='NOME=ID',
+            help='Categoria do ICS -> id da categoria (pode ser repetido)'
+        )
+        parser.add_argument('--on-conflict', choices=['skip', 'allow'], default='skip',
+                            help='Ignorar (skip) ou importar (allow) eventos que se sobrepõem à agenda')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(Q(email=options['user']) | Q(username=options['user'])).first()
+        if user is None:
+            raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        category_ids = {options['category']}
+        category_map = {}
+        for item in options['map']:
+            name, _, category_id = item.rpartition('=')
+            if not name or not category_id.isdigit():
+                raise CommandError(f'Mapeamento inválido: {item} (use NOME=ID)')
+            category_map[name] = int(category_id)
+            category_ids.add(int(category_id))
+
+        categories = Category.objects.in_bulk(category_ids)
+        missing = category_ids - set(categories)
+        if missing:
+            raise CommandError(f"Categorias não encontradas: {', '.join(map(str, sorted(missing)))}")
+
+        importer = ICSImporter(
+            user,
+            categories[options['category']],
+            category_map={name: categories[category_id] for name, category_id in category_map.items()},
+            on_conflict=options['on_conflict'],
+        )
+        try:
+            with open(options['path'], 'rb') as ics_file:
+                summary = importer.run(iter(lambda: ics_file.read(READ_SIZE), b''))
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler o arquivo: {e}')
+
+        for key, value in summary.items():
+            if key != 'conflicts':
+                self.stdout.write(f'{key}: {value}')
+        for conflict in summary['conflicts']:
+            self.stdout.write(
+                f"  conflito: {conflict['title']} em {conflict['date']} {conflict['start_time']} "
+                f"com {conflict['overlapping_task']['title']}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{summary['created']} tarefas importadas"))
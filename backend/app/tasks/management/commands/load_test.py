@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.tasks.loadtest import DEFAULT_LOAD_MIX, parse_mix, prepare_accounts, run_load_test
+from app.tasks.seed import SEED_PRESETS
+from core.asgi import application
+
+
+class Command(BaseCommand):
+    """
+    Teste de carga concorrente na aplicação ASGI (core.asgi.application), no mesmo processo.
+
+    As requisições vão direto para a aplicação, sem rede e sem uvicorn, mas
+    pelo mesmo caminho: cada requisição roda as views síncronas em uma thread
+    e conexão próprias. Os usuários (<prefix>-N, gerados com seed_user()) são
+    mantidos entre as rodadas; --cleanup os exclui ao final.
+
+    Roda em SQLite (arquivo) e PostgreSQL. No PostgreSQL, as sessões esperando
+    por lock são amostradas durante a carga; nos dois bancos, as exceções de
+    lock ("database is locked", deadlock) são contadas. Ao final, o valor das
+    metas é conferido com os valores concluídos durante a carga.
+
+    Ex: python manage.py load_test --users 2 --concurrency 16 --mix complete=3,goal-progress=1,today=1
+    """
+    help = 'Gera carga concorrente na aplicação ASGI e mede vazão, latência, erros e esperas por lock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=4, help='Usuários distintos na carga')
+        parser.add_argument('--concurrency', type=int, default=8, help='Clientes simultâneos')
+        parser.add_argument('--duration', type=float, default=10, help='Duração da carga (segundos)')
+        parser.add_argument(
+            '--mix', default=None,
+            help=f"Pesos dos cenários, ex: today=4,complete=1 (padrão: "
+                 f"{','.join(f'{name}={weight}' for name, weight in DEFAULT_LOAD_MIX.items())})"
+        )
+        parser.add_argument('--preset', choices=list(SEED_PRESETS), default='small', help='Volume de dados por usuário')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados e dos sorteios')
+        parser.add_argument('--prefix', default='loadtest', help='Prefixo dos usuários da carga')
+        parser.add_argument('--cleanup', action='store_true', help='Exclui os usuários da carga ao final')
+        parser.add_argument('--output', help='Grava o resultado neste arquivo JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and str(connection.settings_dict['NAME']) in (':memory:', ''):
+            raise CommandError('O SQLite em memória não é compartilhado entre conexões: use um arquivo')
+        if options['users'] < 1 or options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--users, --concurrency e --duration devem ser maiores que zero')
+        try:
+            mix = parse_mix(options['mix']) if options['mix'] else DEFAULT_LOAD_MIX
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        accounts = prepare_accounts(options['users'], options['preset'], options['seed'], options['prefix'])
+        self.stdout.write(
+            f"{connection.vendor}: {options['concurrency']} clientes, {len(accounts)} usuários, "
+            f"{options['duration']:g}s"
+        )
+
+        try:
+            result = run_load_test(
+                application, accounts, mix, options['concurrency'], options['duration'], options['seed']
+            )
+        finally:
+            if options['cleanup']:
+                User.objects.filter(id__in=[account.user_id for account in accounts]).delete()
+
+        for name, summary in [*result['scenarios'].items(), ('total', result['total'])]:
+            if summary is None:
+                continue
+            self.stdout.write(
+                f"{name:<24} {summary['requests']:6d} req  {summary['throughput_rps']:8.1f} req/s  "
+                f"p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  p99 {summary['p99_ms']:8.1f} ms  "
+                f"erros {summary['error_rate'] * 100:5.1f}%"
+            )
+
+        if result['lock_waits'] is not None:
+            waits = result['lock_waits']
+            self.stdout.write(
+                f"Esperas por lock: {waits['samples_with_waits']}/{waits['samples']} amostras, "
+                f"até {waits['max_waiting_sessions']} sessões, ~{waits['estimated_wait_seconds']}s no total"
+            )
+        if result['exceptions']:
+            self.stdout.write(self.style.WARNING(
+                f"Exceções nas views: {result['exceptions']} ({result['lock_errors']} de lock)"
+            ))
+
+        if result['goal_mismatches']:
+            self.stdout.write(self.style.WARNING(
+                f"Metas com valor divergente dos valores concluídos: {len(result['goal_mismatches'])}"
+            ))
+            for mismatch in result['goal_mismatches']:
+                self.stdout.write(
+                    f"  meta {mismatch['goal_id']}: esperado {mismatch['expected_delta']:+}, "
+                    f"registrado {mismatch['actual_delta']:+}"
+                )
+
+        if options['output']:
+            try:
+                Path(options['output']).write_text(json.dumps(result, indent=2, default=str) + '\n')
+            except OSError as e:
+                raise CommandError(f'Não foi possível gravar {options["output"]}: {e}')
+
+        if result['total'] is None:
+            raise CommandError('Nenhuma requisição concluída no tempo da carga')
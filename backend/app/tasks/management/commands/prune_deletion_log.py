@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.tasks.models import DeletionLog
+
+
+class Command(BaseCommand):
+    """
+    Remove os registros de exclusão mais antigos que SYNC_TOMBSTONE_RETENTION_DAYS.
+
+    Clientes com cursor anterior a esse limite já recebem o estado completo no
+    /api/sync/, então esses registros não são mais lidos.
+    """
+    help = 'Remove os registros de exclusão (tombstones) que já passaram do período de retenção'
+
+    def handle(self, *args, **options):
+        limit = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        deleted, _ = DeletionLog.objects.filter(deleted_at__lt=limit).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} registros de exclusão removidos"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.tasks.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    """Cria (se necessário) e reconstrói os índices de busca textual de tarefas e metas"""
+    help = 'Cria e reconstrói os índices de busca textual (tsvector no PostgreSQL, FTS5 no SQLite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias do banco de dados')
+
+    def handle(self, *args, **options):
+        if not rebuild_search_index(options['database']):
+            raise CommandError('Busca textual indisponível neste banco de dados; a busca usará icontains')
+
+        self.stdout.write(self.style.SUCCESS('Índices de busca textual reconstruídos'))
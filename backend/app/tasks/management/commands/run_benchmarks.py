@@ -0,0 +1,223 @@
+import json
+import platform
+import random
+import time as timer
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app.tasks.loadtest import percentile
+from app.tasks.models import Category
+from app.tasks.seed import SEED_FUTURE_DAYS, SEED_PRESETS, seed_user
+from app.tasks.utils import check_task_overlap, invalidate_user_cache
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    """
+    Mede os endpoints principais em um conjunto de dados gerado e compara com um baseline.
+
+    Gera um usuário com seed_user() (preset e semente fixos, então os dados são
+    os mesmos a cada execução), chama cada cenário `--repeat` vezes depois de
+    uma execução de aquecimento e registra os percentis de latência (p50, p95,
+    p99) e a quantidade de queries. O cache do usuário é invalidado antes de
+    cada chamada, para medir o cálculo e não a leitura do cache. Os dados são
+    descartados ao final.
+
+    Com --save o resultado vira o baseline; sem ele, o resultado é comparado com
+    o baseline e o comando falha se algum cenário ficou mais lento que o
+    p50 do baseline + `--tolerance` ou passou a fazer mais queries. Compare
+    apenas execuções na mesma máquina e no mesmo banco (de preferência vazio:
+    outros dados nas tabelas também mudam os tempos).
+    """
+    help = 'Mede latência e queries dos endpoints principais e sinaliza regressões em relação ao baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--preset', choices=list(SEED_PRESETS), default='medium', help='Volume de dados do usuário')
+        parser.add_argument('--seed', type=int, default=42, help='Semente do gerador de dados')
+        parser.add_argument('--repeat', type=int, default=20, help='Medições por cenário')
+        parser.add_argument('--only', nargs='+', metavar='CENÁRIO', help='Mede apenas estes cenários')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Arquivo JSON do baseline')
+        parser.add_argument('--save', action='store_true', help='Grava o resultado como o novo baseline')
+        parser.add_argument('--output', help='Grava também o resultado neste arquivo JSON')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25, help='Aumento aceito no p50 (0.25 = 25%%) antes de sinalizar'
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=5.0,
+            help='Diferenças no p50 menores que isto (ms) não são regressão, mesmo acima da tolerância'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat deve ser pelo menos 1')
+
+        with transaction.atomic():
+            results = self._run(options)
+            transaction.set_rollback(True)
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'preset': options['preset'],
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'scenarios': results,
+        }
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24} p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                f"p99 {result['p99_ms']:8.2f} ms  {result['queries']:3d} queries"
+            )
+
+        if options['output']:
+            self._write(options['output'], report)
+
+        baseline_path = Path(options['baseline'])
+        if options['save']:
+            self._write(baseline_path, report)
+            self.stdout.write(self.style.SUCCESS(f'Baseline gravado em {baseline_path}'))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(self.style.WARNING(f'Sem baseline em {baseline_path}: rode com --save para criar'))
+            return
+
+        self._compare(json.loads(baseline_path.read_text()), report, options)
+
+    def _write(self, path, report):
+        path = Path(path)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n')
+        except OSError as e:
+            raise CommandError(f'Não foi possível gravar {path}: {e}')
+
+    def _compare(self, baseline, report, options):
+        """Compara com o baseline e falha se algum cenário regrediu"""
+        if (baseline.get('preset'), baseline.get('seed')) != (report['preset'], report['seed']):
+            self.stdout.write(self.style.WARNING(
+                f"Baseline gerado com preset {baseline.get('preset')} e seed {baseline.get('seed')}: "
+                'a comparação pode não ser válida'
+            ))
+
+        regressions = []
+        for name, result in report['scenarios'].items():
+            previous = baseline['scenarios'].get(name)
+            if previous is None:
+                continue
+
+            delta = result['p50_ms'] - previous['p50_ms']
+            if delta > options['min_delta_ms'] and result['p50_ms'] > previous['p50_ms'] * (1 + options['tolerance']):
+                regressions.append(f"{name}: p50 {previous['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+            if result['queries'] > previous['queries']:
+                regressions.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f'  {regression}'))
+            raise CommandError(f'{len(regressions)} regressão(ões) em relação ao baseline')
+
+        self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline'))
+
+    def _run(self, options):
+        """Gera os dados e mede cada cenário; retorna {cenário: percentis e queries}"""
+        today = timezone.localdate()
+        user = User.objects.create_user(username='benchmark', email='benchmark@example.com')
+        seed_user(user, options['preset'], random.Random(options['seed']), today)
+
+        client = APIClient(SERVER_NAME='localhost')
+        client.force_authenticate(user)
+
+        history_start = (today - timedelta(days=SEED_PRESETS[options['preset']]['history_days'])).isoformat()
+        period = f'start_date={history_start}&end_date={today.isoformat()}'
+        category_id = Category.objects.values_list('id', flat=True).first()
+        created = []
+
+        def create(iteration):
+            # Cada criação em um dia livre, depois dos dados gerados, para não cair na sobreposição
+            return client.post('/api/tasks/', {
+                'title': 'Tarefa do benchmark',
+                'category': category_id,
+                'date': (today + timedelta(days=SEED_FUTURE_DAYS + 1 + iteration)).isoformat(),
+                'start_time': '07:00',
+                'end_time': '08:00',
+                'duration_minutes': 60,
+            }, format='json')
+
+        def update(iteration):
+            task_id = created[iteration % len(created)]
+            return client.patch(f'/api/tasks/{task_id}/', {
+                'title': f'Tarefa do benchmark {iteration}',
+                'end_time': '08:30',
+                'duration_minutes': 90,
+            }, format='json')
+
+        def overlap(iteration):
+            check_task_overlap(user, today.isoformat(), '10:00', '11:00')
+
+        scenarios = {
+            'day': lambda iteration: client.get(f'/api/tasks/day/?date={today.isoformat()}'),
+            'today': lambda iteration: client.get('/api/tasks/today/'),
+            'week': lambda iteration: client.get('/api/tasks/week/'),
+            'month': lambda iteration: client.get('/api/tasks/month/'),
+            'dashboard': lambda iteration: client.get('/api/tasks/dashboard/'),
+            'tasks-report': lambda iteration: client.get(f'/api/tasks/report/?{period}'),
+            'goals-report': lambda iteration: client.get(f'/api/goals/report/?{period}'),
+            'energy-recommendations': lambda iteration: client.get('/api/tasks/energy_recommendations/'),
+            'overlap-check': overlap,
+            # Cenários que gravam por último, para não alterar os dados dos anteriores
+            'create': create,
+            'update': update,
+        }
+        if options['only']:
+            unknown = set(options['only']) - set(scenarios)
+            if unknown:
+                raise CommandError(f"Cenários desconhecidos: {', '.join(sorted(unknown))} (use {', '.join(scenarios)})")
+            if 'update' in options['only'] and 'create' not in options['only']:
+                options['only'].append('create')
+            scenarios = {name: scenario for name, scenario in scenarios.items() if name in options['only']}
+
+        results = {}
+        for name, scenario in scenarios.items():
+            timings = []
+            queries = 0
+            # A primeira execução (índice 0) é o aquecimento e não entra nos percentis
+            for iteration in range(options['repeat'] + 1):
+                invalidate_user_cache(user.id)
+                with CaptureQueriesContext(connection) as context:
+                    started = timer.perf_counter()
+                    response = scenario(iteration)
+                    elapsed = timer.perf_counter() - started
+
+                if response is not None:
+                    if response.status_code not in (200, 201):
+                        raise CommandError(f'{name} retornou {response.status_code}: {response.content[:200]!r}')
+                    if name == 'create':
+                        created.append(response.data['id'])
+                if iteration:
+                    timings.append(elapsed * 1000)
+                    queries = max(queries, len(context.captured_queries))
+
+            timings.sort()
+            results[name] = {
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'max_ms': round(timings[-1], 3),
+                'queries': queries,
+            }
+
+        return results
@@ -0,0 +1,52 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from app.tasks.seed import SEED_PRESETS, seed_users
+
+
+class Command(BaseCommand):
+    """
+    Cria usuários com dados realistas para desenvolvimento e medições.
+
+    Cada usuário recebe tarefas avulsas, recorrentes (diárias, semanais,
+    mensais e personalizadas), ocorrências, metas, preferências e perfil de
+    energia nas quantidades do preset (ver SEED_PRESETS). Com --seed os dados
+    são reproduzíveis.
+
+    Ex: python manage.py seed_data --users 3 --preset power --seed 42 --password senha123
+    """
+    help = 'Gera usuários com tarefas, recorrências, ocorrências, metas e perfis de energia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1, help='Quantidade de usuários')
+        parser.add_argument('--preset', choices=list(SEED_PRESETS), default='medium', help='Volume de dados por usuário')
+        parser.add_argument('--seed', type=int, default=None, help='Semente do gerador (dados reproduzíveis)')
+        parser.add_argument('--prefix', default='seed', help='Prefixo dos usuários (<prefix>-1@example.com, ...)')
+        parser.add_argument('--password', default=None, help='Senha dos usuários (sem ela, não conseguem entrar)')
+        parser.add_argument('--replace', action='store_true', help='Exclui antes os usuários com o mesmo prefixo')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('--users deve ser pelo menos 1')
+
+        existing = User.objects.filter(username__startswith=f"{options['prefix']}-")
+        with transaction.atomic():
+            if options['replace']:
+                existing.delete()
+            elif existing.exists():
+                raise CommandError(
+                    f"Já existem usuários com o prefixo '{options['prefix']}': use --replace ou outro --prefix"
+                )
+
+            result = seed_users(
+                options['users'], options['preset'], seed=options['seed'],
+                prefix=options['prefix'], password=options['password']
+            )
+
+        for user, counts in result:
+            self.stdout.write(
+                f"{user.email}: {counts['tasks']} tarefas ({counts['recurring']} recorrentes), "
+                f"{counts['occurrences']} ocorrências, {counts['goals']} metas"
+            )
+        self.stdout.write(self.style.SUCCESS(f"{len(result)} usuário(s) criados com o preset {options['preset']}"))
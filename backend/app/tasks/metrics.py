@@ -0,0 +1,11 @@
+from core.metrics import Counter, Histogram
+
+# Tarefas recorrentes × dias examinados em cada expansão de recorrências
+RECURRENCE_EXPANSION = Histogram(
+    'taskmaster_recurrence_expansion_size', 'Tarefas recorrentes × dias examinados por expansão', ['source'],
+    buckets=(10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+)
+
+GOAL_PROGRESS_UPDATES = Counter(
+    'taskmaster_goal_progress_updates_total', 'Recálculos de progresso de metas (Goal.update_progress)'
+)
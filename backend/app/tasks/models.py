@@ -1,7 +1,15 @@
+import logging
+
 from django.db import models
+from django.db.models.signals import post_save, post_delete, post_migrate
+from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 
+from .metrics import GOAL_PROGRESS_UPDATES
+
+logger = logging.getLogger(__name__)
+
 
 class Category(models.Model):
     """Categorias para as tarefas"""
@@ -21,6 +29,18 @@ class Category(models.Model):
         return self.name
 
 
+class GoalQuerySet(models.QuerySet):
+    """QuerySet de metas com as relações lidas pelo GoalSerializer"""
+
+    def with_relations(self, relations=('category',)):
+        """
+        Carrega a categoria junto com a meta, evitando uma query por item serializado.
+
+        `relations` permite carregar só o que os campos pedidos leem (ver SparseFieldsMixin).
+        """
+        return self.select_related(*relations) if relations else self
+
+
 class Goal(models.Model):
     """Metas de longo prazo"""
     PERIOD_CHOICES = [
@@ -58,6 +78,8 @@ class Goal(models.Model):
     created_at = models.DateTimeField(_("Criado em"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Atualizado em"), auto_now=True)
     
+    objects = GoalQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _("Meta")
         verbose_name_plural = _("Metas")
@@ -68,6 +90,7 @@ class Goal(models.Model):
     
     def update_progress(self):
         """Atualiza o progresso percentual com base no valor atual e alvo"""
+        GOAL_PROGRESS_UPDATES.inc()
         if self.target_value > 0:
             # Converter current_value para Decimal antes da divisão
             from decimal import Decimal
@@ -84,13 +107,25 @@ class Goal(models.Model):
                     self.is_completed = True
                     self.progress_percentage = 100
             except Exception as e:
-                print(f"Erro ao calcular progresso: {e}")
+                logger.warning('Erro ao calcular o progresso da meta %s: %s', self.pk, e)
                 # Fallback seguro
                 self.progress_percentage = 0
                 
         self.save(update_fields=['progress_percentage', 'is_completed', 'current_value'])
 
 
+class TaskQuerySet(models.QuerySet):
+    """QuerySet de tarefas com as relações lidas pelo TaskSerializer"""
+
+    def with_relations(self, relations=('category', 'goal')):
+        """
+        Carrega categoria e meta junto com a tarefa (category_name/icon/color e goal_title).
+
+        `relations` permite carregar só o que os campos pedidos leem (ver SparseFieldsMixin).
+        """
+        return self.select_related(*relations) if relations else self
+
+
 class Task(models.Model):
     """Tarefas do usuário"""
     PRIORITY_CHOICES = [
@@ -149,10 +184,23 @@ class Task(models.Model):
     updated_at = models.DateTimeField(_("Atualizado em"), auto_now=True)
     energy_level = models.CharField(_("Nível de Energia"), max_length=10, choices=ENERGY_LEVEL_CHOICES, default='medium')
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _("Tarefa")
         verbose_name_plural = _("Tarefas")
         ordering = ["date", "start_time"]
+        indexes = [
+            # Calendário, dashboard, verificação de sobreposição (usuário + data) e
+            # paginação por cursor da listagem na ordem (date, start_time, id)
+            models.Index(fields=['user', 'date', 'start_time', 'id'], name='task_user_schedule_idx'),
+            # Expansão de tarefas recorrentes (usuário + padrão diferente de 'none')
+            models.Index(fields=['user', 'repeat_pattern'], name='task_user_repeat_idx'),
+            # Contagens por status em um período (dashboard e relatórios)
+            models.Index(fields=['user', 'status', 'date'], name='task_user_status_date_idx'),
+            # Sincronização incremental (/api/sync/): alterações do usuário desde o cursor
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -162,8 +210,8 @@ class Task(models.Model):
         is_new = self.pk is None
 
         # Adicionar logs detalhados
-        print(f"[TASK DEBUG] Task save started: id={self.pk}, status={self.status}, actual_value={self.actual_value}")
-        print(f"[TASK DEBUG] Related goal: {self.goal.id if self.goal else 'None'}")
+        logger.debug('Task save started: id=%s, status=%s, actual_value=%s', self.pk, self.status, self.actual_value)
+        logger.debug('Related goal: %s', self.goal_id)
         
         # If updating an existing task
         if not is_new:
@@ -174,7 +222,7 @@ class Task(models.Model):
                 old_actual_value = old_task.actual_value or 0
                 old_goal = old_task.goal
 
-                print(f"[TASK DEBUG] Old values: status={old_status}, actual_value={old_actual_value}, goal={old_goal.id if old_goal else 'None'}")
+                logger.debug('Old values: status=%s, actual_value=%s, goal=%s', old_status, old_actual_value, old_task.goal_id)
                 
                 # Calculate duration automatically if not provided
                 if not self.duration_minutes and self.start_time and self.end_time:
@@ -202,21 +250,21 @@ class Task(models.Model):
                             if diff != 0:
                                 self.goal.current_value += diff
                                 self.goal.update_progress()
-                                print(f"[TASK MODEL] Adjusted goal: {diff} added to goal {self.goal.id}")
+                                logger.debug('Adjusted goal: %s added to goal %s', diff, self.goal.id)
                         
                         # Case 2: Was completed but no longer is
                         elif old_status == 'completed' and self.status != 'completed':
                             # Remove the value
                             self.goal.current_value = max(0, self.goal.current_value - old_actual_value)
                             self.goal.update_progress()
-                            print(f"[TASK MODEL] Removed value from goal: {old_actual_value} removed from goal {self.goal.id}")
+                            logger.debug('Removed value from goal: %s removed from goal %s', old_actual_value, self.goal.id)
                         
                         # Case 3: Wasn't completed but now is
                         elif old_status != 'completed' and self.status == 'completed' and self.actual_value:
                             # Add the value
                             self.goal.current_value += self.actual_value
                             self.goal.update_progress()
-                            print(f"[TASK MODEL] Added value to goal: {self.actual_value} added to goal {self.goal.id}")
+                            logger.debug('Added value to goal: %s added to goal %s', self.actual_value, self.goal.id)
                     
                     # If the goal changed
                     elif old_goal and old_goal.id != self.goal.id:
@@ -224,27 +272,27 @@ class Task(models.Model):
                         if old_status == 'completed' and old_actual_value:
                             old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                             old_goal.update_progress()
-                            print(f"[TASK MODEL] Removed from old goal: {old_actual_value} removed from goal {old_goal.id}")
+                            logger.debug('Removed from old goal: %s removed from goal %s', old_actual_value, old_goal.id)
                         
                         # Add value to new goal if task is completed
                         if self.status == 'completed' and self.actual_value:
                             self.goal.current_value += self.actual_value
                             self.goal.update_progress()
-                            print(f"[TASK MODEL] Added to new goal: {self.actual_value} added to goal {self.goal.id}")
+                            logger.debug('Added to new goal: %s added to goal %s', self.actual_value, self.goal.id)
                     
                     # If there was no goal before but there is now
                     elif not old_goal and self.status == 'completed' and self.actual_value:
                         # Add value to the new goal
                         self.goal.current_value += self.actual_value
                         self.goal.update_progress()
-                        print(f"[TASK MODEL] Added to new goal: {self.actual_value} added to goal {self.goal.id}")
+                        logger.debug('Added to new goal: %s added to goal %s', self.actual_value, self.goal.id)
                 
                 # If had goal before but no longer has
                 elif old_goal and old_status == 'completed' and old_actual_value:
                     # Remove value from the old goal
                     old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                     old_goal.update_progress()
-                    print(f"[TASK MODEL] Removed goal from task: {old_actual_value} removed from goal {old_goal.id}")
+                    logger.debug('Removed goal from task: %s removed from goal %s', old_actual_value, old_goal.id)
                     
             except Task.DoesNotExist:
                 # First save for new tasks - calculate duration and save
@@ -263,9 +311,9 @@ class Task(models.Model):
                 if self.status == 'completed' and self.goal and self.actual_value:
                     self.goal.current_value += self.actual_value
                     self.goal.update_progress()
-                    print(f"[TASK MODEL] New task already completed: {self.actual_value} added to goal {self.goal.id}")
+                    logger.debug('New task already completed: %s added to goal %s', self.actual_value, self.goal.id)
             except Exception as e:
-                print(f"[TASK DEBUG] Exception in save: {e}")
+                logger.exception('Exception in save: %s', e)
         else:
             # New task - calculate duration and save
             if not self.duration_minutes and self.start_time and self.end_time:
@@ -283,7 +331,7 @@ class Task(models.Model):
             if self.status == 'completed' and self.goal and self.actual_value:
                 self.goal.current_value += self.actual_value
                 self.goal.update_progress()
-                print(f"[TASK MODEL] New task already completed: {self.actual_value} added to goal {self.goal.id}")
+                logger.debug('New task already completed: %s added to goal %s', self.actual_value, self.goal.id)
 
 class EnergyProfile(models.Model):
     """Perfil de energia do usuário ao longo do dia"""
@@ -316,6 +364,18 @@ class EnergyProfile(models.Model):
         """Retorna o nível de energia para um horário específico"""
         # Implementação aqui
         
+class TaskOccurrenceQuerySet(models.QuerySet):
+    """QuerySet de ocorrências com as relações lidas pelos serializers de ocorrência e de tarefa"""
+
+    def with_relations(self, relations=('task', 'task__category', 'task__goal')):
+        """
+        Carrega a tarefa com sua categoria e meta junto com a ocorrência.
+
+        `relations` permite carregar só o que os campos pedidos leem (ver SparseFieldsMixin).
+        """
+        return self.select_related(*relations) if relations else self
+
+
 class TaskOccurrence(models.Model):
     """Ocorrências individuais de tarefas recorrentes"""
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="occurrences", verbose_name=_("Tarefa"))
@@ -326,11 +386,19 @@ class TaskOccurrence(models.Model):
     created_at = models.DateTimeField(_("Criado em"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Atualizado em"), auto_now=True)
     
+    objects = TaskOccurrenceQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _("Ocorrência de Tarefa")
         verbose_name_plural = _("Ocorrências de Tarefas")
         ordering = ["date"]
         unique_together = ['task', 'date']
+        indexes = [
+            # Ocorrências de um período para as tarefas do usuário (task__user + date)
+            models.Index(fields=['date', 'task'], name='occurrence_date_task_idx'),
+            # Sincronização incremental: poucas alterações recentes, filtradas depois pelo usuário
+            models.Index(fields=['updated_at'], name='occurrence_updated_idx'),
+        ]
     
     def __str__(self):
         return f"{self.task.title} - {self.date}"
@@ -363,6 +431,8 @@ class UserPreference(models.Model):
                            choices=[('light', 'Claro'), ('dark', 'Escuro'), ('system', 'Sistema')],
                            default='system')
     reminder_before_minutes = models.PositiveIntegerField(_("Minutos de antecedência para lembretes"), default=15)
+    # Token secreto da URL do calendário assinável (/api/calendar/<token>/calendar.ics)
+    calendar_token = models.CharField(_("Token do calendário"), max_length=64, unique=True, blank=True, null=True)
     created_at = models.DateTimeField(_("Criado em"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Atualizado em"), auto_now=True)
     
@@ -371,4 +441,122 @@ class UserPreference(models.Model):
         verbose_name_plural = _("Preferências dos Usuários")
     
     def __str__(self):
-        return f"Preferências de {self.user.username}"
\ No newline at end of file
+        return f"Preferências de {self.user.username}"
+
+
+class DeletionLog(models.Model):
+    """
+    Registro de exclusões (tombstones) para a sincronização incremental.
+
+    Cada exclusão de tarefa, ocorrência, meta ou categoria gera uma linha, e o
+    /api/sync/ devolve as exclusões desde o cursor do cliente. Categorias são
+    globais, então o registro delas não tem usuário.
+    """
+    MODEL_CHOICES = [
+        ('task', _('Tarefa')),
+        ('occurrence', _('Ocorrência')),
+        ('goal', _('Meta')),
+        ('category', _('Categoria')),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="deletion_logs", blank=True, null=True,
+                             verbose_name=_("Usuário"))
+    model = models.CharField(_("Modelo"), max_length=20, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField(_("ID do objeto"))
+    deleted_at = models.DateTimeField(_("Excluído em"), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _("Registro de Exclusão")
+        verbose_name_plural = _("Registros de Exclusão")
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='deletion_user_date_idx'),
+            models.Index(fields=['deleted_at'], name='deletion_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.model} {self.object_id} excluído em {self.deleted_at}"
+
+
+def deletion_origin_model(origin):
+    """Modelo que originou uma exclusão em cascata (origin é uma instância ou um QuerySet)"""
+    if isinstance(origin, models.QuerySet):
+        return origin.model
+    return type(origin)
+
+
+@receiver([post_save, post_delete], sender=Task)
+@receiver([post_save, post_delete], sender=Goal)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Invalida os dados em cache do dono da tarefa ou meta alterada"""
+    from .utils import invalidate_user_cache
+    invalidate_user_cache(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=TaskOccurrence)
+def invalidate_occurrence_owner_cache(sender, instance, **kwargs):
+    """Invalida os dados em cache do dono da ocorrência alterada"""
+    from .utils import invalidate_user_cache
+    
+    # Exclusão em cascata a partir da tarefa: o sinal da própria tarefa já invalida
+    if deletion_origin_model(kwargs.get('origin')) is Task:
+        return
+    
+    if TaskOccurrence.task.is_cached(instance):
+        user_id = instance.task.user_id
+    else:
+        user_id = Task.objects.filter(pk=instance.task_id).values_list('user_id', flat=True).first()
+    
+    if user_id:
+        invalidate_user_cache(user_id)
+
+
+@receiver(post_save, sender=Task)
+def invalidate_title_suggestions_on_create(sender, instance, created, **kwargs):
+    """Descarta o índice de sugestões de títulos do usuário quando uma tarefa é criada"""
+    if not created:
+        return
+
+    from .suggestions import invalidate_title_suggestions
+    invalidate_title_suggestions(instance.user_id)
+
+
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=TaskOccurrence)
+@receiver(post_delete, sender=Category)
+def log_deletion(sender, instance, **kwargs):
+    """Registra a exclusão para a sincronização incremental"""
+    origin = deletion_origin_model(kwargs.get('origin'))
+    
+    # Conta excluída: não há mais quem sincronizar (e o registro seria apagado junto)
+    if origin is User:
+        return
+    # Ocorrências excluídas em cascata com a tarefa (ou a categoria dela): o
+    # registro da tarefa já as cobre
+    if sender is TaskOccurrence and origin in (Task, Category):
+        return
+    
+    if sender is TaskOccurrence:
+        if TaskOccurrence.task.is_cached(instance):
+            user_id = instance.task.user_id
+        else:
+            user_id = Task.objects.filter(pk=instance.task_id).values_list('user_id', flat=True).first()
+        if not user_id:
+            return
+    elif sender is Category:
+        user_id = None
+    else:
+        user_id = instance.user_id
+    
+    model = {Task: 'task', Goal: 'goal', TaskOccurrence: 'occurrence', Category: 'category'}[sender]
+    DeletionLog.objects.create(user_id=user_id, model=model, object_id=instance.pk)
+
+
+@receiver(post_migrate)
+def setup_full_text_search(sender, using='default', **kwargs):
+    """Cria a estrutura de busca textual (tsvector/FTS5) após as migrações do app de tarefas"""
+    if sender.name != 'app.tasks':
+        return
+    
+    from .search import ensure_search_schema
+    ensure_search_schema(using)
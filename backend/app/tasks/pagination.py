@@ -0,0 +1,139 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_time
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TaskCursorPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) para listas de tarefas.
+
+    A posição é a tupla (date, start_time, id) do último item da página, e a
+    próxima página é filtrada por comparação com essa tupla em vez de OFFSET.
+    Assim, páginas profundas custam o mesmo que a primeira (índice
+    task_user_schedule_idx) e inserções concorrentes não duplicam nem pulam itens.
+    """
+    ordering = ('date', 'start_time', 'id')
+    page_size = settings.TASK_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        reverse, position = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by(*[f'-{field}' for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if position is not None:
+            queryset = queryset.filter(self._after(position, reverse))
+
+        # Um item extra indica se existe uma página seguinte nessa direção
+        results = list(queryset[:page_size + 1])
+        has_more = len(results) > page_size
+        results = results[:page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size or self.max_page_size
+
+    def _after(self, position, reverse):
+        """Filtro que seleciona os itens depois (ou antes, se reverse) da posição do cursor"""
+        date, start_time, pk = position
+        lookup = 'lt' if reverse else 'gt'
+        return (
+            Q(**{f'date__{lookup}': date}) |
+            Q(date=date, **{f'start_time__{lookup}': start_time}) |
+            Q(date=date, start_time=start_time, **{f'id__{lookup}': pk})
+        )
+
+    def decode_cursor(self, request):
+        """Retorna (reverse, posição) a partir do parâmetro de cursor; posição é None na primeira página"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return False, None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            date_str, time_str, pk_str = tokens['p'][0].split('|')
+            position = (parse_date(date_str), parse_time(time_str), int(pk_str))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position[0] is None or position[1] is None:
+            raise NotFound(self.invalid_cursor_message)
+
+        return reverse, position
+
+    def encode_cursor(self, item, reverse):
+        """Monta a URL da página a partir da posição do item informado"""
+        tokens = {'p': f'{item.date.isoformat()}|{item.start_time.isoformat()}|{item.pk}'}
+        if reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Voltando de além do início: a próxima página recomeça do começo
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
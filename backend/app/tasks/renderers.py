@@ -0,0 +1,12 @@
+from core.renderers import ORJSONRenderer
+
+
+class CalendarV2Renderer(ORJSONRenderer):
+    """
+    Formato compacto (v2) das visões de calendário.
+
+    Pedido com `Accept: application/vnd.taskmaster.calendar.v2+json` ou `?format=v2`;
+    a view monta os dados nesse formato quando este renderer é o escolhido.
+    """
+    media_type = 'application/vnd.taskmaster.calendar.v2+json'
+    format = 'v2'
@@ -0,0 +1,104 @@
+from operator import methodcaller
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+from core.instrumentation import measure_serialization
+
+# Campos cuja representação é o próprio valor lido do banco
+IDENTITY_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.PrimaryKeyRelatedField)
+
+# Marca de campo omitido quando a relação intermediária é nula (como o SkipField do DRF)
+SKIP = object()
+
+
+class RowSerializer:
+    """
+    Serializa linhas de QuerySet.values() com a mesma saída de um serializer DRF.
+
+    O serializer informado é "compilado" uma vez em uma lista de colunas (nome na
+    resposta, caminho no values(), conversão), respeitando os campos escolhidos em
+    ?fields= / ?omit=. Cada linha vira um dict sem instanciar modelos nem
+    serializers, o que torna as listagens grandes do calendário bem mais baratas.
+
+    Apenas leitura: POST/PUT continuam usando o serializer original.
+
+    Args:
+        serializer: Instância do serializer cuja saída será reproduzida
+        prefix: Prefixo dos caminhos no values() (ex: 'task__' para ler a tarefa
+            a partir de um QuerySet de ocorrências)
+    """
+
+    def __init__(self, serializer, prefix=''):
+        self.columns = []
+        paths = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if field.source == '*':
+                raise ImproperlyConfigured(
+                    f"RowSerializer não suporta o campo '{name}' de {type(serializer).__name__} (source='*')"
+                )
+
+            attrs = field.source_attrs
+            path = prefix + '__'.join(attrs)
+            # Com a relação intermediária nula (ex: tarefa sem meta para goal_title) o DRF
+            # usa o default, None (allow_null) ou omite o campo
+            relation = prefix + '__'.join(attrs[:-1]) if len(attrs) > 1 else None
+            if field.default is not empty:
+                missing = field.get_default()
+            elif field.allow_null:
+                missing = None
+            else:
+                missing = SKIP
+
+            self.columns.append((name, path, relation, missing, self._converter(field)))
+            paths.append(path)
+            if relation:
+                paths.append(relation)
+
+        self.paths = list(dict.fromkeys(paths))
+
+    @staticmethod
+    def _converter(field):
+        """Função que converte o valor do banco na representação do campo (None = o próprio valor)"""
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is not None:
+            return field.pk_field.to_representation
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+            if output_format and output_format.lower() == ISO_8601:
+                return methodcaller('isoformat')
+        if isinstance(field, serializers.TimeField):
+            output_format = getattr(field, 'format', api_settings.TIME_FORMAT)
+            if output_format and output_format.lower() == ISO_8601:
+                return methodcaller('isoformat')
+        return field.to_representation
+
+    def values(self, queryset, *extra):
+        """Aplica values() com as colunas do serializer e as colunas `extra` usadas pela view"""
+        return queryset.values(*dict.fromkeys([*self.paths, *extra]))
+
+    def to_representation(self, row):
+        """Converte uma linha do values() no dict que o serializer produziria"""
+        data = {}
+        for name, path, relation, missing, convert in self.columns:
+            if relation is not None and row[relation] is None:
+                if missing is not SKIP:
+                    data[name] = missing
+                continue
+
+            value = row[path]
+            if value is not None and convert is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    @measure_serialization
+    def render(self, queryset):
+        """Serializa um QuerySet inteiro com uma única query"""
+        return [self.to_representation(row) for row in self.values(queryset)]
@@ -0,0 +1,226 @@
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .models import Task, Goal
+
+# Campos indexados para busca textual, em ordem de relevância
+SEARCH_FIELDS = {
+    Task: ('title', 'description', 'notes'),
+    Goal: ('title', 'description'),
+}
+
+# Pesos do PostgreSQL por posição do campo
+POSTGRES_WEIGHTS = ('A', 'B', 'C', 'D')
+
+# Aliases de banco em que a estrutura de busca já foi verificada
+_search_ready = {}
+
+
+def search_terms(query):
+    """Extrai os termos de busca (apenas caracteres de palavra) de um texto livre"""
+    return re.findall(r'\w+', query or '')
+
+
+def fts_table(model):
+    """Nome da tabela FTS5 (SQLite) que acompanha o modelo"""
+    return f'{model._meta.db_table}_fts'
+
+
+def ensure_search_schema(using='default'):
+    """
+    Cria a estrutura de busca textual do banco, se ainda não existir.
+
+    - PostgreSQL: coluna tsvector gerada (mantida pelo próprio banco) e índice GIN
+    - SQLite: tabela FTS5 de conteúdo externo e triggers que a mantêm sincronizada
+
+    Returns:
+        bool: True se a busca textual está disponível neste banco
+    """
+    connection = connections[using]
+
+    try:
+        with connection.cursor() as cursor:
+            for model, fields in SEARCH_FIELDS.items():
+                if connection.vendor == 'postgresql':
+                    _create_postgres_schema(cursor, model, fields)
+                elif connection.vendor == 'sqlite':
+                    _create_sqlite_schema(cursor, connection, model, fields)
+                else:
+                    return False
+    except DatabaseError:
+        # Ex: SQLite compilado sem FTS5; a busca volta a usar icontains
+        return False
+
+    _search_ready[using] = True
+    return True
+
+
+def _create_postgres_schema(cursor, model, fields):
+    table = model._meta.db_table
+    config = settings.SEARCH_CONFIG
+    document = ' || '.join(
+        f"setweight(to_tsvector('{config}', coalesce({field}, '')), '{weight}')"
+        for field, weight in zip(fields, POSTGRES_WEIGHTS)
+    )
+
+    cursor.execute(
+        f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector '
+        f'GENERATED ALWAYS AS ({document}) STORED'
+    )
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector)')
+
+
+def _create_sqlite_schema(cursor, connection, model, fields):
+    table = model._meta.db_table
+    fts = fts_table(model)
+    triggers = [f'{fts}_ai', f'{fts}_ad', f'{fts}_au']
+
+    # Recriar a tabela original (ALTER TABLE no SQLite) descarta os triggers,
+    # então cada objeto é verificado separadamente
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name IN (%s)" % ', '.join(['%s'] * (len(triggers) + 1)),
+        [fts, *triggers]
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    if existing == {fts, *triggers}:
+        return
+
+    columns = ', '.join(fields)
+    new_values = ', '.join(f'new.{field}' for field in fields)
+    old_values = ', '.join(f'old.{field}' for field in fields)
+
+    cursor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({columns}, content='{table}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END'
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    cursor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f'INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END'
+    )
+    # Indexar as linhas gravadas enquanto os triggers não existiam
+    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def rebuild_search_index(using='default'):
+    """Reconstrói os índices de busca textual a partir das tabelas (apenas SQLite precisa)"""
+    connection = connections[using]
+    if not ensure_search_schema(using):
+        return False
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            for model in SEARCH_FIELDS:
+                fts = fts_table(model)
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+    return True
+
+
+def search_available(using='default'):
+    """Verifica (uma vez por processo) se a estrutura de busca textual existe no banco"""
+    if using not in _search_ready:
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                table = Task._meta.db_table
+                cursor.execute(
+                    'SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s',
+                    [table, 'search_vector']
+                )
+                _search_ready[using] = cursor.fetchone() is not None
+            elif connection.vendor == 'sqlite':
+                _search_ready[using] = fts_table(Task) in connection.introspection.table_names(cursor)
+            else:
+                _search_ready[using] = False
+
+    return _search_ready[using]
+
+
+def full_text_search(queryset, query):
+    """
+    Filtra um QuerySet de Task ou Goal pela busca textual indexada e anota `search_rank`.
+
+    Cada termo é buscado como prefixo ("acad" encontra "Academia"). Quanto maior
+    `search_rank`, mais relevante o resultado. Sem estrutura de busca no banco, usa
+    icontains nos mesmos campos (sem índice).
+
+    Args:
+        queryset: QuerySet de Task ou Goal
+        query: Texto livre digitado pelo usuário
+
+    Returns:
+        QuerySet filtrado, anotado com `search_rank` e ordenado por relevância
+    """
+    model = queryset.model
+    fields = SEARCH_FIELDS[model]
+    terms = search_terms(query)
+
+    if not terms:
+        return queryset
+
+    table = model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if not search_available(queryset.db):
+        condition = Q()
+        for term in terms:
+            term_condition = Q()
+            for field in fields:
+                term_condition |= Q(**{f'{field}__icontains': term})
+            condition &= term_condition
+        return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if vendor == 'postgresql':
+        config = settings.SEARCH_CONFIG
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        match = RawSQL(
+            f'"{table}"."search_vector" @@ to_tsquery(%s, %s)',
+            [config, tsquery],
+            output_field=BooleanField()
+        )
+        rank = RawSQL(
+            f'ts_rank("{table}"."search_vector", to_tsquery(%s, %s))',
+            [config, tsquery],
+            output_field=FloatField()
+        )
+    else:
+        fts = fts_table(model)
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        match = RawSQL(
+            f'"{table}"."id" IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)',
+            [fts_query],
+            output_field=BooleanField()
+        )
+        # bm25 do FTS5 é negativo (menor = mais relevante); invertido para manter "maior = melhor"
+        rank = RawSQL(
+            f'(SELECT -rank FROM {fts} WHERE {fts} MATCH %s AND rowid = "{table}"."id")',
+            [fts_query],
+            output_field=FloatField()
+        )
+
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank')
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """SearchFilter que usa a busca textual indexada em vez de cadeias de icontains"""
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model not in SEARCH_FIELDS:
+            return super().filter_queryset(request, queryset, view)
+
+        query = request.query_params.get(self.search_param, '')
+        return full_text_search(queryset, query)
@@ -0,0 +1,197 @@
+import random
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .models import Category, EnergyProfile, Goal, Task, TaskOccurrence, UserPreference
+from .suggestions import invalidate_title_suggestions
+from .utils import invalidate_user_cache
+
+# Quantidades por usuário: tarefas avulsas, recorrentes de cada tipo, metas e
+# dias de histórico (as ocorrências cobrem o histórico das recorrentes)
+SEED_PRESETS = {
+    'small': {'one_off': 50, 'daily': 2, 'weekly': 3, 'custom': 2, 'goals': 2, 'history_days': 30},
+    'medium': {'one_off': 500, 'daily': 5, 'weekly': 8, 'custom': 5, 'goals': 5, 'history_days': 90},
+    'large': {'one_off': 2000, 'daily': 10, 'weekly': 15, 'custom': 10, 'goals': 10, 'history_days': 180},
+    'power': {'one_off': 10000, 'daily': 25, 'weekly': 40, 'custom': 25, 'goals': 25, 'history_days': 365},
+}
+
+# Categorias globais usadas pelos dados gerados (reaproveitadas pelo nome)
+SEED_CATEGORIES = [
+    ('Trabalho', 'briefcase', '#1E88E5'),
+    ('Saúde', 'heart', '#E53935'),
+    ('Estudos', 'book', '#8E24AA'),
+    ('Casa', 'home', '#43A047'),
+    ('Lazer', 'smile', '#FB8C00'),
+    ('Finanças', 'dollar-sign', '#00897B'),
+]
+
+SEED_TITLES = [
+    'Reunião de equipe', 'Revisar relatório', 'Academia', 'Leitura', 'Estudar inglês', 'Responder e-mails',
+    'Caminhada', 'Planejar a semana', 'Pagar contas', 'Limpar a casa', 'Meditação', 'Projeto pessoal',
+    'Consulta médica', 'Mercado', 'Curso online', 'Ligar para a família',
+]
+
+# Dias futuros com tarefas avulsas (o restante fica no histórico)
+SEED_FUTURE_DAYS = 30
+
+SEED_BATCH_SIZE = 2000
+
+
+def seed_categories():
+    """Categorias de SEED_CATEGORIES, criadas se ainda não existirem"""
+    return [
+        Category.objects.get_or_create(name=name, defaults={'icon': icon, 'color': color})[0]
+        for name, icon, color in SEED_CATEGORIES
+    ]
+
+
+def random_slot(rng):
+    """Horário aleatório entre 6h e 21h com 30, 60 ou 90 minutos"""
+    start = rng.randrange(6 * 60, 21 * 60, 30)
+    duration = rng.choice((30, 60, 90))
+    end = start + duration
+    return time(start // 60, start % 60), time(end // 60, end % 60), duration
+
+
+def past_status(rng):
+    """Status de uma tarefa já passada: maioria concluída, algumas falhas e puladas"""
+    return rng.choices(('completed', 'failed', 'skipped', 'pending'), weights=(70, 10, 10, 10))[0]
+
+
+def seed_user(user, preset='medium', rng=None, today=None):
+    """
+    Gera os dados de um usuário com as quantidades de SEED_PRESETS[preset].
+
+    Tarefas avulsas espalhadas pelo histórico e pelos próximos dias, recorrentes
+    diárias/dias úteis, semanais/mensais e personalizadas (repeat_days), as
+    ocorrências do histórico das recorrentes, metas, preferências e perfil de
+    energia. Gravado com bulk_create, que não envia sinais: o cache e as
+    sugestões de título do usuário são invalidados ao final.
+
+    Returns:
+        dict {modelo: registros criados}
+    """
+    sizes = SEED_PRESETS[preset]
+    rng = rng or random.Random()
+    today = today or timezone.localdate()
+    history_start = today - timedelta(days=sizes['history_days'])
+    categories = seed_categories()
+
+    goals = Goal.objects.bulk_create([
+        Goal(
+            user=user,
+            title=f'Meta {index + 1}',
+            category=rng.choice(categories),
+            period=rng.choice(('weekly', 'monthly', 'quarterly')),
+            start_date=history_start,
+            end_date=today + timedelta(days=90),
+            target_value=Decimal(rng.choice((10, 50, 100, 500))),
+            measurement_unit=rng.choice(('count', 'time', 'pages')),
+        )
+        for index in range(sizes['goals'])
+    ])
+
+    def task(date, **fields):
+        start_time, end_time, duration = random_slot(rng)
+        return Task(
+            user=user,
+            title=rng.choice(SEED_TITLES),
+            description=rng.choice((None, 'Gerada pelo seed_data')),
+            category=rng.choice(categories),
+            goal=rng.choice(goals) if goals and rng.random() < 0.3 else None,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            duration_minutes=duration,
+            priority=rng.randint(1, 4),
+            target_value=Decimal(rng.randint(1, 20)) if rng.random() < 0.3 else None,
+            energy_level=rng.choice(('high', 'medium', 'low')),
+            **fields
+        )
+
+    one_off = []
+    for _ in range(sizes['one_off']):
+        date = history_start + timedelta(days=rng.randrange(sizes['history_days'] + SEED_FUTURE_DAYS))
+        one_off.append(task(date, status=past_status(rng) if date < today else 'pending'))
+    Task.objects.bulk_create(one_off, batch_size=SEED_BATCH_SIZE)
+
+    recurring = []
+    for _ in range(sizes['daily']):
+        recurring.append(task(history_start, repeat_pattern=rng.choice(('daily', 'weekdays', 'weekends'))))
+    for _ in range(sizes['weekly']):
+        recurring.append(task(
+            history_start + timedelta(days=rng.randrange(7)), repeat_pattern=rng.choice(('weekly', 'monthly'))
+        ))
+    for _ in range(sizes['custom']):
+        days = sorted(rng.sample(range(7), rng.randint(2, 4)))
+        recurring.append(task(
+            history_start,
+            repeat_pattern='custom',
+            repeat_days=','.join(map(str, days)),
+            # Parte das personalizadas já terminou
+            repeat_end_date=today - timedelta(days=rng.randrange(sizes['history_days'])) if rng.random() < 0.2 else None,
+        ))
+    recurring = Task.objects.bulk_create(recurring, batch_size=SEED_BATCH_SIZE)
+
+    # Ocorrências (status registrado) em parte dos dias do histórico de cada recorrente
+    occurrences = []
+    for recurring_task in recurring:
+        end_date = min(today, recurring_task.repeat_end_date or today)
+        current_date = recurring_task.date
+        while current_date < end_date:
+            if rng.random() < 0.6:
+                status = past_status(rng)
+                occurrences.append(TaskOccurrence(
+                    task=recurring_task,
+                    date=current_date,
+                    status=status,
+                    actual_value=recurring_task.target_value if status == 'completed' else None,
+                ))
+            current_date += timedelta(days=1)
+    TaskOccurrence.objects.bulk_create(occurrences, batch_size=SEED_BATCH_SIZE)
+
+    UserPreference.objects.update_or_create(user=user, defaults={
+        'wake_up_time': time(6, 30),
+        'sleep_time': time(23),
+        'work_start_time': time(9),
+        'work_end_time': time(18),
+    })
+    EnergyProfile.objects.update_or_create(user=user, defaults={
+        'early_morning_energy': rng.randint(3, 8),
+        'mid_morning_energy': rng.randint(5, 10),
+        'late_morning_energy': rng.randint(4, 8),
+        'early_afternoon_energy': rng.randint(3, 7),
+        'late_afternoon_energy': rng.randint(3, 7),
+        'evening_energy': rng.randint(2, 6),
+        'night_energy': rng.randint(1, 3),
+    })
+
+    invalidate_user_cache(user.id)
+    invalidate_title_suggestions(user.id)
+    return {
+        'goals': len(goals),
+        'tasks': len(one_off) + len(recurring),
+        'recurring': len(recurring),
+        'occurrences': len(occurrences),
+    }
+
+
+def seed_users(count, preset='medium', seed=None, prefix='seed', password=None):
+    """
+    Cria `count` usuários (<prefix>-<n>@example.com) com seed_user().
+
+    Com o mesmo `seed` e a mesma data, os dados gerados são os mesmos.
+
+    Returns:
+        lista de (usuário, contagens)
+    """
+    rng = random.Random(seed)
+    result = []
+    for index in range(1, count + 1):
+        username = f'{prefix}-{index}'
+        user = User.objects.create_user(username=username, email=f'{username}@example.com', password=password)
+        result.append((user, seed_user(user, preset, rng)))
+    return result
@@ -1,16 +1,97 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from django.conf import settings
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import timedelta
 from .models import Task, Category, Goal, TaskOccurrence, UserPreference, EnergyProfile
 
 
+def parse_field_list(value):
+    """Converte "a,b, c" em {'a', 'b', 'c'}; None quando o parâmetro não foi enviado"""
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Permite escolher os campos da resposta com ?fields=a,b e/ou ?omit=c.
+
+    A seleção também pode ser passada diretamente nos kwargs `fields` e `omit`.
+    Campos não pedidos são removidos do serializer antes da serialização (não são
+    calculados) e required_relations() lista apenas as relações lidas pelos campos
+    restantes. Vale só para leituras; escritas usam sempre todos os campos.
+    """
+    always_included_fields = ('id',)
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        if request is not None and request.method in SAFE_METHODS:
+            if fields is None:
+                fields = parse_field_list(request.query_params.get('fields'))
+            if omit is None:
+                omit = parse_field_list(request.query_params.get('omit'))
+
+        self._selected_fields = set(fields) if fields is not None else None
+        self._omitted_fields = set(omit or ())
+
+        if self._selected_fields is not None or self._omitted_fields:
+            for name in list(self.fields):
+                if not self.keeps_field(name):
+                    self.fields.pop(name)
+
+    def keeps_field(self, name):
+        """Indica se o campo `name` faz parte da resposta pedida"""
+        if name in self.always_included_fields:
+            return True
+        if self._selected_fields is not None and name not in self._selected_fields:
+            return False
+        return name not in self._omitted_fields
+
+    def required_relations(self):
+        """Caminhos de select_related necessários para os campos selecionados (ex: 'task__category')"""
+        relations = set()
+        for field in self.fields.values():
+            if field.write_only:
+                continue
+            # 'task.category.name' precisa de 'task' e 'task__category'
+            for depth in range(1, len(field.source_attrs)):
+                relations.add('__'.join(field.source_attrs[:depth]))
+        return sorted(relations)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que resolve os ids em um dict {pk: objeto} já carregado.
+
+    Usado na validação em lote (/api/tasks/bulk/): em vez de uma query por item,
+    os objetos referenciados por todos os itens são lidos de uma vez.
+    """
+
+    def __init__(self, objects, **kwargs):
+        self.objects = objects
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.objects[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = '__all__'
 
 
-class GoalSerializer(serializers.ModelSerializer):
+class GoalSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_icon = serializers.CharField(source='category.icon', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
@@ -29,7 +110,7 @@ class GoalSerializer(serializers.ModelSerializer):
         return 0
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_icon = serializers.CharField(source='category.icon', read_only=True)
     category_color = serializers.CharField(source='category.color', read_only=True)
@@ -89,106 +170,14 @@ class TaskSerializer(serializers.ModelSerializer):
     
     def _generate_occurrences(self, task):
         """Gera ocorrências iniciais para tarefas recorrentes"""
-        current_date = task.date
-        end_date = task.repeat_end_date
+        from .utils import initial_occurrence_dates, invalidate_user_cache
         
-        if not end_date:
-            # Se não houver data final, gerar para os próximos 30 dias
-            end_date = current_date + timedelta(days=30)
-        
-        # Criar a primeira ocorrência para a data inicial
-        TaskOccurrence.objects.create(
-            task=task,
-            date=current_date,
-            status='pending'
-        )
-        
-        # Para padrão semanal, aumentar 7 dias para cada nova ocorrência
-        if task.repeat_pattern == 'weekly':
-            next_date = current_date + timedelta(days=7)
-            while next_date <= end_date:
-                TaskOccurrence.objects.create(
-                    task=task,
-                    date=next_date,
-                    status='pending'
-                )
-                next_date += timedelta(days=7)
-        # Para padrão mensal, avançar um mês para cada nova ocorrência
-        elif task.repeat_pattern == 'monthly':
-            # Definir o dia do próximo mês
-            year = current_date.year
-            month = current_date.month + 1
-            day = current_date.day
-            
-            # Ajustar se passar para o próximo ano
-            if month > 12:
-                month = 1
-                year += 1
-            
-            # Continuar criando ocorrências até a data final
-            while True:
-                try:
-                    next_date = datetime(year, month, day).date()
-                    if next_date > end_date:
-                        break
-                    
-                    TaskOccurrence.objects.create(
-                        task=task,
-                        date=next_date,
-                        status='pending'
-                    )
-                    
-                    # Avançar para o próximo mês
-                    month += 1
-                    if month > 12:
-                        month = 1
-                        year += 1
-                except ValueError:
-                    # Caso o dia não exista no próximo mês (ex: 31 de fevereiro)
-                    # Avançar para o próximo mês
-                    month += 1
-                    if month > 12:
-                        month = 1
-                        year += 1
-                    continue
-        # Para padrões daily, weekdays, weekends e custom, gerar dia a dia
-        else:
-            next_date = current_date + timedelta(days=1)
-            while next_date <= end_date:
-                if self._should_create_occurrence(task, next_date):
-                    TaskOccurrence.objects.create(
-                        task=task,
-                        date=next_date,
-                        status='pending'
-                    )
-                
-                next_date += timedelta(days=1)
-    
-    def _should_create_occurrence(self, task, date):
-        """Determina se deve criar uma ocorrência para esta data com base no padrão de repetição"""
-        # A data inicial já é tratada separadamente, então aqui verificamos apenas as datas subsequentes
-        if date == task.date:
-            return False  # A data inicial é tratada separadamente
-        
-        weekday = date.weekday()  # 0 = Segunda, 6 = Domingo
-        
-        if task.repeat_pattern == 'daily':
-            return True
-        elif task.repeat_pattern == 'weekdays':
-            return weekday < 5  # Segunda a Sexta
-        elif task.repeat_pattern == 'weekends':
-            return weekday >= 5  # Sábado e Domingo
-        elif task.repeat_pattern == 'weekly':
-            # Esta lógica já foi tratada na função _generate_occurrences
-            return False
-        elif task.repeat_pattern == 'monthly':
-            # Esta lógica já foi tratada na função _generate_occurrences
-            return False
-        elif task.repeat_pattern == 'custom' and task.repeat_days:
-            days = [int(d) for d in task.repeat_days.split(',')]
-            return weekday in days
-        
-        return False
+        TaskOccurrence.objects.bulk_create([
+            TaskOccurrence(task=task, date=occurrence_date, status='pending')
+            for occurrence_date in initial_occurrence_dates(task)
+        ])
+        # bulk_create não dispara os sinais de post_save
+        invalidate_user_cache(task.user_id)
 
 class ModifiedTaskOccurrenceSerializer(serializers.ModelSerializer):
     """Serializador para ocorrências de tarefas que foram modificadas individualmente"""
@@ -197,7 +186,7 @@ class ModifiedTaskOccurrenceSerializer(serializers.ModelSerializer):
         fields = ('id', 'task', 'date', 'status', 'actual_value', 'notes')
         read_only_fields = ('task',)
 
-class TaskOccurrenceSerializer(serializers.ModelSerializer):
+class TaskOccurrenceSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     task_title = serializers.CharField(source='task.title', read_only=True)
     task_description = serializers.CharField(source='task.description', read_only=True)
     category = serializers.PrimaryKeyRelatedField(source='task.category', read_only=True)
@@ -215,6 +204,73 @@ class TaskOccurrenceSerializer(serializers.ModelSerializer):
         read_only_fields = ('task',)
 
 
+class TaskStatusChangeSerializer(serializers.Serializer):
+    """Mudança de status de uma tarefa (ou da ocorrência da data, se recorrente) no /api/tasks/bulk/"""
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES)
+    actual_value = serializers.DecimalField(max_digits=10, decimal_places=2, required=False, allow_null=True)
+    notes = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    date = serializers.DateField(required=False)
+
+
+class CloneRangeSerializer(serializers.Serializer):
+    """Parâmetros do /api/tasks/clone_range/"""
+    ON_CONFLICT_CHOICES = ['skip', 'fail', 'allow']
+    MAX_RANGE_DAYS = 31
+
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    target_date = serializers.DateField()
+    on_conflict = serializers.ChoiceField(choices=ON_CONFLICT_CHOICES, default='skip')
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'A data final deve ser igual ou posterior à inicial'})
+        if (data['end_date'] - data['start_date']).days >= self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError({'end_date': f'O período de origem pode ter no máximo {self.MAX_RANGE_DAYS} dias'})
+        if data['target_date'] == data['start_date']:
+            raise serializers.ValidationError({'target_date': 'O destino deve ser diferente da origem'})
+        return data
+
+
+class ExportSerializer(serializers.Serializer):
+    """Parâmetros (query string) do /api/export/; sem datas, exporta os últimos 365 dias"""
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, data):
+        data.setdefault('end_date', timezone.localdate())
+        data.setdefault('start_date', data['end_date'] - timedelta(days=365))
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'A data final deve ser igual ou posterior à inicial'})
+        if (data['end_date'] - data['start_date']).days >= settings.EXPORT_MAX_RANGE_DAYS:
+            raise serializers.ValidationError({
+                'end_date': f'O período pode ter no máximo {settings.EXPORT_MAX_RANGE_DAYS} dias'
+            })
+        return data
+
+
+class ICSImportSerializer(serializers.Serializer):
+    """Parâmetros do /api/tasks/import_ics/ (multipart)"""
+    file = serializers.FileField()
+    default_category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
+    # {"Trabalho": 3, "Pessoal": 5}: nome em CATEGORIES no ICS -> id da categoria
+    category_map = serializers.JSONField(required=False, binary=True, default=dict)
+    on_conflict = serializers.ChoiceField(choices=['skip', 'allow'], default='skip')
+
+    def validate_category_map(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Informe um objeto {nome da categoria no ICS: id da categoria}')
+
+        categories = Category.objects.in_bulk([
+            category_id for category_id in value.values() if isinstance(category_id, int)
+        ])
+        missing = [name for name, category_id in value.items() if categories.get(category_id) is None]
+        if missing:
+            raise serializers.ValidationError(f"Categorias inválidas para: {', '.join(missing)}")
+        return {name: categories[category_id] for name, category_id in value.items()}
+
+
 class UserPreferenceSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserPreference
@@ -241,6 +297,18 @@ class GoalReportSerializer(serializers.Serializer):
     avg_progress = serializers.FloatField()
 
 
+class GoalTimelineSerializer(serializers.Serializer):
+    """Serializer para a série temporal de progresso de uma meta"""
+    goal_id = serializers.IntegerField()
+    target_value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    current_value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    progress_percentage = serializers.DecimalField(max_digits=5, decimal_places=2)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    points = serializers.ListField()
+    forecast = serializers.DictField()
+
+
 class DashboardSerializer(serializers.Serializer):
     """Serializer para os dados do dashboard"""
     today = serializers.DictField()
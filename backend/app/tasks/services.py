@@ -1,5 +1,15 @@
-from datetime import datetime, time
-from .models import Task, EnergyProfile
+import logging
+from datetime import datetime, time, timedelta
+import numpy as np
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+from .models import Task, TaskOccurrence, Goal, EnergyProfile
+from .suggestions import invalidate_title_suggestions
+from .utils import ScheduleIndex, expand_recurring_tasks, invalidate_user_cache
+from core.log import SAMPLED
+
+logger = logging.getLogger(__name__)
 
 class EnergyMatchService:
     """Serviço para correspondência de tarefas com níveis de energia"""
@@ -8,17 +18,18 @@ class EnergyMatchService:
     def get_current_energy_level(user):
         """Determina o nível de energia atual para o usuário"""
         try:
-            profile = EnergyProfile.objects.get(user=user)
-            print(f"[DEBUG] Found energy profile for user {user.username}")
+            # Pela relação: fica em cache na instância do usuário (compartilhada no /api/batch/)
+            profile = user.energy_profile
+            logger.debug('Found energy profile for user %s', user.username)
         except EnergyProfile.DoesNotExist:
             # Sem perfil, assume nível médio
-            print(f"[DEBUG] No energy profile found for user {user.username}, using default level 5")
+            logger.debug('No energy profile found for user %s, using default level 5', user.username)
             return 5
             
         now = datetime.now().time()
         day_of_week = datetime.now().weekday()  # 0 = Monday, 6 = Sunday
         
-        print(f"[DEBUG] Current time: {now}, day of week: {day_of_week}")
+        logger.debug('Current time: %s, day of week: %s', now, day_of_week)
         
         # Determina qual período do dia estamos
         if time(5, 0) <= now < time(8, 0):
@@ -43,7 +54,7 @@ class EnergyMatchService:
             base_energy = profile.night_energy
             period = "night"
             
-        print(f"[DEBUG] Current period: {period}, base energy: {base_energy}")
+        logger.debug('Current period: %s, base energy: %s', period, base_energy)
             
         # Aplicar modificador do dia da semana
         day_modifiers = [
@@ -57,14 +68,14 @@ class EnergyMatchService:
         ]
         
         day_modifier = day_modifiers[day_of_week]
-        print(f"[DEBUG] Day modifier for {day_of_week}: {day_modifier}")
+        logger.debug('Day modifier for %s: %s', day_of_week, day_modifier)
         
         energy_level = base_energy + day_modifier
-        print(f"[DEBUG] Final energy level before clamping: {energy_level}")
+        logger.debug('Final energy level before clamping: %s', energy_level)
         
         # Limitar entre 1-10
         final_energy = max(1, min(10, energy_level))
-        print(f"[DEBUG] Final energy level after clamping: {final_energy}")
+        logger.debug('Final energy level after clamping: %s', final_energy)
         
         return final_energy
     
@@ -95,23 +106,23 @@ class EnergyMatchService:
         
         # Buscar tarefas pendentes do usuário para hoje
         today = datetime.now().date()
-        print(f"[DEBUG] Looking for pending tasks for {user.username} on {today}")
+        logger.debug('Looking for pending tasks for %s on %s', user.username, today)
         
         # First try to find tasks with energy levels explicitly set
         pending_tasks = Task.objects.filter(
             user=user,
             status='pending',
             date=today
-        ).exclude(energy_level='')  # Make sure energy_level is not empty
+        ).exclude(energy_level='').with_relations()  # Make sure energy_level is not empty
         
         # If no tasks with explicit energy levels, fall back to all pending tasks
         if pending_tasks.count() == 0:
-            print(f"[DEBUG] No tasks with energy levels found, using all pending tasks")
+            logger.debug('No tasks with energy levels found, using all pending tasks')
             pending_tasks = Task.objects.filter(
                 user=user,
                 status='pending',
                 date=today
-            )
+            ).with_relations()
         
         # Se não há tarefas pendentes, verificar se há tarefas sem energia definida
         if pending_tasks.count() == 0:
@@ -122,14 +133,17 @@ class EnergyMatchService:
                 date=today,
                 energy_level__isnull=True
             )
-            if unassigned_tasks.exists():
-                print(f"[DEBUG] User has {unassigned_tasks.count()} tasks without energy levels assigned.")
-            else:
-                print(f"[DEBUG] User has no pending tasks for today.")
+            if logger.isEnabledFor(logging.DEBUG):
+                # Só para diagnóstico: evita as queries quando o debug está desligado
+                if unassigned_tasks.exists():
+                    logger.debug('User has %s tasks without energy levels assigned.', unassigned_tasks.count())
+                else:
+                    logger.debug('User has no pending tasks for today.')
             return []
             
         # Log debugging info
-        print(f"[DEBUG] Found {pending_tasks.count()} pending tasks for user {user.username}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Found %s pending tasks for user %s', pending_tasks.count(), user.username)
         
         # Calcular pontuação para cada tarefa
         task_scores = []
@@ -140,12 +154,327 @@ class EnergyMatchService:
                 
             score = cls.get_task_energy_match_score(task, current_energy)
             task_scores.append((task, score))
-            print(f"[DEBUG] Task {task.id} ({task.title}) has energy level {task.energy_level} and score {score}")
+            logger.debug('Task %s (%s) has energy level %s and score %s', task.id, task.title, task.energy_level, score, extra=SAMPLED)
         
         # Ordenar por pontuação (maior primeiro)
         task_scores.sort(key=lambda x: x[1], reverse=True)
         
         # Retornar apenas as tarefas
         result = [task for task, score in task_scores[:limit]]
-        print(f"[DEBUG] Returning {len(result)} recommended tasks")
-        return result
\ No newline at end of file
+        logger.debug('Returning %s recommended tasks', len(result))
+        return result
+
+
+class GoalProgressService:
+    """Serviço para séries temporais de progresso e previsão de conclusão de metas"""
+
+    @staticmethod
+    def get_daily_progress(goal):
+        """
+        Retorna o progresso diário e acumulado de uma meta.
+
+        Soma os valores realizados de tarefas e ocorrências concluídas por dia
+        e calcula o acumulado com uma função de janela, tudo em uma única query.
+
+        Returns:
+            Lista de tuplas (data, valor_do_dia, valor_acumulado) ordenada por data
+        """
+        task_table = Task._meta.db_table
+        occurrence_table = TaskOccurrence._meta.db_table
+
+        sql = f"""
+            WITH daily AS (
+                SELECT t.date AS day, SUM(t.actual_value) AS value
+                FROM {task_table} t
+                WHERE t.goal_id = %s AND t.status = 'completed' AND t.actual_value IS NOT NULL
+                GROUP BY t.date
+                UNION ALL
+                SELECT o.date AS day, SUM(o.actual_value) AS value
+                FROM {occurrence_table} o
+                INNER JOIN {task_table} t ON o.task_id = t.id
+                WHERE t.goal_id = %s AND o.status = 'completed' AND o.actual_value IS NOT NULL
+                GROUP BY o.date
+            )
+            SELECT day, SUM(value) AS value, SUM(SUM(value)) OVER (ORDER BY day) AS cumulative
+            FROM daily
+            GROUP BY day
+            ORDER BY day
+        """
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [goal.id, goal.id])
+            rows = cursor.fetchall()
+
+        progress = []
+        for day, value, cumulative in rows:
+            # SQLite devolve a data como string
+            if isinstance(day, str):
+                day = datetime.strptime(day, '%Y-%m-%d').date()
+            progress.append((day, float(value or 0), float(cumulative or 0)))
+
+        return progress
+
+    @staticmethod
+    def get_forecast(goal, progress):
+        """
+        Projeta a data de conclusão da meta e o ritmo diário necessário.
+
+        A projeção usa um ajuste linear por mínimos quadrados sobre o progresso
+        acumulado. O ritmo necessário considera o valor atual da meta e os dias
+        restantes até a data de término.
+        """
+        today = timezone.localdate()
+        target_value = float(goal.target_value)
+        current_value = float(goal.current_value)
+        remaining_value = max(0.0, target_value - current_value)
+        days_remaining = max(0, (goal.end_date - today).days)
+
+        if remaining_value == 0:
+            required_daily_rate = 0.0
+        elif days_remaining > 0:
+            required_daily_rate = remaining_value / days_remaining
+        else:
+            required_daily_rate = remaining_value
+
+        forecast = {
+            'current_daily_rate': None,
+            'required_daily_rate': round(required_daily_rate, 2),
+            'projected_completion_date': None,
+            'on_track': None,
+            'days_remaining': days_remaining,
+        }
+
+        if goal.is_completed or remaining_value == 0:
+            forecast['on_track'] = True
+            return forecast
+
+        # São necessários pelo menos dois dias com progresso para o ajuste linear
+        if len(progress) < 2:
+            return forecast
+
+        origin = goal.start_date if goal.start_date <= progress[0][0] else progress[0][0]
+        x = np.array([(day - origin).days for day, _, _ in progress], dtype=float)
+        y = np.array([cumulative for _, _, cumulative in progress], dtype=float)
+
+        slope, intercept = np.polyfit(x, y, 1)
+        forecast['current_daily_rate'] = round(float(slope), 2)
+
+        if slope <= 0:
+            forecast['on_track'] = False
+            return forecast
+
+        projected_offset = int(np.ceil((target_value - intercept) / slope))
+        projected_date = origin + timedelta(days=max(projected_offset, 0))
+        forecast['projected_completion_date'] = projected_date
+        forecast['on_track'] = projected_date <= goal.end_date
+
+        return forecast
+
+    @classmethod
+    def get_timeline(cls, goal):
+        """Retorna a série temporal de progresso da meta junto com a previsão de conclusão"""
+        progress = cls.get_daily_progress(goal)
+
+        return {
+            'goal_id': goal.id,
+            'target_value': goal.target_value,
+            'current_value': goal.current_value,
+            'progress_percentage': goal.progress_percentage,
+            'start_date': goal.start_date,
+            'end_date': goal.end_date,
+            'points': [
+                {'date': day, 'value': value, 'cumulative': cumulative}
+                for day, value, cumulative in progress
+            ],
+            'forecast': cls.get_forecast(goal, progress),
+        }
+
+
+class DashboardService:
+    """Serviço para os dados consolidados do dashboard"""
+
+    @staticmethod
+    def _status_counts(queryset, **extra):
+        """Agrega total e contagens por status de um QuerySet de tarefas em uma única query"""
+        return queryset.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            pending=Count('id', filter=Q(status='pending')),
+            **extra
+        )
+
+    @classmethod
+    def get_dashboard(cls, user):
+        """
+        Calcula os dados do dashboard: hoje, semana, metas e tendência de conclusão.
+
+        Cada escopo é resolvido com uma única agregação condicional sobre as tarefas
+        avulsas. As tarefas recorrentes são expandidas uma única vez para todo o
+        período (duas queries) e somadas a cada escopo.
+        """
+        today = timezone.localdate()
+        start_of_week = today - timedelta(days=today.weekday())
+        end_of_week = start_of_week + timedelta(days=6)
+        trend_start = today - timedelta(days=30)
+
+        one_off_tasks = Task.objects.filter(user=user, repeat_pattern='none')
+
+        # Hoje
+        today_counts = cls._status_counts(
+            one_off_tasks.filter(date=today),
+            high_priority=Count('id', filter=Q(priority__gte=3))
+        )
+
+        # Semana
+        week_counts = one_off_tasks.filter(date__range=[start_of_week, end_of_week]).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed'))
+        )
+
+        # Metas
+        goal_counts = Goal.objects.filter(user=user).aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(end_date__gte=today, is_completed=False)),
+            completed=Count('id', filter=Q(is_completed=True)),
+            close_to_deadline=Count('id', filter=Q(
+                end_date__gte=today,
+                end_date__lte=today + timedelta(days=7),
+                is_completed=False
+            )),
+        )
+
+        # Tendência dos últimos 30 dias
+        trend = {
+            row['date']: {'total': row['total'], 'completed': row['completed']}
+            for row in one_off_tasks.filter(date__range=[trend_start, today]).values('date').annotate(
+                total=Count('id'),
+                completed=Count('id', filter=Q(status='completed'))
+            )
+        }
+
+        # Tarefas recorrentes expandidas para todo o período usado acima
+        for task, occurrence_date, occurrence in expand_recurring_tasks(
+            user,
+            min(trend_start, start_of_week),
+            max(today, end_of_week)
+        ):
+            task_status = occurrence.status if occurrence else 'pending'
+            if task_status == 'skipped':
+                continue
+
+            if occurrence_date == today:
+                today_counts['total'] += 1
+                if task_status in today_counts:
+                    today_counts[task_status] += 1
+                if task.priority >= 3:
+                    today_counts['high_priority'] += 1
+
+            if start_of_week <= occurrence_date <= end_of_week:
+                week_counts['total'] += 1
+                if task_status == 'completed':
+                    week_counts['completed'] += 1
+
+            if trend_start <= occurrence_date <= today:
+                day_counts = trend.setdefault(occurrence_date, {'total': 0, 'completed': 0})
+                day_counts['total'] += 1
+                if task_status == 'completed':
+                    day_counts['completed'] += 1
+
+        week_counts['completion_rate'] = (
+            week_counts['completed'] * 100.0 / week_counts['total'] if week_counts['total'] > 0 else 0
+        )
+
+        completion_trend = [
+            {
+                'date': day,
+                'total': counts['total'],
+                'completed': counts['completed'],
+                'rate': counts['completed'] * 100.0 / counts['total'],
+            }
+            for day, counts in sorted(trend.items())
+            if counts['total'] > 0
+        ]
+
+        return {
+            'today': today_counts,
+            'week': week_counts,
+            'goals': goal_counts,
+            'completion_trend': completion_trend,
+        }
+
+
+class TaskCloneService:
+    """Serviço para copiar as tarefas avulsas de um período para outro ("copiar semana/dia")"""
+
+    # Campos copiados da tarefa de origem; status, valor realizado e observações recomeçam
+    COPIED_FIELDS = (
+        'title', 'description', 'category', 'start_time', 'end_time', 'duration_minutes',
+        'priority', 'goal', 'target_value', 'energy_level',
+    )
+
+    @classmethod
+    def clone_range(cls, user, start_date, end_date, target_date, on_conflict='skip', dry_run=False):
+        """
+        Copia as tarefas avulsas de [start_date, end_date] para o período que começa em target_date.
+
+        Os conflitos com o destino são resolvidos em memória (ScheduleIndex, uma
+        query para todas as datas de destino) e as cópias gravadas com um único
+        bulk_create.
+
+        Args:
+            user: Dono das tarefas
+            start_date, end_date: Período de origem (inclusivo)
+            target_date: Nova data da primeira data de origem (as demais mantêm a distância)
+            on_conflict: 'skip' (não copia as que se sobrepõem), 'fail' (não copia
+                nada se houver conflito) ou 'allow' (copia mesmo assim)
+            dry_run: Apenas calcula o resultado, sem gravar
+
+        Returns:
+            dict com offset_days, tasks (cópias; sem id se não gravadas), conflicts
+            e created (se as cópias foram gravadas)
+        """
+        offset = target_date - start_date
+        sources = list(
+            Task.objects.filter(
+                user=user, repeat_pattern='none', date__range=[start_date, end_date]
+            ).select_related('category', 'goal').order_by('date', 'start_time', 'id')
+        )
+        schedule = ScheduleIndex.for_dates(user, {source.date + offset for source in sources})
+
+        clones = []
+        conflicts = []
+        for source in sources:
+            clone = Task(
+                user=user,
+                date=source.date + offset,
+                **{field: getattr(source, field) for field in cls.COPIED_FIELDS}
+            )
+
+            overlapping = schedule.find_overlap(clone.date, clone.start_time, clone.end_time)
+            if overlapping:
+                conflicts.append({
+                    'source_id': source.id,
+                    'title': clone.title,
+                    'date': clone.date,
+                    'start_time': clone.start_time,
+                    'end_time': clone.end_time,
+                    'overlapping_task': overlapping,
+                })
+                if on_conflict == 'skip':
+                    continue
+            clones.append(clone)
+
+        created = bool(clones) and not dry_run and not (on_conflict == 'fail' and conflicts)
+        if created:
+            Task.objects.bulk_create(clones)
+            # bulk_create não dispara os sinais de post_save
+            invalidate_user_cache(user.id)
+            invalidate_title_suggestions(user.id)
+
+        return {
+            'offset_days': offset.days,
+            'tasks': clones,
+            'conflicts': conflicts,
+            'created': created,
+        }
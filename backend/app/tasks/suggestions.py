@@ -0,0 +1,138 @@
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Task
+
+# Versão compartilhada (entre workers) do índice de sugestões de cada usuário
+SUGGESTION_VERSION_KEY = 'task-suggestions-version:{user_id}'
+
+# Quantidade máxima de índices mantidos em memória por processo
+MAX_CACHED_USERS = 1000
+
+
+def normalize_title(title):
+    """Normaliza um título para comparação por prefixo (minúsculas e sem acentos)"""
+    decomposed = unicodedata.normalize('NFKD', title.strip().lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+class TitleSuggestionIndex:
+    """
+    Índice em memória dos títulos de tarefas já usados por um usuário.
+
+    Guarda, para cada título, quantas vezes foi usado e a categoria, duração e
+    nível de energia mais frequentes. Os títulos normalizados ficam em uma lista
+    ordenada, então a busca por prefixo é uma busca binária seguida de um top-N
+    apenas sobre o intervalo encontrado.
+    """
+
+    def __init__(self, rows):
+        entries = {}
+        for row in rows:
+            key = normalize_title(row['title'])
+            if not key:
+                continue
+
+            entry = entries.setdefault(key, {
+                'titles': Counter(),
+                'categories': Counter(),
+                'durations': Counter(),
+                'energy_levels': Counter(),
+                'count': 0,
+            })
+            count = row['count']
+            category = (row['category'], row['category__name'], row['category__icon'], row['category__color'])
+
+            entry['count'] += count
+            entry['titles'][row['title'].strip()] += count
+            entry['categories'][category] += count
+            entry['durations'][row['duration_minutes']] += count
+            entry['energy_levels'][row['energy_level']] += count
+
+        self.keys = sorted(entries)
+        self.suggestions = [self._build_suggestion(entries[key]) for key in self.keys]
+
+    @staticmethod
+    def _build_suggestion(entry):
+        category, category_name, category_icon, category_color = entry['categories'].most_common(1)[0][0]
+        return {
+            'title': entry['titles'].most_common(1)[0][0],
+            'count': entry['count'],
+            'category': category,
+            'category_name': category_name,
+            'category_icon': category_icon,
+            'category_color': category_color,
+            'duration_minutes': entry['durations'].most_common(1)[0][0],
+            'energy_level': entry['energy_levels'].most_common(1)[0][0],
+        }
+
+    @classmethod
+    def build(cls, user):
+        """Monta o índice a partir de uma única query agrupada sobre as tarefas do usuário"""
+        rows = Task.objects.filter(user=user).order_by().values(
+            'title', 'category', 'category__name', 'category__icon', 'category__color',
+            'duration_minutes', 'energy_level'
+        ).annotate(count=Count('id'))
+        return cls(rows)
+
+    def suggest(self, prefix, limit=8):
+        """Retorna até `limit` sugestões cujo título começa com `prefix`, das mais usadas para as menos"""
+        prefix = normalize_title(prefix)
+        start = bisect_left(self.keys, prefix)
+        # '\uffff' é maior que qualquer caractere de título normalizado
+        end = bisect_left(self.keys, prefix + '\uffff', lo=start)
+
+        return heapq.nlargest(
+            limit,
+            self.suggestions[start:end],
+            key=lambda suggestion: suggestion['count']
+        )
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_title_suggestion_index(user):
+    """
+    Retorna o índice de sugestões do usuário, montando-o na primeira chamada.
+
+    O índice fica em memória no processo e é descartado quando a versão
+    compartilhada do usuário muda (ver invalidate_title_suggestions).
+    """
+    version = cache.get_or_set(SUGGESTION_VERSION_KEY.format(user_id=user.id), 1, None)
+
+    with _indexes_lock:
+        cached = _indexes.get(user.id)
+        if cached and cached[0] == version:
+            _indexes.move_to_end(user.id)
+            return cached[1]
+
+    index = TitleSuggestionIndex.build(user)
+
+    with _indexes_lock:
+        _indexes[user.id] = (version, index)
+        _indexes.move_to_end(user.id)
+        while len(_indexes) > MAX_CACHED_USERS:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def invalidate_title_suggestions(user_id):
+    """Descarta o índice de sugestões do usuário em todos os processos"""
+    key = SUGGESTION_VERSION_KEY.format(user_id=user_id)
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+    with _indexes_lock:
+        _indexes.pop(user_id, None)
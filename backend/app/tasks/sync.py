@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Category, DeletionLog, Goal, Task, TaskOccurrence, UserPreference
+from .row_serializers import RowSerializer
+from .serializers import (
+    CategorySerializer, GoalSerializer, TaskOccurrenceSerializer, TaskSerializer, UserPreferenceSerializer
+)
+
+
+class InvalidCursor(ValueError):
+    """Cursor de sincronização malformado"""
+
+
+def encode_cursor(moment):
+    """Converte um datetime no cursor opaco enviado ao cliente (microssegundos desde a época)"""
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_cursor(value):
+    """Converte o cursor recebido do cliente de volta em datetime (UTC)"""
+    try:
+        microseconds = int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor(value)
+    if microseconds < 0:
+        raise InvalidCursor(value)
+    return datetime(1970, 1, 1, tzinfo=dt_timezone.utc) + timedelta(microseconds=microseconds)
+
+
+def collect_changes(user, since=None, context=None):
+    """
+    Reúne as alterações do usuário desde `since` para o /api/sync/.
+
+    As alterações são lidas das colunas `updated_at` e as exclusões do
+    DeletionLog. O cursor devolvido fica SYNC_OVERLAP_SECONDS antes do início da
+    leitura, então a próxima sincronização repete esse intervalo: transações que
+    gravaram um `updated_at` anterior ao cursor mas terminaram depois da leitura
+    não se perdem (o cliente aplica os itens repetidos sem efeito).
+
+    Sem `since`, ou com um cursor mais antigo que a retenção do DeletionLog,
+    devolve o estado completo com `reset` verdadeiro: o cliente deve descartar a
+    réplica local e usar apenas esta resposta.
+
+    Alterações feitas com QuerySet.update() não atualizam `updated_at` e não
+    aparecem aqui; por isso a exclusão de uma meta não lista as tarefas que
+    perderam o vínculo (o cliente limpa `goal` ao receber a exclusão da meta).
+
+    Args:
+        user: Usuário que está sincronizando
+        since: datetime do último cursor recebido pelo cliente (None para tudo)
+        context: Contexto dos serializers (ex: {'request': request})
+
+    Returns:
+        dict com cursor, reset, tasks, occurrences, goals, categories,
+        preferences e deleted ({modelo: [ids]})
+    """
+    context = context or {}
+    started_at = timezone.now()
+
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    reset = since is None or since < started_at - retention
+    if reset:
+        since = None
+
+    tasks = Task.objects.filter(user=user)
+    occurrences = TaskOccurrence.objects.filter(task__user=user)
+    goals = Goal.objects.filter(user=user).with_relations()
+    categories = Category.objects.all()
+    preferences = UserPreference.objects.filter(user=user)
+
+    if since is not None:
+        tasks = tasks.filter(updated_at__gte=since)
+        occurrences = occurrences.filter(updated_at__gte=since)
+        goals = goals.filter(updated_at__gte=since)
+        categories = categories.filter(updated_at__gte=since)
+        preferences = preferences.filter(updated_at__gte=since)
+
+    deleted = {model: [] for model, _ in DeletionLog.MODEL_CHOICES}
+    if since is not None:
+        tombstones = DeletionLog.objects.filter(
+            Q(user=user) | Q(user__isnull=True),
+            deleted_at__gte=since
+        ).order_by('deleted_at').values_list('model', 'object_id')
+        for model, object_id in tombstones:
+            deleted[model].append(object_id)
+
+    preference = preferences.first()
+
+    return {
+        'cursor': encode_cursor(started_at - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)),
+        'reset': reset,
+        'tasks': RowSerializer(TaskSerializer(context=context)).render(tasks.order_by('id')),
+        'occurrences': RowSerializer(TaskOccurrenceSerializer(context=context)).render(occurrences.order_by('id')),
+        'goals': GoalSerializer(goals.order_by('id'), many=True, context=context).data,
+        'categories': CategorySerializer(categories.order_by('id'), many=True, context=context).data,
+        'preferences': UserPreferenceSerializer(preference, context=context).data if preference else None,
+        'deleted': deleted,
+    }
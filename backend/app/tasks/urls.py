@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, CategoryViewSet, GoalViewSet, EnergyProfileViewSet
+from .views import (
+    TaskViewSet, CategoryViewSet, GoalViewSet, EnergyProfileViewSet, SyncView, BatchView,
+    CalendarFeedView, CalendarFeedTokenView, ExportView, AccountArchiveView
+)
 
 router = DefaultRouter()
 router.register(r'tasks', TaskViewSet, basename='task')
@@ -10,4 +13,10 @@ router.register(r'energy-profile', EnergyProfileViewSet, basename='energy-profil
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('calendar-feed/', CalendarFeedTokenView.as_view(), name='calendar-feed-token'),
+    path('account/archive/', AccountArchiveView.as_view(), name='account-archive'),
+    path('export/<str:dataset>.<str:extension>', ExportView.as_view(), name='export'),
+    path('calendar/<str:token>/calendar.ics', CalendarFeedView.as_view(), name='calendar-feed'),
 ]
\ No newline at end of file
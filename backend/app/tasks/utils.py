@@ -1,12 +1,163 @@
+import logging
+from bisect import insort
+from collections import defaultdict
 from django.db.models import Q
 from django.core.cache import cache
 from datetime import datetime, timedelta
 from django.utils import timezone
-from app.tasks.models import Task
+from app.tasks.models import Task, TaskOccurrence
+from app.tasks.metrics import RECURRENCE_EXPANSION
+from core.log import SAMPLED
 
-def check_task_overlap(user, date, start_time, end_time, exclude_task_id=None):
+logger = logging.getLogger(__name__)
+
+USER_CACHE_VERSION_KEY = 'user-cache-version:{user_id}'
+
+def user_cache_key(user_id, name, *parts):
     """
-    Verifica se há sobreposição de horários para tarefas do usuário.
+    Monta uma chave de cache por usuário, versionada.
+    
+    Todas as chaves de um usuário incluem a versão atual dos seus dados, então
+    invalidate_user_cache() descarta todas de uma vez sem precisar apagá-las.
+    
+    Args:
+        user_id: ID do usuário dono dos dados
+        name: Nome do recurso em cache (ex: 'dashboard')
+        *parts: Partes adicionais da chave (ex: data)
+    
+    Returns:
+        str: Chave de cache
+    """
+    version = cache.get_or_set(USER_CACHE_VERSION_KEY.format(user_id=user_id), 1, None)
+    return ':'.join([name, str(user_id), f'v{version}', *[str(part) for part in parts]])
+
+def invalidate_user_cache(user_id):
+    """Invalida todas as entradas de cache do usuário incrementando a versão dos seus dados"""
+    key = USER_CACHE_VERSION_KEY.format(user_id=user_id)
+    cache.add(key, 1, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # A chave expirou entre o add e o incr
+        cache.set(key, 1, None)
+
+def recurring_task_applies(task, check_date):
+    """
+    Verifica se uma tarefa recorrente se aplica a uma data.
+    
+    Considera o período da recorrência (data inicial e data final) e o padrão
+    de repetição da tarefa.
+    """
+    if task.date > check_date:
+        return False
+    if task.repeat_end_date and check_date > task.repeat_end_date:
+        return False
+    
+    weekday = check_date.weekday()  # 0 = Segunda, 6 = Domingo
+    
+    if task.repeat_pattern == 'daily':
+        return True
+    elif task.repeat_pattern == 'weekdays':
+        return weekday < 5
+    elif task.repeat_pattern == 'weekends':
+        return weekday >= 5
+    elif task.repeat_pattern == 'weekly':
+        return task.date.weekday() == weekday
+    elif task.repeat_pattern == 'monthly':
+        return task.date.day == check_date.day
+    elif task.repeat_pattern == 'custom' and task.repeat_days:
+        days = [int(d) for d in task.repeat_days.split(',')]
+        return weekday in days
+    
+    return False
+
+def initial_occurrence_dates(task):
+    """
+    Datas das ocorrências geradas na criação de uma tarefa recorrente.
+    
+    A data inicial e as seguintes que seguem o padrão, até repeat_end_date (ou
+    pelos próximos 30 dias, sem data final). No padrão mensal, meses sem o dia
+    (ex: 31 de fevereiro) são pulados.
+    """
+    current_date = task.date
+    end_date = task.repeat_end_date or current_date + timedelta(days=30)
+    
+    yield current_date
+    
+    if task.repeat_pattern == 'weekly':
+        next_date = current_date + timedelta(days=7)
+        while next_date <= end_date:
+            yield next_date
+            next_date += timedelta(days=7)
+    elif task.repeat_pattern == 'monthly':
+        year, month = current_date.year, current_date.month
+        while True:
+            month += 1
+            if month > 12:
+                month = 1
+                year += 1
+            try:
+                next_date = datetime(year, month, current_date.day).date()
+            except ValueError:
+                continue
+            if next_date > end_date:
+                break
+            yield next_date
+    else:
+        # daily, weekdays, weekends e custom: dia a dia
+        next_date = current_date + timedelta(days=1)
+        while next_date <= end_date:
+            if recurring_task_applies(task, next_date):
+                yield next_date
+            next_date += timedelta(days=1)
+
+def expand_recurring_tasks(user, start_date, end_date):
+    """
+    Expande as tarefas recorrentes do usuário para cada data do período.
+    
+    Usa apenas duas queries: uma para as tarefas recorrentes ativas no período e
+    outra para as ocorrências já registradas.
+    
+    Args:
+        user: Objeto User do Django
+        start_date: Data inicial do período
+        end_date: Data final do período
+    
+    Returns:
+        Lista de tuplas (task, date, occurrence); occurrence é None quando não há registro
+    """
+    recurring_tasks = Task.objects.filter(user=user, date__lte=end_date).exclude(
+        repeat_pattern='none'
+    ).filter(
+        Q(repeat_end_date__isnull=True) | Q(repeat_end_date__gte=start_date)
+    )
+    
+    occurrences = {
+        (occurrence.task_id, occurrence.date): occurrence
+        for occurrence in TaskOccurrence.objects.filter(
+            task__user=user,
+            date__range=[start_date, end_date]
+        )
+    }
+    
+    expanded = []
+    examined = 0
+    for task in recurring_tasks:
+        current_date = max(start_date, task.date)
+        last_date = min(end_date, task.repeat_end_date) if task.repeat_end_date else end_date
+        examined += max(0, (last_date - current_date).days + 1)
+        
+        while current_date <= last_date:
+            if recurring_task_applies(task, current_date):
+                expanded.append((task, current_date, occurrences.get((task.id, current_date))))
+            current_date += timedelta(days=1)
+    
+    RECURRENCE_EXPANSION.observe(examined, 'expand_recurring_tasks')
+    return expanded
+
+def get_overlapping_tasks(user, date, start_time, end_time, exclude_task_id=None):
+    """
+    Retorna o QuerySet de tarefas do usuário que se sobrepõem ao horário informado.
     
     Args:
         user: Objeto User do Django
@@ -16,16 +167,8 @@ def check_task_overlap(user, date, start_time, end_time, exclude_task_id=None):
         exclude_task_id: ID da tarefa a ser excluída da verificação (útil para edição)
         
     Returns:
-        Task ou None: Retorna a primeira tarefa sobreposta ou None se não houver sobreposição
+        QuerySet de Task ordenado pela hora de início
     """
-    # Converter strings para objetos datetime
-    start_datetime = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
-    end_datetime = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
-    
-    # Lidar com tarefas que passam da meia-noite
-    if end_datetime < start_datetime:
-        end_datetime += timedelta(days=1)
-    
     # Construir a query para verificar sobreposição
     # Uma tarefa se sobrepõe a outra se:
     # 1. Seu início está entre o início e o fim da outra
@@ -44,8 +187,79 @@ def check_task_overlap(user, date, start_time, end_time, exclude_task_id=None):
     if exclude_task_id:
         query &= ~Q(id=exclude_task_id)
     
+    return Task.objects.filter(query).order_by('start_time')
+
+def times_overlap(start_time, end_time, other_start, other_end):
+    """
+    Indica se o horário [other_start, other_end] se sobrepõe a [start_time, end_time].
+    
+    Mesma regra da query de get_overlapping_tasks, para horários já em memória
+    (ex: validação das operações em lote de /api/tasks/bulk/).
+    """
+    return (
+        (other_start < end_time and other_end > start_time) or
+        (other_start < end_time and other_end > end_time) or
+        (other_start >= start_time and other_end <= end_time)
+    )
+
+class ScheduleIndex:
+    """
+    Índice em memória dos horários ocupados, por data.
+    
+    Permite verificar a sobreposição de muitas tarefas com uma única query (as
+    tarefas das datas de destino são carregadas de uma vez) em vez de uma
+    check_task_overlap por tarefa. Cada entrada é um dict com pelo menos
+    'date', 'start_time' e 'end_time'.
+    """
+    
+    def __init__(self, entries=()):
+        self.by_date = defaultdict(list)
+        for entry in entries:
+            self.add(entry)
+    
+    @classmethod
+    def for_dates(cls, user, dates):
+        """Índice com as tarefas do usuário nas datas informadas (uma query)"""
+        return cls(
+            Task.objects.filter(user=user, date__in=dates).order_by('date', 'start_time').values(
+                'id', 'title', 'date', 'start_time', 'end_time'
+            )
+        )
+    
+    def add(self, entry):
+        insort(self.by_date[entry['date']], entry, key=lambda item: item['start_time'])
+    
+    def find_overlap(self, date, start_time, end_time):
+        """Primeira entrada (pela hora de início) que se sobrepõe ao horário, ou None"""
+        for entry in self.by_date.get(date, ()):
+            if times_overlap(start_time, end_time, entry['start_time'], entry['end_time']):
+                return entry
+        return None
+
+def check_task_overlap(user, date, start_time, end_time, exclude_task_id=None):
+    """
+    Verifica se há sobreposição de horários para tarefas do usuário.
+    
+    Args:
+        user: Objeto User do Django
+        date: Data da tarefa (string no formato YYYY-MM-DD)
+        start_time: Hora de início (string no formato HH:MM:SS)
+        end_time: Hora de término (string no formato HH:MM:SS)
+        exclude_task_id: ID da tarefa a ser excluída da verificação (útil para edição)
+        
+    Returns:
+        Task ou None: Retorna a primeira tarefa sobreposta ou None se não houver sobreposição
+    """
+    # Converter strings para objetos datetime
+    start_datetime = datetime.strptime(f"{date} {start_time}", "%Y-%m-%d %H:%M")
+    end_datetime = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
+    
+    # Lidar com tarefas que passam da meia-noite
+    if end_datetime < start_datetime:
+        end_datetime += timedelta(days=1)
+    
     # Executar a query
-    overlapping_tasks = Task.objects.filter(query).order_by('start_time')
+    overlapping_tasks = get_overlapping_tasks(user, date, start_time, end_time, exclude_task_id)
     
     return overlapping_tasks.first() if overlapping_tasks.exists() else None
 
@@ -198,6 +412,9 @@ def count_tasks_with_recurrences(user, date=None, date_range=None, filter_kwargs
                     result['by_day'][date_str]['total'] += 1
                     result['by_day'][date_str][status] += 1
     
+    # recur_query já foi avaliado no laço: len() não faz outra query
+    RECURRENCE_EXPANSION.observe(len(recur_query) * len(dates_to_check), 'count_tasks_with_recurrences')
+    
     return result
 
 def count_total_tasks(user, date=None, date_range=None):
@@ -242,7 +459,7 @@ def count_total_tasks(user, date=None, date_range=None):
     else:
         # Se nenhuma data for especificada, use a data atual
         today = timezone.localdate()
-        print(f"[DEBUG] Contando tarefas para a data: {today}")
+        logger.debug('Contando tarefas para a data: %s', today)
         non_recurring_query = base_query.filter(repeat_pattern='none', date=today)
     
     # Adicionar contagens não recorrentes
@@ -269,11 +486,11 @@ def count_total_tasks(user, date=None, date_range=None):
         recurring_tasks = base_query.exclude(repeat_pattern='none').filter(date__lte=today)
     
     # Para cada tarefa recorrente
-    print(f"[DEBUG] Verificando {len(recurring_tasks)} tarefas recorrentes")
+    logger.debug('Verificando %s tarefas recorrentes', len(recurring_tasks))
     for task in recurring_tasks:
         if date:
             dates_to_check = [date]
-            print(f"[DEBUG] Verificando data específica: {date} para tarefa {task.id}")
+            logger.debug('Verificando data específica: %s para tarefa %s', date, task.id, extra=SAMPLED)
         elif date_range:
             # Gerar todas as datas no intervalo
             dates_to_check = []
@@ -281,12 +498,12 @@ def count_total_tasks(user, date=None, date_range=None):
             while current_date <= date_range[1]:
                 dates_to_check.append(current_date)
                 current_date += timedelta(days=1)
-            print(f"[DEBUG] Verificando intervalo de {len(dates_to_check)} dias para tarefa {task.id}")
+            logger.debug('Verificando intervalo de %s dias para tarefa %s', len(dates_to_check), task.id, extra=SAMPLED)
         else:
             # Se nenhuma data for especificada, use a data atual
             today_date = timezone.localdate()
             dates_to_check = [today_date]
-            print(f"[DEBUG] Verificando hoje {today_date} para tarefa {task.id}")
+            logger.debug('Verificando hoje %s para tarefa %s', today_date, task.id, extra=SAMPLED)
         
         # Para cada data, verificar se a tarefa se aplica
         for check_date in dates_to_check:
@@ -320,10 +537,10 @@ def count_total_tasks(user, date=None, date_range=None):
             
             # Se a tarefa se aplica a esta data, adicionar à contagem
             if applies:
-                print(f"[DEBUG] Tarefa {task.id} ({task.title}) se aplica a data {check_date} - padrão: {task.repeat_pattern}")
+                logger.debug('Tarefa %s (%s) se aplica a data %s - padrão: %s', task.id, task.title, check_date, task.repeat_pattern, extra=SAMPLED)
                 try:
                     occurrence = TaskOccurrence.objects.get(task=task, date=check_date)
-                    print(f"[DEBUG] Encontrou ocorrência - status: {occurrence.status}")
+                    logger.debug('Encontrou ocorrência - status: %s', occurrence.status, extra=SAMPLED)
                     if occurrence.status != 'skipped':
                         counts['total'] += 1
                         counts[occurrence.status] += 1
@@ -332,7 +549,7 @@ def count_total_tasks(user, date=None, date_range=None):
                         if task.priority >= 3:
                             counts['high_priority'] += 1
                 except TaskOccurrence.DoesNotExist:
-                    print(f"[DEBUG] Ocorrência não encontrada - adicionando como pendente")
+                    logger.debug('Ocorrência não encontrada - adicionando como pendente', extra=SAMPLED)
                     counts['total'] += 1
                     counts['pending'] += 1
                     
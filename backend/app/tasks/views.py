@@ -1,22 +1,62 @@
+import logging
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from collections import namedtuple
 from datetime import date, datetime, timedelta
+from types import SimpleNamespace
 from django.db.models import Q, Sum, Count, Case, When, IntegerField, F
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.urls import reverse
+from django.views import View
+from core.instrumentation import measure_serialization
+from core.streaming import streaming_content
 
-from .utils import check_task_overlap, count_tasks_with_recurrences, count_total_tasks
-from .services import EnergyMatchService
+from .utils import (
+    check_task_overlap, count_tasks_with_recurrences, count_total_tasks,
+    recurring_task_applies, user_cache_key
+)
+from .services import EnergyMatchService, GoalProgressService, DashboardService, TaskCloneService
+from .archive import AccountArchiveImporter, ArchiveError, write_account_archive
+from .batch import InvalidBatch, parse_batch, run_batch
+from .bulk import InvalidBulkRequest, TaskBulkProcessor, parse_operations
+from .metrics import RECURRENCE_EXPANSION
+from .export import EXPORT_DATASETS, EXPORT_FORMATS, export_rows, stream_export
+from .ics import ICSImporter, cache_feed, feed_etag, feed_last_modified, get_calendar_token, get_feed_user_id, iter_calendar
+from .pagination import TaskCursorPagination
+from .renderers import CalendarV2Renderer
+from .row_serializers import RowSerializer
+from .search import FullTextSearchFilter, full_text_search
+from .suggestions import get_title_suggestion_index
+from .sync import InvalidCursor, collect_changes, decode_cursor
 from .models import Task, Category, Goal, TaskOccurrence, UserPreference, EnergyProfile
 from .serializers import (
     TaskSerializer, CategorySerializer, GoalSerializer, 
     TaskOccurrenceSerializer, UserPreferenceSerializer,
-    TaskReportSerializer, GoalReportSerializer, DashboardSerializer,
-    EnergyProfileSerializer
+    TaskReportSerializer, GoalReportSerializer, DashboardSerializer, CloneRangeSerializer, ICSImportSerializer,
+    ExportSerializer, EnergyProfileSerializer, GoalTimelineSerializer
+)
+
+logger = logging.getLogger(__name__)
+
+# Entrada do calendário antes da serialização (kind: 'task', 'occurrence' ou 'generated')
+CalendarItem = namedtuple(
+    'CalendarItem', 'task_id date start_time status occurrence_id actual_value notes kind'
 )
 
+# Renderers das visões de calendário: os padrões mais o formato compacto v2
+CALENDAR_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, CalendarV2Renderer]
+
 
 class CategoryViewSet(viewsets.ModelViewSet):
     """API para gerenciar categorias"""
@@ -32,13 +72,14 @@ class GoalViewSet(viewsets.ModelViewSet):
     """API para gerenciar metas"""
     serializer_class = GoalSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend]
+    filter_backends = [FullTextSearchFilter, DjangoFilterBackend]
     search_fields = ['title', 'description']
     filterset_fields = ['category', 'period', 'is_completed']
 
     def get_queryset(self):
         """Retorna apenas metas do usuário atual"""
-        return Goal.objects.filter(user=self.request.user)
+        relations = self.get_serializer().required_relations()
+        return Goal.objects.filter(user=self.request.user).with_relations(relations)
     
     def perform_create(self, serializer):
         """Salva a meta atribuindo o usuário atual"""
@@ -48,8 +89,20 @@ class GoalViewSet(viewsets.ModelViewSet):
     def related_tasks(self, request, pk=None):
         """Retorna tarefas relacionadas a uma meta específica"""
         goal = self.get_object()
-        tasks = Task.objects.filter(goal=goal)
-        serializer = TaskSerializer(tasks, many=True)
+        context = self.get_serializer_context()
+        relations = TaskSerializer(context=context).required_relations()
+        tasks = Task.objects.filter(goal=goal).with_relations(relations)
+        
+        paginator = TaskCursorPagination()
+        page = paginator.paginate_queryset(tasks, request, view=self)
+        serializer = TaskSerializer(page, many=True, context=context)
+        return paginator.get_paginated_response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def timeline(self, request, pk=None):
+        """Retorna o progresso acumulado por dia e a previsão de conclusão da meta"""
+        goal = self.get_object()
+        serializer = GoalTimelineSerializer(GoalProgressService.get_timeline(goal))
         return Response(serializer.data)
         
     @action(detail=True, methods=['post'])
@@ -119,12 +172,13 @@ class GoalViewSet(viewsets.ModelViewSet):
         
         # 2. Categorias
         category_data = []
+        categories = Category.objects.in_bulk(list(counts['by_category'].keys()))
         for category_id, category_counts in counts['by_category'].items():
-            try:
-                category = Category.objects.get(id=category_id)
+            category = categories.get(category_id)
+            if category:
                 category_name = category.name
                 category_color = category.color
-            except Category.DoesNotExist:
+            else:
                 category_name = "Desconhecida"
                 category_color = "#CCCCCC"
             
@@ -182,8 +236,8 @@ def task_counts_by_day_formatter(by_day_dict, user=None):
     
     # Obter hoje para garantir que está incluído
     today = datetime.now().date().isoformat()
-    print(f"[DEBUG] Formatando contagens por dia - hoje é {today}")
-    print(f"[DEBUG] Dicionário by_day possui {len(by_day_dict)} dias: {list(by_day_dict.keys())}")
+    logger.debug('Formatando contagens por dia - hoje é %s', today)
+    logger.debug('Dicionário by_day possui %s dias: %s', len(by_day_dict), by_day_dict.keys())
     
     # Certificar-se de que temos todas as datas no intervalo
     # Caso algumas datas não tenham tarefas
@@ -194,7 +248,7 @@ def task_counts_by_day_formatter(by_day_dict, user=None):
         
         # Se hoje não está incluído, adicionar
         if today not in by_day_dict:
-            print(f"[DEBUG] Hoje ({today}) não estava nas contagens - adicionando")
+            logger.debug('Hoje (%s) não estava nas contagens - adicionando', today)
             # Acessa as contagens diretas de hoje
             from .utils import count_total_tasks
             from django.utils import timezone
@@ -208,7 +262,7 @@ def task_counts_by_day_formatter(by_day_dict, user=None):
             else:
                 # Se não houver usuário, usar valores vazios
                 by_day_dict[today] = {'total': 0, 'completed': 0}
-            print(f"[DEBUG] Contagens calculadas para hoje: {by_day_dict[today]}")
+            logger.debug('Contagens calculadas para hoje: %s', by_day_dict[today])
             end_date = max(end_date, datetime.now())
         
         # Preencher dias faltantes no intervalo
@@ -396,15 +450,225 @@ class TaskViewSet(viewsets.ModelViewSet):
     """API para gerenciar tarefas"""
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter]
+    # A listagem é paginada por cursor na ordem fixa (date, start_time, id)
+    pagination_class = TaskCursorPagination
+    filter_backends = [FullTextSearchFilter, DjangoFilterBackend]
     search_fields = ['title', 'description', 'notes']
     filterset_fields = ['category', 'date', 'priority', 'status', 'repeat_pattern']
-    ordering_fields = ['date', 'start_time', 'priority', 'created_at']
-    ordering = ['date', 'start_time']
+    # Marcadores das entradas do calendário, mantidos mesmo com ?fields=
+    calendar_flags = ('is_occurrence', 'occurrence_id', 'is_generated')
+    # Campos que o formato v2 tira do corpo da tarefa (variam por data, vão em
+    # `categories` ou são sempre o usuário autenticado). As notas ficam: são as
+    # da tarefa; as das ocorrências registradas vão em `occurrence_notes`
+    compact_excluded_fields = (
+        'id', 'user', 'date', 'status', 'actual_value',
+        'category_name', 'category_icon', 'category_color',
+    )
 
     def get_queryset(self):
         """Retorna apenas tarefas do usuário atual"""
-        return Task.objects.filter(user=self.request.user)
+        return Task.objects.filter(user=self.request.user).with_relations(self.get_relations())
+    
+    def get_relations(self):
+        """Relações lidas pelos campos pedidos em ?fields= / ?omit= (todas, sem seleção)"""
+        if not hasattr(self, '_relations'):
+            self._relations = self.get_serializer().required_relations()
+        return self._relations
+    
+    def get_occurrence_queryset(self):
+        """Ocorrências do usuário, com a tarefa e as relações que o TaskSerializer vai ler"""
+        relations = ['task', *[f'task__{relation}' for relation in self.get_relations()]]
+        return TaskOccurrence.objects.filter(task__user=self.request.user).with_relations(relations)
+    
+    def calendar_entry(self, serializer, task, **values):
+        """
+        Serializa a tarefa para as visões de calendário e aplica `values` (dados da
+        ocorrência/data gerada), respeitando os campos pedidos em ?fields= / ?omit=
+        """
+        return self.apply_calendar_values(serializer, serializer.to_representation(task), values)
+    
+    def apply_calendar_values(self, serializer, data, values):
+        """Aplica `values` ao dict da tarefa, respeitando os campos pedidos em ?fields= / ?omit="""
+        for key, value in values.items():
+            if key in self.calendar_flags or serializer.keeps_field(key):
+                data[key] = value
+        return data
+    
+    def collect_calendar_range(self, serializer, start_date, end_date, status_list=None):
+        """
+        Lê as entradas do calendário (week/month) entre start_date e end_date.
+        
+        Tudo é lido com QuerySet.values() e serializado pelo RowSerializer, sem
+        instâncias de modelo nem um serializer por item; cada tarefa é serializada
+        uma única vez, mesmo que apareça em várias datas.
+        
+        Returns:
+            (tasks, items): `tasks` mapeia o id ao dict da tarefa (saída do
+            TaskSerializer) e `items` é a lista de CalendarItem com as tarefas avulsas,
+            depois as ocorrências registradas e por fim as ocorrências geradas para as
+            tarefas recorrentes
+        """
+        task_rows = RowSerializer(serializer)
+        occurrence_task_rows = RowSerializer(serializer, prefix='task__')
+        tasks = {}
+        items = []
+        
+        # 1. Tarefas normais (não recorrentes) do período
+        normal_tasks = self.get_queryset().filter(
+            date__range=[start_date, end_date],
+            repeat_pattern='none'
+        )
+        # 2. Ocorrências registradas para tarefas recorrentes
+        task_occurrences = self.get_occurrence_queryset().filter(date__range=[start_date, end_date])
+        
+        if status_list:
+            normal_tasks = normal_tasks.filter(status__in=status_list)
+            task_occurrences = task_occurrences.filter(status__in=status_list)
+        
+        task_fields = ('id', 'date', 'start_time', 'status', 'actual_value', 'notes')
+        for row in task_rows.values(normal_tasks, *task_fields):
+            tasks[row['id']] = task_rows.to_representation(row)
+            items.append(CalendarItem(
+                row['id'], row['date'], row['start_time'], row['status'],
+                None, row['actual_value'], row['notes'], 'task'
+            ))
+        
+        # (tarefa, data) já representadas por uma ocorrência registrada
+        occurrence_keys = set()
+        occurrence_rows = occurrence_task_rows.values(
+            task_occurrences, 'id', 'task', 'task__start_time', 'date', 'status', 'actual_value', 'notes'
+        )
+        for row in occurrence_rows:
+            if row['task'] not in tasks:
+                tasks[row['task']] = occurrence_task_rows.to_representation(row)
+            items.append(CalendarItem(
+                row['task'], row['date'], row['task__start_time'], row['status'],
+                row['id'], row['actual_value'], row['notes'], 'occurrence'
+            ))
+            occurrence_keys.add((row['task'], row['date']))
+        
+        # 3. Ocorrências geradas para as tarefas recorrentes ativas no período
+        # (tarefas geradas são sempre 'pending')
+        if status_list and 'pending' not in status_list:
+            return tasks, items
+        
+        recurring_tasks = self.get_queryset().exclude(repeat_pattern='none').filter(
+            Q(repeat_end_date__isnull=True) | Q(repeat_end_date__gte=start_date),
+            date__lte=end_date
+        )
+        recurrence_fields = ('id', 'date', 'start_time', 'repeat_pattern', 'repeat_end_date', 'repeat_days')
+        examined = 0
+        for row in task_rows.values(recurring_tasks, *recurrence_fields):
+            task = SimpleNamespace(**{field: row[field] for field in recurrence_fields})
+            
+            current_date = max(start_date, task.date)
+            examined += max(0, (end_date - current_date).days + 1)
+            while current_date <= end_date:
+                if recurring_task_applies(task, current_date) and (task.id, current_date) not in occurrence_keys:
+                    if task.id not in tasks:
+                        tasks[task.id] = task_rows.to_representation(row)
+                    items.append(CalendarItem(
+                        task.id, current_date, task.start_time, 'pending', None, None, None, 'generated'
+                    ))
+                current_date += timedelta(days=1)
+        
+        RECURRENCE_EXPANSION.observe(examined, 'calendar')
+        return tasks, items
+    
+    @measure_serialization
+    def render_calendar_range(self, start_date, end_date, status_list=None):
+        """
+        Monta as entradas do calendário (week/month) no formato v1: um dict completo
+        do TaskSerializer por data, com os dados da ocorrência aplicados.
+        """
+        serializer = self.get_serializer()
+        tasks, items = self.collect_calendar_range(serializer, start_date, end_date, status_list)
+        
+        entries = []
+        for item in items:
+            if item.kind == 'task':
+                entries.append(tasks[item.task_id])
+            elif item.kind == 'occurrence':
+                entries.append(self.apply_calendar_values(serializer, dict(tasks[item.task_id]), {
+                    'date': item.date.isoformat(),
+                    'status': item.status,
+                    'actual_value': item.actual_value,
+                    'notes': item.notes,
+                    'is_occurrence': True,
+                    'occurrence_id': item.occurrence_id,
+                }))
+            else:
+                entries.append(self.apply_calendar_values(serializer, dict(tasks[item.task_id]), {
+                    'date': item.date.isoformat(),
+                    'is_generated': True,
+                }))
+        
+        return entries
+    
+    @measure_serialization
+    def render_compact_calendar(self, start_date, end_date, status_list=None, sort=False):
+        """
+        Monta as entradas do calendário (week/month) no formato compacto v2.
+        
+        Cada tarefa aparece uma única vez em `tasks` (sem os campos que variam por
+        data nem os dados da categoria, que ficam em `categories`) e cada entrada do
+        calendário vira uma tupla em `items`:
+        [task_id, dias desde start_date, código do status, occurrence_id, actual_value].
+        O código do status é a posição em `statuses`; occurrence_id é nulo para
+        tarefas avulsas e ocorrências geradas.
+        
+        As notas de tarefas avulsas e ocorrências geradas são as `notes` da tarefa;
+        as de uma ocorrência registrada ficam em `occurrence_notes`
+        ({occurrence_id: notas}, só as preenchidas; ausente = sem notas).
+        """
+        serializer = self.get_serializer()
+        tasks, items = self.collect_calendar_range(serializer, start_date, end_date, status_list)
+        
+        if sort:
+            items.sort(key=lambda item: (item.date, item.start_time))
+        
+        statuses = [status for status, _ in Task.STATUS_CHOICES]
+        status_codes = {status: code for code, status in enumerate(statuses)}
+        
+        categories = {}
+        compact_tasks = {}
+        for task_id, data in tasks.items():
+            category = {
+                key[len('category_'):]: data[key]
+                for key in ('category_name', 'category_icon', 'category_color') if key in data
+            }
+            if category and 'category' in data:
+                categories[data['category']] = category
+            compact_tasks[task_id] = {
+                key: value for key, value in data.items() if key not in self.compact_excluded_fields
+            }
+        
+        occurrence_notes = {}
+        if serializer.keeps_field('notes'):
+            occurrence_notes = {
+                item.occurrence_id: item.notes
+                for item in items if item.kind == 'occurrence' and item.notes
+            }
+        
+        return {
+            'version': 2,
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'statuses': statuses,
+            'categories': categories,
+            'tasks': compact_tasks,
+            'occurrence_notes': occurrence_notes,
+            'items': [
+                [
+                    item.task_id,
+                    (item.date - start_date).days,
+                    status_codes.get(item.status),
+                    item.occurrence_id,
+                    item.actual_value,
+                ]
+                for item in items
+            ],
+        }
     
     def perform_create(self, serializer):
         """Salva a tarefa atribuindo o usuário atual"""
@@ -422,7 +686,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 goal = instance.goal
                 goal.current_value = max(0, goal.current_value - instance.actual_value)
                 goal.update_progress()
-                print(f"[DEBUG] Ajustando meta ao excluir tarefa: Subtraindo {instance.actual_value} da meta {goal.id}")
+                logger.debug('Ajustando meta ao excluir tarefa: Subtraindo %s da meta %s', instance.actual_value, goal.id)
             
             # Excluir a tarefa
             self.perform_destroy(instance)
@@ -450,6 +714,13 @@ class TaskViewSet(viewsets.ModelViewSet):
         # Obter tarefas recorrentes que se aplicam a esta data
         recurring_tasks = []
         recurring_query = self.get_queryset().exclude(repeat_pattern='none')
+        serializer = self.get_serializer()
+        
+        # Ocorrências já registradas para esta data, indexadas pela tarefa
+        occurrences_by_task = {
+            occurrence.task_id: occurrence
+            for occurrence in TaskOccurrence.objects.filter(task__user=request.user, date=date)
+        }
         
         for task in recurring_query:
             # Verificar se a data está dentro do período de recorrência
@@ -477,25 +748,25 @@ class TaskViewSet(viewsets.ModelViewSet):
                 
                 if applies:
                     # Verificar se já existe uma ocorrência para esta data
-                    try:
-                        occurrence = TaskOccurrence.objects.get(task=task, date=date)
+                    occurrence = occurrences_by_task.get(task.id)
+                    if occurrence:
                         # Usar os dados da ocorrência existente
-                        task_data = self.get_serializer(task).data
-                        task_data.update({
-                            'status': occurrence.status,
-                            'actual_value': occurrence.actual_value,
-                            'notes': occurrence.notes,
-                            'is_occurrence': True,
-                            'occurrence_id': occurrence.id
-                        })
+                        task_data = self.calendar_entry(
+                            serializer, task,
+                            status=occurrence.status,
+                            actual_value=occurrence.actual_value,
+                            notes=occurrence.notes,
+                            is_occurrence=True,
+                            occurrence_id=occurrence.id
+                        )
                         recurring_tasks.append(task_data)
-                    except TaskOccurrence.DoesNotExist:
+                    else:
                         # Criar uma representação virtual (sem salvar no banco)
-                        task_data = self.get_serializer(task).data
-                        task_data.update({
-                            'is_occurrence': True,
-                            'occurrence_id': None
-                        })
+                        task_data = self.calendar_entry(
+                            serializer, task,
+                            is_occurrence=True,
+                            occurrence_id=None
+                        )
                         recurring_tasks.append(task_data)
         
         # Combinar tarefas não recorrentes e recorrentes
@@ -503,6 +774,37 @@ class TaskViewSet(viewsets.ModelViewSet):
         
         return Response(all_tasks)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Retorna as tarefas mais relevantes para a busca textual (?q=), ordenadas por relevância"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({'error': 'Limite inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not query.strip():
+            return Response([])
+        
+        tasks = full_text_search(self.get_queryset(), query)[:limit]
+        serializer = self.get_serializer(tasks, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Sugere títulos já usados que começam com ?q=, com a categoria, duração e energia mais comuns"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 8)), 20)
+        except ValueError:
+            return Response({'error': 'Limite inválido'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not query.strip():
+            return Response([])
+
+        index = get_title_suggestion_index(request.user)
+        return Response(index.suggest(query, limit))
+
     @action(detail=False, methods=['get'])
     def today(self, request):
         """Retorna tarefas para o dia atual, incluindo ocorrências geradas para tarefas recorrentes"""
@@ -517,7 +819,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         else:
             selected_date = timezone.localdate()
         
-        print(f"[DEBUG] Buscando tarefas para o dia: {selected_date}")
+        logger.debug('Buscando tarefas para o dia: %s', selected_date)
         
         # 1. Obter tarefas normais (não recorrentes) para este dia
         normal_tasks = self.get_queryset().filter(
@@ -526,10 +828,7 @@ class TaskViewSet(viewsets.ModelViewSet):
         )
         
         # 2. Obter ocorrências existentes para tarefas recorrentes
-        task_occurrences = TaskOccurrence.objects.filter(
-            date=selected_date,
-            task__user=request.user
-        ).select_related('task')
+        task_occurrences = self.get_occurrence_queryset().filter(date=selected_date)
         
         # Aplicar filtro de status (se fornecido)
         if status_filter:
@@ -537,18 +836,22 @@ class TaskViewSet(viewsets.ModelViewSet):
             normal_tasks = normal_tasks.filter(status__in=status_list)
             task_occurrences = task_occurrences.filter(status__in=status_list)
         
+        serializer = self.get_serializer()
         occurrence_tasks = []
+        # (tarefa, data) já representadas por uma ocorrência registrada
+        occurrence_keys = set()
         for occurrence in task_occurrences:
-            task_data = self.get_serializer(occurrence.task).data
-            task_data.update({
-                'date': occurrence.date.isoformat(),
-                'status': occurrence.status,
-                'actual_value': occurrence.actual_value,
-                'notes': occurrence.notes,
-                'is_occurrence': True,
-                'occurrence_id': occurrence.id
-            })
+            task_data = self.calendar_entry(
+                serializer, occurrence.task,
+                date=occurrence.date.isoformat(),
+                status=occurrence.status,
+                actual_value=occurrence.actual_value,
+                notes=occurrence.notes,
+                is_occurrence=True,
+                occurrence_id=occurrence.id
+            )
             occurrence_tasks.append(task_data)
+            occurrence_keys.add((occurrence.task_id, occurrence.date))
         
         # 3. Gerar tarefas recorrentes que ainda não têm ocorrências
         recurring_tasks = self.get_queryset().exclude(repeat_pattern='none')
@@ -591,23 +894,19 @@ class TaskViewSet(viewsets.ModelViewSet):
                     continue
                 
                 # Verificar se já existe uma ocorrência para esta data
-                occurrence_exists = any(
-                    o.get('date') == selected_date.isoformat() and o.get('id') == task.id
-                    for o in occurrence_tasks
-                )
+                occurrence_exists = (task.id, selected_date) in occurrence_keys
                 
                 # Aplicar filtro de status para tarefas geradas
                 if not occurrence_exists:
-                    task_data = self.get_serializer(task).data
-                    
                     # Se houver filtro de status, verificar se o status da tarefa gerada está na lista
                     if status_filter and 'pending' not in status_list:  # Tarefas geradas são sempre 'pending'
                         continue
                         
-                    task_data.update({
-                        'date': selected_date.isoformat(),
-                        'is_generated': True
-                    })
+                    task_data = self.calendar_entry(
+                        serializer, task,
+                        date=selected_date.isoformat(),
+                        is_generated=True
+                    )
                     generated_tasks.append(task_data)
         
         # Combinar todas as tarefas
@@ -616,11 +915,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         all_tasks.extend(generated_tasks)
         
         # Ordenar todas as tarefas por hora de início
-        all_tasks.sort(key=lambda x: x['start_time'])
+        all_tasks.sort(key=lambda x: x.get('start_time') or '')
         
         return Response(all_tasks)
     
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=CALENDAR_RENDERER_CLASSES)
     def week(self, request):
         """Retorna tarefas para a semana atual, incluindo ocorrências geradas para tarefas recorrentes"""
         today = timezone.localdate()
@@ -640,121 +939,24 @@ class TaskViewSet(viewsets.ModelViewSet):
             start_date = today - timedelta(days=today.weekday())  # Segunda-feira
             end_date = start_date + timedelta(days=6)  # Domingo
         
-        print(f"[DEBUG] Buscando tarefas para a semana: {start_date} a {end_date}")
+        logger.debug('Buscando tarefas para a semana: %s a %s', start_date, end_date)
         
         # Aplicar filtro de status (se fornecido)
         status_filter = request.query_params.get('status')
+        status_list = status_filter.split(',') if status_filter else None
         
-        # 1. Obter tarefas normais (não recorrentes) para esta semana
-        normal_tasks = self.get_queryset().filter(
-            date__range=[start_date, end_date],
-            repeat_pattern='none'
-        )
-        
-        if status_filter:
-            status_list = status_filter.split(',')
-            normal_tasks = normal_tasks.filter(status__in=status_list)
-        
-        # 2. Obter ocorrências existentes para tarefas recorrentes
-        task_occurrences = TaskOccurrence.objects.filter(
-            date__range=[start_date, end_date],
-            task__user=request.user
-        ).select_related('task')
-        
-        if status_filter:
-            task_occurrences = task_occurrences.filter(status__in=status_list)
-        
-        occurrence_tasks = []
-        for occurrence in task_occurrences:
-            task_data = self.get_serializer(occurrence.task).data
-            task_data.update({
-                'date': occurrence.date.isoformat(),
-                'status': occurrence.status,
-                'actual_value': occurrence.actual_value,
-                'notes': occurrence.notes,
-                'is_occurrence': True,
-                'occurrence_id': occurrence.id
-            })
-            occurrence_tasks.append(task_data)
-        
-        # 3. Gerar tarefas recorrentes que ainda não têm ocorrências
-        recurring_tasks = self.get_queryset().exclude(repeat_pattern='none')
-        
-        generated_tasks = []
-        for task in recurring_tasks:
-            # Não considerar se a data inicial é posterior ao fim da semana
-            if task.date > end_date:
-                continue
-            
-            # Não considerar se a data final da recorrência é anterior ao início da semana
-            if task.repeat_end_date and task.repeat_end_date < start_date:
-                continue
-            
-            # Para cada dia da semana
-            current_date = start_date
-            while current_date <= end_date:
-                # Verificar se a tarefa se aplica a este dia
-                weekday = current_date.weekday()  # 0=Segunda, 6=Domingo
-                
-                applies = False
-                if task.repeat_pattern == 'daily':
-                    applies = True
-                elif task.repeat_pattern == 'weekdays' and weekday < 5:
-                    applies = True
-                elif task.repeat_pattern == 'weekends' and weekday >= 5:
-                    applies = True
-                elif task.repeat_pattern == 'weekly' and task.date.weekday() == weekday:
-                    # Verificar se a semana é correta (a cada X semanas)
-                    days_diff = (current_date - task.date).days
-                    weeks_diff = days_diff // 7
-                    applies = weeks_diff % 1 == 0  # Repetir a cada semana
-                elif task.repeat_pattern == 'monthly' and task.date.day == current_date.day:
-                    applies = True
-                elif task.repeat_pattern == 'custom' and task.repeat_days:
-                    days = [int(d) for d in task.repeat_days.split(',')]
-                    applies = weekday in days
-                
-                # Se a tarefa se aplica e a data é válida
-                if applies and current_date >= task.date:
-                    if task.repeat_end_date and current_date > task.repeat_end_date:
-                        # Não aplicar se já passou da data final
-                        current_date += timedelta(days=1)
-                        continue
-                    
-                    # Verificar se já existe uma ocorrência para esta data
-                    # (se já foi incluída acima)
-                    occurrence_exists = any(
-                        o.get('date') == current_date.isoformat() and o.get('id') == task.id
-                        for o in occurrence_tasks
-                    )
-                    
-                    if not occurrence_exists:
-                        # Se houver filtro de status, verificar se o status padrão ('pending') está na lista
-                        if status_filter and 'pending' not in status_filter.split(','):
-                            current_date += timedelta(days=1)
-                            continue
-                            
-                        task_data = self.get_serializer(task).data
-                        task_data.update({
-                            'date': current_date.isoformat(),
-                            'is_generated': True
-                        })
-                        generated_tasks.append(task_data)
-                
-                current_date += timedelta(days=1)
+        if request.accepted_renderer.format == CalendarV2Renderer.format:
+            return Response(self.render_compact_calendar(start_date, end_date, status_list, sort=True))
         
-        # Combinar todas as tarefas
-        all_tasks = list(self.get_serializer(normal_tasks, many=True).data)
-        all_tasks.extend(occurrence_tasks)
-        all_tasks.extend(generated_tasks)
+        all_tasks = self.render_calendar_range(start_date, end_date, status_list)
         
         # Ordenar tarefas primeiramente por data e depois por hora de início
-        all_tasks.sort(key=lambda x: (x['date'], x['start_time']))
+        all_tasks.sort(key=lambda x: (x.get('date') or '', x.get('start_time') or ''))
         
         return Response(all_tasks)
 
     # Modifique de forma semelhante o método month:
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=CALENDAR_RENDERER_CLASSES)
     def month(self, request):
         """Retorna tarefas para o mês, incluindo ocorrências geradas para tarefas recorrentes"""
         today = timezone.localdate()
@@ -770,98 +972,12 @@ class TaskViewSet(viewsets.ModelViewSet):
         else:
             end_date = date(year, month + 1, 1) - timedelta(days=1)
         
-        print(f"[DEBUG] Buscando tarefas para o mês: {start_date} a {end_date}")
-        
-        # Usar a mesma lógica da função week, adaptada para o período do mês
-        # 1. Obter tarefas normais (não recorrentes) para este mês
-        normal_tasks = self.get_queryset().filter(
-            date__range=[start_date, end_date],
-            repeat_pattern='none'
-        )
-        
-        # 2. Obter ocorrências existentes para tarefas recorrentes
-        task_occurrences = TaskOccurrence.objects.filter(
-            date__range=[start_date, end_date],
-            task__user=request.user
-        ).select_related('task')
-        
-        occurrence_tasks = []
-        for occurrence in task_occurrences:
-            task_data = self.get_serializer(occurrence.task).data
-            task_data.update({
-                'date': occurrence.date.isoformat(),
-                'status': occurrence.status,
-                'actual_value': occurrence.actual_value,
-                'notes': occurrence.notes,
-                'is_occurrence': True,
-                'occurrence_id': occurrence.id
-            })
-            occurrence_tasks.append(task_data)
+        logger.debug('Buscando tarefas para o mês: %s a %s', start_date, end_date)
         
-        # 3. Gerar tarefas recorrentes que ainda não têm ocorrências
-        recurring_tasks = self.get_queryset().exclude(repeat_pattern='none')
+        if request.accepted_renderer.format == CalendarV2Renderer.format:
+            return Response(self.render_compact_calendar(start_date, end_date))
         
-        generated_tasks = []
-        for task in recurring_tasks:
-            # Não considerar se a data inicial é posterior ao fim do mês
-            if task.date > end_date:
-                continue
-            
-            # Não considerar se a data final da recorrência é anterior ao início do mês
-            if task.repeat_end_date and task.repeat_end_date < start_date:
-                continue
-            
-            # Para cada dia do mês
-            current_date = start_date
-            while current_date <= end_date:
-                # Verificar se a tarefa se aplica a este dia (mesma lógica da função week)
-                weekday = current_date.weekday()
-                
-                applies = False
-                if task.repeat_pattern == 'daily':
-                    applies = True
-                elif task.repeat_pattern == 'weekdays' and weekday < 5:
-                    applies = True
-                elif task.repeat_pattern == 'weekends' and weekday >= 5:
-                    applies = True
-                elif task.repeat_pattern == 'weekly' and task.date.weekday() == weekday:
-                    # Verificar se a semana é correta (a cada X semanas)
-                    days_diff = (current_date - task.date).days
-                    weeks_diff = days_diff // 7
-                    applies = weeks_diff % 1 == 0  # Repetir a cada semana
-                elif task.repeat_pattern == 'monthly' and task.date.day == current_date.day:
-                    applies = True
-                elif task.repeat_pattern == 'custom' and task.repeat_days:
-                    days = [int(d) for d in task.repeat_days.split(',')]
-                    applies = weekday in days
-                
-                # Se a tarefa se aplica e a data é válida
-                if applies and current_date >= task.date:
-                    if task.repeat_end_date and current_date > task.repeat_end_date:
-                        # Não aplicar se já passou da data final
-                        current_date += timedelta(days=1)
-                        continue
-                    
-                    # Verificar se já existe uma ocorrência para esta data
-                    occurrence_exists = any(
-                        o.get('date') == current_date.isoformat() and o.get('id') == task.id
-                        for o in occurrence_tasks
-                    )
-                    
-                    if not occurrence_exists:
-                        task_data = self.get_serializer(task).data
-                        task_data.update({
-                            'date': current_date.isoformat(),
-                            'is_generated': True
-                        })
-                        generated_tasks.append(task_data)
-                
-                current_date += timedelta(days=1)
-        
-        # Combinar todas as tarefas
-        all_tasks = list(self.get_serializer(normal_tasks, many=True).data)
-        all_tasks.extend(occurrence_tasks)
-        all_tasks.extend(generated_tasks)
+        all_tasks = self.render_calendar_range(start_date, end_date)
         
         return Response(all_tasks)
     
@@ -892,11 +1008,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 occurrence.notes = notes
                 occurrence.save()
             
-            # Atualizar meta associada se existir
-            if task.goal and actual_value:
-                task.goal.current_value += float(actual_value)
-                task.goal.update_progress()
-            
+            # A meta associada é atualizada por TaskOccurrence.save()
             serializer = TaskOccurrenceSerializer(occurrence)
             return Response(serializer.data)
         else:
@@ -906,11 +1018,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             task.notes = notes or task.notes
             task.save()
             
-            # Atualizar meta associada se existir
-            if task.goal and actual_value:
-                task.goal.current_value += float(actual_value)
-                task.goal.update_progress()
-            
+            # A meta associada é atualizada por Task.save() na mudança para 'completed'
             serializer = self.get_serializer(task)
             return Response(serializer.data)
     
@@ -962,71 +1070,90 @@ class TaskViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
-        """Retorna dados consolidados para o dashboard"""
-        # Tarefas hoje
-        today = timezone.localdate()
-        tasks_today = self.get_queryset().filter(date=today)
-        
-        # Tarefas da semana
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=6)
-        tasks_week = self.get_queryset().filter(date__range=[start_of_week, end_of_week])
-        
-        # Progresso das metas
-        goals = Goal.objects.filter(user=request.user)
-        active_goals = goals.filter(end_date__gte=today, is_completed=False)
-        
-        
-        # Verificar utilizando as novas funções depois
-        # today_stats = count_total_tasks(request.user, date=timezone.localdate())
-        # week_stats = count_total_tasks(request.user, date_range=(start_of_week, end_of_week))
-        
-        # serializer = DashboardSerializer({
-        #     'today': today_stats,
-        #     'week': week_stats,
-        #     'goals': {
-        #         'total': goals.count(),
-        #         'active': active_goals.count(),
-        #         'completed': goals.filter(is_completed=True).count(),
-        #         'close_to_deadline': active_goals.filter(end_date__lte=today + timedelta(days=7)).count(),
-        #     },
-        #     'completion_trend': list(task_counts_by_day_formatter(trend_counts['by_day'], request.user)),
-        # })
-        
-        # Estatísticas de conclusão
-        tasks_last_30_days = self.get_queryset().filter(
-            date__range=[today - timedelta(days=30), today]
+        """Retorna dados consolidados para o dashboard (em cache por usuário)"""
+        cache_key = user_cache_key(request.user.id, 'dashboard', timezone.localdate().isoformat())
+        data = cache.get(cache_key)
+        
+        if data is None:
+            serializer = DashboardSerializer(DashboardService.get_dashboard(request.user))
+            data = dict(serializer.data)
+            cache.set(cache_key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+        
+        return Response(data)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Cria, atualiza, muda o status e exclui várias tarefas/ocorrências em uma transação.
+        
+        Corpo: {"operations": [{"action": "status", "id": 1, "status": "completed"}, ...]}
+        (ver TaskBulkProcessor). Responde com um resultado por operação, na mesma
+        ordem; se alguma falhar (400, 404 ou 409) nada é gravado e a resposta é 400.
+        Aceita ?ignore_overlap=true como o POST /api/tasks/.
+        """
+        try:
+            operations = parse_operations(request.data)
+        except InvalidBulkRequest as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        ignore_overlap = request.query_params.get('ignore_overlap', 'false').lower() == 'true'
+        processor = TaskBulkProcessor(
+            request.user, operations, context=self.get_serializer_context(), ignore_overlap=ignore_overlap
         )
+        applied, results = processor.run()
         
-        completion_by_day = tasks_last_30_days.values('date').annotate(
-            total=Count('id'),
-            completed=Sum(Case(When(status='completed', then=1), default=0, output_field=IntegerField())),
-            rate=Sum(Case(When(status='completed', then=1), default=0, output_field=IntegerField())) * 100.0 / Count('id')
-        ).order_by('date')
+        return Response(
+            {'results': results},
+            status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+        )
+    
+    @action(detail=False, methods=['post'])
+    def clone_range(self, request):
+        """
+        Copia as tarefas avulsas de um período para outro ("copiar semana/dia").
         
-        serializer = DashboardSerializer({
-            'today': {
-                'total': tasks_today.count(),
-                'completed': tasks_today.filter(status='completed').count(),
-                'in_progress': tasks_today.filter(status='in_progress').count(),
-                'pending': tasks_today.filter(status='pending').count(),
-                'high_priority': tasks_today.filter(priority__gte=3).count(),
-            },
-            'week': {
-                'total': tasks_week.count(),
-                'completed': tasks_week.filter(status='completed').count(),
-                'completion_rate': tasks_week.filter(status='completed').count() * 100.0 / tasks_week.count() if tasks_week.count() > 0 else 0,
-            },
-            'goals': {
-                'total': goals.count(),
-                'active': active_goals.count(),
-                'completed': goals.filter(is_completed=True).count(),
-                'close_to_deadline': active_goals.filter(end_date__lte=today + timedelta(days=7)).count(),
-            },
-            'completion_trend': list(completion_by_day),
-        })
+        Corpo: {"start_date": "2026-01-05", "end_date": "2026-01-11",
+        "target_date": "2026-01-12", "on_conflict": "skip", "dry_run": false}.
+        Com dry_run a resposta mostra as cópias e os conflitos sem gravar; com
+        on_conflict "fail" e algum conflito, nada é copiado e a resposta é 409.
+        """
+        params = CloneRangeSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        
+        result = TaskCloneService.clone_range(request.user, **params.validated_data)
+        data = {
+            'offset_days': result['offset_days'],
+            'dry_run': params.validated_data['dry_run'],
+            'tasks': self.get_serializer(result['tasks'], many=True).data,
+            'conflicts': result['conflicts'],
+        }
         
-        return Response(serializer.data)
+        if params.validated_data['on_conflict'] == 'fail' and result['conflicts']:
+            return Response(data, status=status.HTTP_409_CONFLICT)
+        return Response(data, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def import_ics(self, request):
+        """
+        Importa os eventos de um arquivo iCalendar (Google Agenda, Outlook...) como tarefas.
+        
+        Multipart com `file`, `default_category`, `category_map` (JSON opcional
+        {nome em CATEGORIES: id da categoria}) e `on_conflict` ('skip' ou 'allow').
+        O arquivo é lido em streaming e gravado em blocos (ver ICSImporter); a
+        resposta traz o resumo da importação.
+        """
+        params = ICSImportSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        
+        importer = ICSImporter(
+            request.user,
+            params.validated_data['default_category'],
+            category_map=params.validated_data['category_map'],
+            on_conflict=params.validated_data['on_conflict'],
+        )
+        summary = importer.run(params.validated_data['file'].chunks())
+        
+        return Response(summary, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
     
     @action(detail=True, methods=['get'])
     def occurrence(self, request, pk=None):
@@ -1042,9 +1169,12 @@ class TaskViewSet(viewsets.ModelViewSet):
         except ValueError:
             return Response({'error': 'Formato de data inválido'}, status=status.HTTP_400_BAD_REQUEST)
         
+        context = self.get_serializer_context()
+        relations = TaskOccurrenceSerializer(context=context).required_relations()
+        
         try:
-            occurrence = TaskOccurrence.objects.get(task=task, date=date)
-            serializer = TaskOccurrenceSerializer(occurrence)
+            occurrence = TaskOccurrence.objects.with_relations(relations).get(task=task, date=date)
+            serializer = TaskOccurrenceSerializer(occurrence, context=context)
             return Response(serializer.data)
         except TaskOccurrence.DoesNotExist:
             return Response({'error': 'Ocorrência não encontrada'}, status=status.HTTP_404_NOT_FOUND)
@@ -1088,7 +1218,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                         goal = task.goal
                         goal.current_value = max(0, goal.current_value - occurrence.actual_value)
                         goal.update_progress()
-                        print(f"[DEBUG] Ajustando meta ao excluir ocorrência: {occurrence.actual_value} removido")
+                        logger.debug('Ajustando meta ao excluir ocorrência: %s removido', occurrence.actual_value)
                     
                     occurrence.delete()
                     return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1120,7 +1250,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                             goal = task.goal
                             goal.current_value = max(0, goal.current_value - total_to_remove)
                             goal.update_progress()
-                            print(f"[DEBUG] Removendo {total_to_remove} da meta {goal.id} ao excluir tarefa recorrente")
+                            logger.debug('Removendo %s da meta %s ao excluir tarefa recorrente', total_to_remove, goal.id)
                     
                     # Se a data for a data inicial ou anterior, excluir a tarefa inteira
                     task.delete()
@@ -1143,7 +1273,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                             goal = task.goal
                             goal.current_value = max(0, goal.current_value - total_to_remove)
                             goal.update_progress()
-                            print(f"[DEBUG] Removendo {total_to_remove} da meta {goal.id} ao excluir ocorrências futuras")
+                            logger.debug('Removendo %s da meta %s ao excluir ocorrências futuras', total_to_remove, goal.id)
                     
                     TaskOccurrence.objects.filter(task=task, date__gte=date).delete()
                 
@@ -1168,7 +1298,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                         goal = task.goal
                         goal.current_value = max(0, goal.current_value - total_to_remove)
                         goal.update_progress()
-                        print(f"[DEBUG] Removendo {total_to_remove} da meta {goal.id} ao excluir todas as ocorrências")
+                        logger.debug('Removendo %s da meta %s ao excluir todas as ocorrências', total_to_remove, goal.id)
                 
                 task.delete()  # Isso já exclui todas as ocorrências devido a DELETE CASCADE
                 return Response(status=status.HTTP_204_NO_CONTENT)
@@ -1189,9 +1319,9 @@ class TaskViewSet(viewsets.ModelViewSet):
             notes = request.data.get('notes')
             actual_value = request.data.get('actual_value')
             
-            print(f"[DEBUG] Atualizando status da tarefa {task.id} para {status_value}")
-            print(f"[DEBUG] Valor recebido: {actual_value}, Tipo: {type(actual_value)}")
-            print(f"[DEBUG] Meta associada: {task.goal.id if task.goal else 'Nenhuma'}")
+            logger.debug('Atualizando status da tarefa %s para %s', task.id, status_value)
+            logger.debug('Valor recebido: %s, Tipo: %s', actual_value, type(actual_value))
+            logger.debug('Meta associada: %s', task.goal_id)
             
             if status_value not in dict(Task.STATUS_CHOICES):
                 return Response({'error': 'Status inválido'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1237,13 +1367,13 @@ class TaskViewSet(viewsets.ModelViewSet):
                             if diff != 0:
                                 task.goal.current_value += diff
                                 task.goal.update_progress()
-                                print(f"[DEBUG] Ajustando meta (ocorrência): {diff} na meta {task.goal.id}")
+                                logger.debug('Ajustando meta (ocorrência): %s na meta %s', diff, task.goal.id)
                         
                         # Caso 2: Estava concluída mas não está mais
                         elif was_already_completed and not is_completing:
                             task.goal.current_value = max(0, task.goal.current_value - old_occurrence_value)
                             task.goal.update_progress()
-                            print(f"[DEBUG] Removendo valor da meta (ocorrência): {old_occurrence_value} da meta {task.goal.id}")
+                            logger.debug('Removendo valor da meta (ocorrência): %s da meta %s', old_occurrence_value, task.goal.id)
                         
                         # Caso 3: Não estava concluída mas agora está
                         elif not was_already_completed and is_completing and actual_value is not None:
@@ -1257,7 +1387,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                             
                             task.goal.current_value += actual_value_float
                             task.goal.update_progress()
-                            print(f"[DEBUG] Adicionando valor à meta (ocorrência): {actual_value_float} à meta {task.goal.id}")
+                            logger.debug('Adicionando valor à meta (ocorrência): %s à meta %s', actual_value_float, task.goal.id)
                     
                     occurrence.save()
                 else:
@@ -1273,7 +1403,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                         
                         task.goal.current_value += actual_value_float
                         task.goal.update_progress()
-                        print(f"[DEBUG] Nova ocorrência concluída: {actual_value_float} adicionado à meta {task.goal.id}")
+                        logger.debug('Nova ocorrência concluída: %s adicionado à meta %s', actual_value_float, task.goal.id)
                 
                 serializer = TaskOccurrenceSerializer(occurrence)
                 return Response(serializer.data)
@@ -1295,13 +1425,13 @@ class TaskViewSet(viewsets.ModelViewSet):
                         if diff != 0:
                             task.goal.current_value += diff
                             task.goal.update_progress()
-                            print(f"[DEBUG] Ajustando meta: {diff} adicionado à meta {task.goal.id}")
+                            logger.debug('Ajustando meta: %s adicionado à meta %s', diff, task.goal.id)
                     
                     # Caso 2: Estava concluída mas não está mais
                     elif was_already_completed and not is_completing:
                         task.goal.current_value = max(0, task.goal.current_value - old_actual_value)
                         task.goal.update_progress()
-                        print(f"[DEBUG] Removendo valor da meta: {old_actual_value} removido da meta {task.goal.id}")
+                        logger.debug('Removendo valor da meta: %s removido da meta %s', old_actual_value, task.goal.id)
                     
                     # Caso 3: Não estava concluída mas agora está
                     elif not was_already_completed and is_completing and actual_value is not None:
@@ -1315,7 +1445,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                         
                         task.goal.current_value += actual_value_float
                         task.goal.update_progress()
-                        print(f"[DEBUG] Adicionando valor à meta: {actual_value_float} adicionado à meta {task.goal.id}")
+                        logger.debug('Adicionando valor à meta: %s adicionado à meta %s', actual_value_float, task.goal.id)
                 
                 task.save()
                 
@@ -1405,19 +1535,19 @@ class TaskViewSet(viewsets.ModelViewSet):
                             goal = instance.goal
                             goal.current_value += diff
                             goal.update_progress()
-                            print(f"[DEBUG] Ajustando meta: {diff} adicionado à meta {goal.id}. Valor atual: {goal.current_value}")
+                            logger.debug('Ajustando meta: %s adicionado à meta %s. Valor atual: %s', diff, goal.id, goal.current_value)
                     elif old_status == 'completed' and instance.status != 'completed':
                         # Tarefa não está mais concluída, remover valor
                         goal = instance.goal
                         goal.current_value = max(0, goal.current_value - old_actual_value)
                         goal.update_progress()
-                        print(f"[DEBUG] Removendo valor da meta: {old_actual_value} removido da meta {goal.id}")
+                        logger.debug('Removendo valor da meta: %s removido da meta %s', old_actual_value, goal.id)
                     elif old_status != 'completed' and instance.status == 'completed' and instance.actual_value:
                         # Tarefa agora está concluída, adicionar valor
                         goal = instance.goal
                         goal.current_value += instance.actual_value
                         goal.update_progress()
-                        print(f"[DEBUG] Adicionando valor à meta: {instance.actual_value} adicionado à meta {goal.id}")
+                        logger.debug('Adicionando valor à meta: %s adicionado à meta %s', instance.actual_value, goal.id)
                 # Caso 2: Mudou de meta
                 elif old_goal_id:
                     from .models import Goal
@@ -1426,13 +1556,13 @@ class TaskViewSet(viewsets.ModelViewSet):
                     if old_status == 'completed' and old_actual_value:
                         old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                         old_goal.update_progress()
-                        print(f"[DEBUG] Removendo da meta antiga: {old_actual_value} removido da meta {old_goal_id}")
+                        logger.debug('Removendo da meta antiga: %s removido da meta %s', old_actual_value, old_goal_id)
                     
                     # Adicionar à nova meta se está concluída
                     if instance.status == 'completed' and instance.actual_value:
                         instance.goal.current_value += instance.actual_value
                         instance.goal.update_progress()
-                        print(f"[DEBUG] Adicionando à nova meta: {instance.actual_value} adicionado à meta {instance.goal.id}")
+                        logger.debug('Adicionando à nova meta: %s adicionado à meta %s', instance.actual_value, instance.goal.id)
             
             # Se a tarefa tinha meta e agora não tem mais
             elif old_goal_id and old_status == 'completed' and old_actual_value:
@@ -1440,7 +1570,7 @@ class TaskViewSet(viewsets.ModelViewSet):
                 old_goal = Goal.objects.get(id=old_goal_id)
                 old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                 old_goal.update_progress()
-                print(f"[DEBUG] Removendo meta da tarefa: {old_actual_value} removido da meta {old_goal_id}")
+                logger.debug('Removendo meta da tarefa: %s removido da meta %s', old_actual_value, old_goal_id)
             
             return Response(serializer.data)
     
@@ -1465,6 +1595,11 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
     
     def get_object(self):
         """Obtém ou cria um perfil de energia para o usuário atual"""
+        try:
+            return self.request.user.energy_profile
+        except EnergyProfile.DoesNotExist:
+            pass
+        
         profile, created = EnergyProfile.objects.get_or_create(
             user=self.request.user,
             defaults={
@@ -1524,9 +1659,9 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
             else:
                 actual_value = None
             
-            print(f"[DEBUG] Atualizando status da tarefa {task.id} para {status_value}")
-            print(f"[DEBUG] Valor recebido: {actual_value}, Tipo: {type(actual_value)}")
-            print(f"[DEBUG] Meta associada: {task.goal.id if task.goal else 'Nenhuma'}")
+            logger.debug('Atualizando status da tarefa %s para %s', task.id, status_value)
+            logger.debug('Valor recebido: %s, Tipo: %s', actual_value, type(actual_value))
+            logger.debug('Meta associada: %s', task.goal_id)
             
             if status_value not in dict(Task.STATUS_CHOICES):
                 return Response({'error': 'Status inválido'}, status=status.HTTP_400_BAD_REQUEST)
@@ -1572,13 +1707,13 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                             if diff != 0:
                                 task.goal.current_value += diff
                                 task.goal.update_progress()
-                                print(f"[DEBUG] Ajustando meta (ocorrência): {diff} na meta {task.goal.id}")
+                                logger.debug('Ajustando meta (ocorrência): %s na meta %s', diff, task.goal.id)
                         
                         # Caso 2: Estava concluída mas não está mais
                         elif was_already_completed and not is_completing:
                             task.goal.current_value = max(0, task.goal.current_value - old_occurrence_value)
                             task.goal.update_progress()
-                            print(f"[DEBUG] Removendo valor da meta (ocorrência): {old_occurrence_value} da meta {task.goal.id}")
+                            logger.debug('Removendo valor da meta (ocorrência): %s da meta %s', old_occurrence_value, task.goal.id)
                         
                         # Caso 3: Não estava concluída mas agora está
                         elif not was_already_completed and is_completing and actual_value is not None:
@@ -1592,7 +1727,7 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                             
                             task.goal.current_value += actual_value_float
                             task.goal.update_progress()
-                            print(f"[DEBUG] Adicionando valor à meta (ocorrência): {actual_value_float} à meta {task.goal.id}")
+                            logger.debug('Adicionando valor à meta (ocorrência): %s à meta %s', actual_value_float, task.goal.id)
                     
                     occurrence.save()
                 else:
@@ -1608,7 +1743,7 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                         
                         task.goal.current_value += actual_value_float
                         task.goal.update_progress()
-                        print(f"[DEBUG] Nova ocorrência concluída: {actual_value_float} adicionado à meta {task.goal.id}")
+                        logger.debug('Nova ocorrência concluída: %s adicionado à meta %s', actual_value_float, task.goal.id)
                 
                 serializer = TaskOccurrenceSerializer(occurrence)
                 return Response(serializer.data)
@@ -1630,13 +1765,13 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                         if diff != 0:
                             task.goal.current_value += diff
                             task.goal.update_progress()
-                            print(f"[DEBUG] Ajustando meta: {diff} adicionado à meta {task.goal.id}")
+                            logger.debug('Ajustando meta: %s adicionado à meta %s', diff, task.goal.id)
                     
                     # Caso 2: Estava concluída mas não está mais
                     elif was_already_completed and not is_completing:
                         task.goal.current_value = max(0, task.goal.current_value - old_actual_value)
                         task.goal.update_progress()
-                        print(f"[DEBUG] Removendo valor da meta: {old_actual_value} removido da meta {task.goal.id}")
+                        logger.debug('Removendo valor da meta: %s removido da meta %s', old_actual_value, task.goal.id)
                     
                     # Caso 3: Não estava concluída mas agora está
                     elif not was_already_completed and is_completing and actual_value is not None:
@@ -1650,7 +1785,7 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                         
                         task.goal.current_value += actual_value_float
                         task.goal.update_progress()
-                        print(f"[DEBUG] Adicionando valor à meta: {actual_value_float} adicionado à meta {task.goal.id}")
+                        logger.debug('Adicionando valor à meta: %s adicionado à meta %s', actual_value_float, task.goal.id)
                 
                 task.save()
                 
@@ -1753,19 +1888,19 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                             goal = instance.goal
                             goal.current_value += diff
                             goal.update_progress()
-                            print(f"[DEBUG] Ajustando meta: {diff} adicionado à meta {goal.id}. Valor atual: {goal.current_value}")
+                            logger.debug('Ajustando meta: %s adicionado à meta %s. Valor atual: %s', diff, goal.id, goal.current_value)
                     elif old_status == 'completed' and instance.status != 'completed':
                         # Tarefa não está mais concluída, remover valor
                         goal = instance.goal
                         goal.current_value = max(0, goal.current_value - old_actual_value)
                         goal.update_progress()
-                        print(f"[DEBUG] Removendo valor da meta: {old_actual_value} removido da meta {goal.id}")
+                        logger.debug('Removendo valor da meta: %s removido da meta %s', old_actual_value, goal.id)
                     elif old_status != 'completed' and instance.status == 'completed' and instance.actual_value:
                         # Tarefa agora está concluída, adicionar valor
                         goal = instance.goal
                         goal.current_value += instance.actual_value
                         goal.update_progress()
-                        print(f"[DEBUG] Adicionando valor à meta: {instance.actual_value} adicionado à meta {goal.id}")
+                        logger.debug('Adicionando valor à meta: %s adicionado à meta %s', instance.actual_value, goal.id)
                 # Caso 2: Mudou de meta
                 elif old_goal_id:
                     from .models import Goal
@@ -1774,13 +1909,13 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                     if old_status == 'completed' and old_actual_value:
                         old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                         old_goal.update_progress()
-                        print(f"[DEBUG] Removendo da meta antiga: {old_actual_value} removido da meta {old_goal_id}")
+                        logger.debug('Removendo da meta antiga: %s removido da meta %s', old_actual_value, old_goal_id)
                     
                     # Adicionar à nova meta se está concluída
                     if instance.status == 'completed' and instance.actual_value:
                         instance.goal.current_value += instance.actual_value
                         instance.goal.update_progress()
-                        print(f"[DEBUG] Adicionando à nova meta: {instance.actual_value} adicionado à meta {instance.goal.id}")
+                        logger.debug('Adicionando à nova meta: %s adicionado à meta %s', instance.actual_value, instance.goal.id)
             
             # Se a tarefa tinha meta e agora não tem mais
             elif old_goal_id and old_status == 'completed' and old_actual_value:
@@ -1788,7 +1923,7 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                 old_goal = Goal.objects.get(id=old_goal_id)
                 old_goal.current_value = max(0, old_goal.current_value - old_actual_value)
                 old_goal.update_progress()
-                print(f"[DEBUG] Removendo meta da tarefa: {old_actual_value} removido da meta {old_goal_id}")
+                logger.debug('Removendo meta da tarefa: %s removido da meta %s', old_actual_value, old_goal_id)
             
             return Response(serializer.data)
     
@@ -1806,4 +1941,188 @@ class EnergyProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return self.update_recurring_task(instance, request, mode, occurrence_date)
\ No newline at end of file
+        return self.update_recurring_task(instance, request, mode, occurrence_date)
+
+class SyncView(APIView):
+    """
+    Sincronização incremental para a réplica local do PWA.
+    
+    GET /api/sync/?since=<cursor> devolve tarefas, ocorrências, metas, categorias
+    e preferências alteradas desde o cursor, mais as exclusões em `deleted`. O
+    cliente guarda o `cursor` da resposta e o envia na próxima chamada; sem
+    `since` (ou com `reset` verdadeiro na resposta) a resposta é o estado completo.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        since = request.query_params.get('since')
+        
+        try:
+            since = decode_cursor(since) if since else None
+        except InvalidCursor:
+            return Response({'error': 'Cursor inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(collect_changes(request.user, since, context={'request': request}))
+
+class BatchView(APIView):
+    """
+    Várias leituras da API em uma única requisição.
+    
+    POST /api/batch/ com {"requests": {"dashboard": "/api/tasks/dashboard/",
+    "goals": "/api/goals/"}} responde {"dashboard": {"status": 200, "body": ...},
+    ...}. Apenas GET; a autenticação é feita uma vez e o usuário (com o perfil de
+    energia e as preferências já carregados) é compartilhado entre os itens.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            items = parse_batch(request.data)
+        except InvalidBatch as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(run_batch(request, items, type(self)))
+
+
+class CalendarFeedView(View):
+    """
+    Feed ICS assinável: GET /api/calendar/<token>/calendar.ics
+    
+    A URL com o token é a credencial (clientes de calendário não enviam JWT).
+    O feed completo fica em cache por usuário e é invalidado junto com o resto
+    do cache do usuário; com ele em cache a resposta não consulta o banco, e
+    If-None-Match/If-Modified-Since respondem 304. Sem cache, o conteúdo é
+    gerado e enviado em blocos.
+    """
+    
+    def get(self, request, token):
+        user_id = get_feed_user_id(token)
+        if user_id is None:
+            raise Http404('Calendário não encontrado')
+        
+        today = timezone.localdate()
+        cache_key = user_cache_key(user_id, 'calendar-feed', today.isoformat())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            etag, last_modified = cached['etag'], cached['last_modified']
+        else:
+            last_modified = feed_last_modified(user_id)
+            etag = feed_etag(cache_key, last_modified)
+        
+        timestamp = int(last_modified.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            if cached is not None:
+                response = HttpResponse(cached['content'])
+            else:
+                since = today - timedelta(days=settings.CALENDAR_FEED_PAST_DAYS)
+                chunks = cache_feed(cache_key, etag, last_modified, iter_calendar(user_id, since))
+                response = StreamingHttpResponse(streaming_content(request, chunks))
+        
+        response['Content-Type'] = 'text/calendar; charset=utf-8'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class CalendarFeedTokenView(APIView):
+    """
+    Endereço do feed ICS do usuário.
+    
+    GET devolve a URL (criando o token na primeira chamada); POST gera um token
+    novo e a URL anterior deixa de funcionar.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response(self._urls(request, get_calendar_token(request.user)))
+    
+    def post(self, request):
+        return Response(self._urls(request, get_calendar_token(request.user, rotate=True)))
+    
+    def _urls(self, request, token):
+        url = request.build_absolute_uri(reverse('calendar-feed', args=[token]))
+        return {
+            'url': url,
+            'webcal_url': 'webcal://' + url.split('://', 1)[1],
+        }
+
+
+class ExportView(APIView):
+    """
+    Exportação do histórico em CSV ou XLSX.
+    
+    GET /api/export/<dataset>.<csv|xlsx>?start_date=&end_date=, com dataset
+    'tasks' (tarefas com as recorrências expandidas e o resultado das
+    ocorrências), 'daily' (totais por dia) ou 'goals' (metas; sem período). O
+    arquivo é gerado e enviado em blocos, lendo o banco com cursores, então a
+    memória não cresce com o período e o download começa de imediato.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def perform_content_negotiation(self, request, force=False):
+        # O corpo é o arquivo; o Accept (ex: text/csv) não deve resultar em 406
+        return super().perform_content_negotiation(request, force=True)
+    
+    def get(self, request, dataset, extension):
+        if dataset not in EXPORT_DATASETS or extension not in EXPORT_FORMATS:
+            raise Http404('Exportação não encontrada')
+        
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        start_date = serializer.validated_data['start_date']
+        end_date = serializer.validated_data['end_date']
+        
+        if EXPORT_DATASETS[dataset][2]:
+            rows = export_rows(dataset, request.user, start_date, end_date)
+            filename = f'{dataset}-{start_date.isoformat()}-{end_date.isoformat()}.{extension}'
+        else:
+            rows = export_rows(dataset, request.user)
+            filename = f'{dataset}-{timezone.localdate().isoformat()}.{extension}'
+        
+        response = StreamingHttpResponse(
+            streaming_content(request, stream_export(dataset, extension, rows)),
+            content_type=EXPORT_FORMATS[extension]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class AccountArchiveView(APIView):
+    """
+    Backup e restauração da conta.
+    
+    GET /api/account/archive/ baixa um .zip com as categorias usadas, metas,
+    tarefas, ocorrências, preferências e perfil de energia (um arquivo JSON
+    Lines por modelo), gerado e enviado em blocos. POST (multipart com `file`)
+    restaura um pacote desses na conta atual, que não pode ter tarefas nem metas.
+    Também disponível como `manage.py export_account` / `import_account`.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def perform_content_negotiation(self, request, force=False):
+        # O GET responde o arquivo; o Accept (ex: application/zip) não deve resultar em 406
+        return super().perform_content_negotiation(request, force=True)
+    
+    def get(self, request):
+        filename = f'taskmaster-{request.user.username}-{timezone.localdate().isoformat()}.zip'
+        response = StreamingHttpResponse(
+            streaming_content(request, write_account_archive(request.user)),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def post(self, request):
+        archive_file = request.FILES.get('file')
+        if archive_file is None:
+            return Response({'file': ['Envie o pacote .zip no campo "file"']}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            counts = AccountArchiveImporter(request.user).run(archive_file)
+        except ArchiveError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(counts, status=status.HTTP_201_CREATED)
+
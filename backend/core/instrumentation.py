@@ -0,0 +1,129 @@
+import functools
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.core.cache import caches
+from rest_framework import serializers
+
+# Métricas da requisição atual (None fora do ServerTimingMiddleware ou com ele desligado)
+current_metrics = ContextVar('current_metrics', default=None)
+
+_MISSING = object()
+_installed = False
+
+
+class RequestMetrics:
+    """Contadores e tempos (em segundos) de uma requisição"""
+    __slots__ = (
+        'started', 'db_queries', 'db_time', 'slow_queries', 'serializer_time', 'serializing',
+        'cache_hits', 'cache_misses', 'slow_query_threshold',
+    )
+
+    def __init__(self, slow_query_threshold=None):
+        self.started = perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.slow_queries = []
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Em segundos; None desliga a captura de queries lentas
+        self.slow_query_threshold = slow_query_threshold
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de connection.execute_wrapper(): conta e cronometra cada query"""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            self.db_queries += 1
+            self.db_time += elapsed
+            if self.slow_query_threshold is not None and elapsed >= self.slow_query_threshold:
+                self.slow_queries.append((elapsed, sql))
+
+    def elapsed(self):
+        return perf_counter() - self.started
+
+
+def measure_serialization(func):
+    """
+    Soma o tempo de `func` em serializer_time da requisição atual.
+
+    Chamadas aninhadas (ex: ListSerializer -> Serializer) contam uma vez só.
+    Sem métricas ativas, custa apenas a leitura da ContextVar.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return func(*args, **kwargs)
+
+        metrics.serializing = True
+        started = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.serializer_time += perf_counter() - started
+            metrics.serializing = False
+    return wrapper
+
+
+def _track_cache_get(original):
+    @functools.wraps(original)
+    def get(self, key, default=None, version=None):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return original(self, key, default, version)
+
+        value = original(self, key, _MISSING, version)
+        if value is _MISSING:
+            metrics.cache_misses += 1
+            return default
+        metrics.cache_hits += 1
+        return value
+    return get
+
+
+def _track_cache_get_many(original):
+    @functools.wraps(original)
+    def get_many(self, keys, version=None):
+        result = original(self, keys, version)
+        metrics = current_metrics.get()
+        if metrics is not None:
+            keys = list(keys) if not isinstance(keys, (list, tuple, set)) else keys
+            metrics.cache_hits += len(result)
+            metrics.cache_misses += len(keys) - len(result)
+        return result
+    return get_many
+
+
+def install_instrumentation():
+    """
+    Instala os medidores no DRF (Serializer.data) e no backend de cache padrão.
+
+    Chamado pelo ServerTimingMiddleware apenas quando ele está ligado, então com
+    ele desligado nenhuma classe é alterada. Pode ser chamado mais de uma vez.
+    """
+    global _installed
+    if _installed:
+        return
+
+    for serializer_class in (serializers.BaseSerializer, serializers.Serializer, serializers.ListSerializer):
+        serializer_class.data = property(measure_serialization(serializer_class.data.fget))
+
+    cache_class = type(caches['default'])
+    cache_class.get = _track_cache_get(cache_class.get)
+    cache_class.get_many = _track_cache_get_many(cache_class.get_many)
+    _installed = True
+
+
+def server_timing_header(metrics, total):
+    """Valor do cabeçalho Server-Timing (durações em ms)"""
+    return ', '.join([
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+        f'serialize;dur={metrics.serializer_time * 1000:.1f}',
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+        f'total;dur={total * 1000:.1f}',
+    ])
@@ -0,0 +1,50 @@
+import itertools
+import json
+import logging
+from datetime import datetime, timezone
+
+# extra= das mensagens emitidas por item (dentro de laços): passam pelo SampleFilter
+SAMPLED = {'sampled': True}
+
+# Atributos padrão de um LogRecord; o que sobrar veio de extra= e vai para o JSON
+STANDARD_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class SampleFilter(logging.Filter):
+    """
+    Deixa passar apenas 1 a cada `rate` registros marcados com extra=SAMPLED.
+
+    Usado nas mensagens de debug por tarefa ou por data, que com DEBUG ligado
+    gerariam uma linha por item. Os demais registros passam sempre.
+    """
+
+    def __init__(self, rate=100):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self.counter = itertools.count()
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+        return next(self.counter) % self.rate == 0
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Uma linha JSON por registro (time, level, logger, message e os campos de extra=),
+    para agregadores de log. Ex: o request_metrics do ServerTimingMiddleware.
+    """
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in STANDARD_RECORD_ATTRS and key != 'sampled':
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
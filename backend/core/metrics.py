@@ -0,0 +1,225 @@
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Registry:
+    """
+    Valores das métricas do processo, no formato {(amostra, rótulos, le): valor}.
+
+    Cada incremento é uma soma em um dict sob um lock. Com METRICS_DIR definido
+    (vários workers do uvicorn), cada processo grava uma cópia dos seus valores
+    em METRICS_DIR/<pid>-<início>.json, no máximo a cada METRICS_FLUSH_INTERVAL
+    segundos, e collect() soma os arquivos de todos os processos. Os arquivos
+    de processos encerrados continuam somando (contadores não voltam atrás);
+    limpe o diretório a cada deploy.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.values = defaultdict(float)
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.filename = None
+        self.last_flush = 0.0
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def add(self, key, amount):
+        with self.lock:
+            self.values[key] += amount
+
+    def add_many(self, items):
+        with self.lock:
+            for key, amount in items:
+                self.values[key] += amount
+
+    def _check_fork(self):
+        # Processo filho (fork) herda os valores do pai: recomeça do zero
+        if os.getpid() != self.pid:
+            with self.lock:
+                self.values.clear()
+            self.pid = os.getpid()
+            self.filename = None
+
+    def maybe_flush(self):
+        """Grava os valores em METRICS_DIR se o intervalo já passou (chamado ao fim de cada requisição)"""
+        if settings.METRICS_DIR and time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        self._check_fork()
+        directory = Path(settings.METRICS_DIR)
+        if self.filename is None:
+            directory.mkdir(parents=True, exist_ok=True)
+            self.filename = directory / f'{self.pid}-{int(time.time())}.json'
+
+        with self.lock:
+            snapshot = [[name, list(labels), le, value] for (name, labels, le), value in self.values.items()]
+        temporary = self.filename.with_suffix('.tmp')
+        temporary.write_text(json.dumps(snapshot))
+        # Troca atômica: quem lê nunca vê um arquivo pela metade
+        os.replace(temporary, self.filename)
+        self.last_flush = time.monotonic()
+
+    def collect(self):
+        """Valores somados de todos os processos (ou só deste, sem METRICS_DIR)"""
+        self._check_fork()
+        if not settings.METRICS_DIR:
+            with self.lock:
+                return dict(self.values)
+
+        self.flush()
+        totals = defaultdict(float)
+        for path in Path(settings.METRICS_DIR).glob('*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, labels, le, value in snapshot:
+                totals[(name, tuple(labels), le)] += value
+        return totals
+
+
+REGISTRY = Registry()
+
+
+class Counter:
+    """Contador monotônico com rótulos posicionais (ex: COUNTER.inc(1, 'hit'))"""
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        registry.register(self)
+
+    def inc(self, amount=1, *labels):
+        self.registry.add((self.name, labels, None), amount)
+
+
+class Histogram:
+    """Histograma com buckets fixos (le) e rótulos posicionais"""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.registry = registry
+        registry.register(self)
+
+    def observe(self, value, *labels):
+        # Guarda só o bucket do valor; a contagem acumulada é montada em render()
+        index = bisect_left(self.buckets, value)
+        le = self.buckets[index] if index < len(self.buckets) else math.inf
+        self.registry.add_many([
+            ((f'{self.name}_bucket', labels, le), 1),
+            ((f'{self.name}_sum', labels, None), value),
+            ((f'{self.name}_count', labels, None), 1),
+        ])
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, le=None):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{"+Inf" if le == math.inf else repr(float(le))}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(registry=REGISTRY):
+    """Todas as métricas no formato texto do Prometheus (0.0.4)"""
+    by_sample = defaultdict(dict)
+    for (name, labels, le), value in registry.collect().items():
+        by_sample[name][(labels, le)] = value
+
+    lines = []
+    for metric in sorted(registry.metrics.values(), key=lambda metric: metric.name):
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+
+        if metric.type == 'counter':
+            samples = by_sample.get(metric.name, {})
+            if not samples and not metric.labelnames:
+                samples = {((), None): 0}
+            for (labels, _), value in sorted(samples.items()):
+                lines.append(f'{metric.name}{format_labels(metric.labelnames, labels)} {format_value(value)}')
+            continue
+
+        buckets = by_sample.get(f'{metric.name}_bucket', {})
+        sums = by_sample.get(f'{metric.name}_sum', {})
+        counts = by_sample.get(f'{metric.name}_count', {})
+        for labels, _ in sorted(counts):
+            cumulative = 0
+            for le in (*metric.buckets, math.inf):
+                cumulative += buckets.get((labels, le), 0)
+                lines.append(
+                    f'{metric.name}_bucket{format_labels(metric.labelnames, labels, le)} {format_value(cumulative)}'
+                )
+            label_text = format_labels(metric.labelnames, labels)
+            lines.append(f'{metric.name}_sum{label_text} {format_value(sums.get((labels, None), 0))}')
+            lines.append(f'{metric.name}_count{label_text} {format_value(counts[(labels, None)])}')
+
+    return '\n'.join(lines) + '\n'
+
+
+# Métricas das requisições (registradas pelo MetricsMiddleware)
+
+REQUEST_LATENCY = Histogram(
+    'taskmaster_http_request_duration_seconds', 'Tempo de resposta por view', ['view', 'method']
+)
+REQUEST_QUERIES = Histogram(
+    'taskmaster_http_request_db_queries', 'Queries por requisição, por view', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 500)
+)
+RESPONSES = Counter('taskmaster_http_responses_total', 'Respostas por view e status', ['view', 'status'])
+CACHE_REQUESTS = Counter(
+    'taskmaster_cache_requests_total', 'Leituras no cache padrão feitas nas requisições', ['result']
+)
+
+
+def record_request(request, response, metrics):
+    """Registra a requisição encerrada (RequestMetrics de core.instrumentation)"""
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match is not None else 'unresolved'
+
+    REQUEST_LATENCY.observe(metrics.elapsed(), view, request.method)
+    REQUEST_QUERIES.observe(metrics.db_queries, view)
+    RESPONSES.inc(1, view, str(response.status_code))
+    if metrics.cache_hits:
+        CACHE_REQUESTS.inc(metrics.cache_hits, 'hit')
+    if metrics.cache_misses:
+        CACHE_REQUESTS.inc(metrics.cache_misses, 'miss')
+    REGISTRY.maybe_flush()
+
+
+def metrics_view(request):
+    """GET /metrics: métricas no formato do Prometheus, apenas para METRICS_ALLOWED_IPS"""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,250 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+from core.instrumentation import RequestMetrics, current_metrics, install_instrumentation, server_timing_header
+from core.metrics import record_request
+from core.profiling import profile_request, profiling_requested, profiling_user
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip é oferecido
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def parse_accept_encoding(header):
+    """
+    Converte o cabeçalho Accept-Encoding em {codificação: q}.
+
+    Ex: "gzip;q=0.8, br" -> {'gzip': 0.8, 'br': 1.0}
+    """
+    encodings = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name] = quality
+    return encodings
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Comprime as respostas com brotli ou gzip, conforme o Accept-Encoding do cliente.
+
+    Brotli é preferido quando o pacote está instalado e o cliente o aceita com
+    peso igual ou maior que gzip. Respostas menores que COMPRESSION_MIN_SIZE não
+    são comprimidas, e o resultado só é usado se ficar menor que o original.
+    Mantém o comportamento do GZipMiddleware do Django (Vary, ETag fraco e
+    mitigação de BREACH no gzip).
+    """
+
+    def select_encoding(self, request):
+        """Codificação a usar na resposta ('br', 'gzip') ou None"""
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        gzip_quality = accepted.get('gzip', wildcard)
+        brotli_quality = accepted.get('br', wildcard) if brotli is not None else 0.0
+
+        if brotli_quality > 0 and brotli_quality >= gzip_quality:
+            return 'br'
+        if gzip_quality > 0:
+            return 'gzip'
+        return None
+
+    def process_response(self, request, response):
+        # Não vale a pena comprimir respostas pequenas
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self.select_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response, encoding)
+            # O tamanho comprimido só é conhecido ao final do stream
+            del response.headers['Content-Length']
+        else:
+            compressed_content = self.compress(response.content, encoding)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # ETag forte vira fraco (RFC 9110, seção 8.8.1), mantendo as requisições condicionais
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+
+        return response
+
+    def compress(self, content, encoding):
+        """Comprime o corpo completo de uma resposta"""
+        if encoding == 'br':
+            return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, response, encoding):
+        """Envolve o conteúdo de uma resposta em streaming (síncrona ou assíncrona) com o compressor"""
+        original_iterator = response.streaming_content
+
+        if encoding == 'gzip':
+            if not response.is_async:
+                return compress_sequence(original_iterator, max_random_bytes=self.max_random_bytes)
+
+            async def gzip_wrapper():
+                async for chunk in original_iterator:
+                    yield compress_string(chunk, max_random_bytes=self.max_random_bytes)
+
+            return gzip_wrapper()
+
+        # flush() a cada bloco entrega o que já foi comprimido sem esperar o fim do stream
+        compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+        if response.is_async:
+            async def brotli_wrapper():
+                async for chunk in original_iterator:
+                    yield compressor.process(chunk) + compressor.flush()
+                yield compressor.finish()
+
+            return brotli_wrapper()
+
+        def brotli_sync_wrapper():
+            for chunk in original_iterator:
+                yield compressor.process(chunk) + compressor.flush()
+            yield compressor.finish()
+
+        return brotli_sync_wrapper()
+
+
+class ServerTimingMiddleware:
+    """
+    Mede cada requisição: queries (quantidade e tempo), serialização, acertos e
+    faltas no cache e tempo total.
+
+    O resultado vai no cabeçalho Server-Timing (visível no painel de rede do
+    navegador) e em uma linha de log INFO com os mesmos valores em `extra`.
+    Queries acima de SERVER_TIMING_SLOW_QUERY_MS são registradas com WARNING.
+    Com SERVER_TIMING_ENABLED desligado o middleware sai da cadeia
+    (MiddlewareNotUsed) e nada é instrumentado. Em respostas em streaming, as
+    queries feitas durante o envio do corpo não entram na conta.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        install_instrumentation()
+        self.get_response = get_response
+        threshold = settings.SERVER_TIMING_SLOW_QUERY_MS
+        self.slow_query_threshold = threshold / 1000 if threshold is not None else None
+
+    def __call__(self, request):
+        metrics = RequestMetrics(self.slow_query_threshold)
+        token = current_metrics.set(metrics)
+        try:
+            with connection.execute_wrapper(metrics):
+                response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        total = metrics.elapsed()
+
+        response.headers['Server-Timing'] = server_timing_header(metrics, total)
+        logger.info(
+            '%s %s %s total=%.1fms db=%d/%.1fms serialize=%.1fms cache=%d/%d',
+            request.method, request.path, response.status_code, total * 1000,
+            metrics.db_queries, metrics.db_time * 1000, metrics.serializer_time * 1000,
+            metrics.cache_hits, metrics.cache_misses,
+            extra={'request_metrics': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': round(total * 1000, 1),
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_time * 1000, 1),
+                'serialize_ms': round(metrics.serializer_time * 1000, 1),
+                'cache_hits': metrics.cache_hits,
+                'cache_misses': metrics.cache_misses,
+            }}
+        )
+        for elapsed, sql in metrics.slow_queries:
+            logger.warning('Query lenta (%.1fms) em %s %s: %s', elapsed * 1000, request.method, request.path, sql)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Alimenta as métricas do /metrics (core.metrics): latência e queries por
+    view, respostas por status e acertos/faltas no cache.
+
+    Usa as medições do ServerTimingMiddleware quando ele está ligado; senão
+    mede por conta própria. Com METRICS_ENABLED desligado sai da cadeia.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        install_instrumentation()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = current_metrics.get()
+        if metrics is not None:
+            response = self.get_response(request)
+        else:
+            metrics = RequestMetrics()
+            token = current_metrics.set(metrics)
+            try:
+                with connection.execute_wrapper(metrics):
+                    response = self.get_response(request)
+            finally:
+                current_metrics.reset(token)
+
+        record_request(request, response, metrics)
+        return response
+
+
+
+class ProfilingMiddleware:
+    """
+    Perfil sob demanda para usuários staff: com o cabeçalho X-Profile: 1 ou
+    ?profile=1, a requisição roda sob o profiler e o perfil é gravado com o
+    caminho, o usuário e o log de queries (ver core.profiling).
+
+    Com PROFILING_ENABLED desligado (padrão) sai da cadeia; ligado, as
+    requisições sem o pedido custam apenas a leitura do cabeçalho.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling_requested(request):
+            user = profiling_user(request)
+            if user is not None:
+                return profile_request(self.get_response, request, user)
+        return self.get_response(request)
@@ -0,0 +1,240 @@
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import re
+import uuid
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.http import FileResponse, Http404
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # pyinstrument é opcional; sem ele o perfil é gerado com o cProfile
+    SamplingProfiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ID_RE = re.compile(r'^\d{20}-[0-9a-f]{8}$')
+
+# Funções listadas no resumo do cProfile (ordenadas pelo tempo acumulado)
+PROFILE_SUMMARY_LIMIT = 30
+
+
+def profiling_requested(request):
+    """Pedido de perfil pelo cabeçalho X-Profile ou por ?profile=1"""
+    flag = request.META.get('HTTP_X_PROFILE') or request.GET.get(settings.PROFILING_QUERY_PARAM)
+    return flag is not None and flag.lower() in ('1', 'true')
+
+
+def profiling_user(request):
+    """
+    Usuário staff que pediu o perfil, ou None.
+
+    Aceita a sessão (admin do Django) e o JWT da API. O JWT só é validado aqui
+    quando o perfil foi pedido; o DRF autentica de novo na view.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        user = authenticated[0] if authenticated else None
+    return user if user is not None and user.is_staff else None
+
+
+class QueryLog:
+    """Wrapper de connection.execute_wrapper(): SQL e duração de cada query (sem os parâmetros)"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - started
+            self.count += 1
+            self.time += elapsed
+            if len(self.queries) < self.limit:
+                self.queries.append({'sql': sql, 'duration_ms': round(elapsed * 1000, 3), 'many': many})
+
+
+class RequestProfiler:
+    """Perfil de uma chamada: pyinstrument (amostragem, HTML) se instalado, senão cProfile (.prof)"""
+
+    def __init__(self):
+        self.sampling = SamplingProfiler is not None
+        self.profiler = SamplingProfiler() if self.sampling else cProfile.Profile()
+
+    @property
+    def name(self):
+        return 'pyinstrument' if self.sampling else 'cprofile'
+
+    @property
+    def extension(self):
+        return 'html' if self.sampling else 'prof'
+
+    def start(self):
+        if self.sampling:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.sampling:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def output(self):
+        """Conteúdo do arquivo do perfil (bytes)"""
+        if self.sampling:
+            return self.profiler.output_html().encode()
+        # marshal do pstats: abre com `python -m pstats arquivo.prof`, snakeviz etc.
+        return pstats_dump(self.profiler)
+
+    def summary(self):
+        """Resumo em texto das funções mais caras"""
+        if self.sampling:
+            return self.profiler.output_text()
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(PROFILE_SUMMARY_LIMIT)
+        return stream.getvalue()
+
+
+def pstats_dump(profiler):
+    """Estatísticas do cProfile no formato de Stats.dump_stats(), em bytes"""
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+def profiles_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def save_profile(profiler, metadata):
+    """Grava o perfil e os metadados (<id>.json) em PROFILING_DIR e descarta os mais antigos"""
+    directory = profiles_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profile_id = f'{timezone.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}'
+    filename = f'{profile_id}.{profiler.extension}'
+    (directory / filename).write_bytes(profiler.output())
+    metadata = {'id': profile_id, 'profiler': profiler.name, 'file': filename, **metadata}
+    (directory / f'{profile_id}.json').write_text(json.dumps(metadata, default=str, ensure_ascii=False))
+
+    # Os ids começam pela data: ordem alfabética = ordem de criação
+    for old in sorted(directory.glob('*.json'))[:-settings.PROFILING_MAX_PROFILES]:
+        for path in directory.glob(f'{old.stem}.*'):
+            path.unlink(missing_ok=True)
+    return profile_id
+
+
+def load_profile(profile_id):
+    """Metadados de um perfil; Http404 se não existir"""
+    if not PROFILE_ID_RE.match(profile_id):
+        raise Http404
+    try:
+        return json.loads((profiles_dir() / f'{profile_id}.json').read_text())
+    except (OSError, ValueError):
+        raise Http404
+
+
+def list_profiles():
+    """Metadados de todos os perfis, do mais recente ao mais antigo, sem o log de queries e o resumo"""
+    profiles = []
+    directory = profiles_dir()
+    if not directory.exists():
+        return profiles
+    for path in sorted(directory.glob('*.json'), reverse=True):
+        try:
+            metadata = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        metadata.pop('queries', None)
+        metadata.pop('summary', None)
+        profiles.append(metadata)
+    return profiles
+
+
+def profile_request(get_response, request, user):
+    """Executa a requisição sob o profiler e grava o perfil; a resposta leva o id em X-Profile-Id"""
+    profiler = RequestProfiler()
+    query_log = QueryLog(settings.PROFILING_MAX_QUERIES)
+    try:
+        profiler.start()
+    except (RuntimeError, ValueError) as e:
+        # Outro profiler já ativo nesta thread: segue sem perfil
+        logger.warning('Perfil não iniciado em %s: %s', request.path, e)
+        return get_response(request)
+
+    started = perf_counter()
+    try:
+        with connection.execute_wrapper(query_log):
+            response = get_response(request)
+    finally:
+        profiler.stop()
+    duration = perf_counter() - started
+
+    profile_id = save_profile(profiler, {
+        'created_at': timezone.now().isoformat(),
+        'method': request.method,
+        'path': request.path,
+        'query_string': request.META.get('QUERY_STRING', ''),
+        'user_id': user.id,
+        'username': user.get_username(),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 1),
+        'query_count': query_log.count,
+        'query_ms': round(query_log.time * 1000, 1),
+        'queries': query_log.queries,
+        'summary': profiler.summary(),
+    })
+    logger.info('Perfil %s gravado para %s %s (%s)', profile_id, request.method, request.path, user.get_username())
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+
+class ProfileListView(APIView):
+    """GET /api/profiles/: perfis gravados (apenas administradores)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """GET /api/profiles/<id>/: metadados, log de queries e resumo do perfil"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        return Response(load_profile(profile_id))
+
+
+class ProfileDownloadView(APIView):
+    """GET /api/profiles/<id>/download/: arquivo do perfil (.prof do cProfile ou .html do pyinstrument)"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, profile_id):
+        metadata = load_profile(profile_id)
+        path = profiles_dir() / metadata['file']
+        if not path.exists():
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True, filename=metadata['file'])
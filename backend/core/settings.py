@@ -5,13 +5,45 @@ import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
-# Logging simplificado
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-_q=i!9evs*mk)*!#t!sjd1d$g_)#qxes(me%5trwa^lmd!ve4o'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'taskmaster.ultimoingresso.com.br', 'www.ultimoingresso.com.br', 'ultimoingresso.com.br']
+
+# Logs: loggers por módulo (app.tasks.views, core.middleware...) com nível
+# LOG_LEVEL. As mensagens de diagnóstico são DEBUG e usam formatação preguiçosa,
+# então com INFO (padrão) não custam nada; use LOG_LEVEL=DEBUG em desenvolvimento.
+# LOG_FORMAT=json emite uma linha JSON por registro. Mensagens por item (dentro de
+# laços) passam por amostragem: só 1 a cada LOG_SAMPLE_RATE é emitida
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+LOG_SAMPLE_RATE = int(os.environ.get('LOG_SAMPLE_RATE', 100))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'formatters': {
+        'text': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+        'json': {
+            '()': 'core.log.JSONFormatter',
+        },
+    },
+    'filters': {
+        'sample': {
+            '()': 'core.log.SampleFilter',
+            'rate': LOG_SAMPLE_RATE,
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
+            'formatter': LOG_FORMAT,
+            'filters': ['sample'],
         },
     },
     'loggers': {
@@ -19,17 +51,19 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'ERROR',
         },
+        'app': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'core': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
     }
 }
 
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-_q=i!9evs*mk)*!#t!sjd1d$g_)#qxes(me%5trwa^lmd!ve4o'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = ['localhost', '127.0.0.1', 'taskmaster.ultimoingresso.com.br', 'www.ultimoingresso.com.br', 'ultimoingresso.com.br']
-
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -46,7 +80,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,6 +91,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -78,12 +116,26 @@ WSGI_APPLICATION = 'core.wsgi.application'
 ASGI_APPLICATION = 'core.asgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Com POSTGRES_DB definido, usa o PostgreSQL (POSTGRES_USER, POSTGRES_PASSWORD,
+# POSTGRES_HOST e POSTGRES_PORT); sem ele, o SQLite local
+if os.environ.get('POSTGRES_DB'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ['POSTGRES_DB'],
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
     }
-}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,6 +153,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache
+# Com mais de um worker (uvicorn --workers), use Redis para que a invalidação
+# por usuário valha para todos os processos
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Tempo (segundos) que os dados do dashboard ficam em cache por usuário
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Configuração de idioma da busca textual no PostgreSQL (to_tsvector/to_tsquery)
+SEARCH_CONFIG = 'portuguese'
+
 # Internationalization
 LANGUAGE_CODE = 'pt-br'
 TIME_ZONE = 'America/Sao_Paulo'
@@ -124,8 +199,75 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON via orjson quando instalado (mesma saída do JSONRenderer padrão)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Compressão das respostas (core.middleware.CompressionMiddleware): tamanho mínimo
+# em bytes e qualidade do brotli (0-11; valores altos são lentos para conteúdo dinâmico)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Métricas por requisição (core.middleware.ServerTimingMiddleware): cabeçalho
+# Server-Timing e log. Ferramenta de depuração, desligada por padrão
+# (SERVER_TIMING_ENABLED=true liga); desligado, o middleware não é carregado.
+# Queries mais lentas que SERVER_TIMING_SLOW_QUERY_MS (ms) vão para o log; None desliga
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() in ('1', 'true')
+SERVER_TIMING_SLOW_QUERY_MS = 100
+
+# Métricas no formato do Prometheus em /metrics (core.metrics), respondido só para
+# METRICS_ALLOWED_IPS. Desligado por padrão (METRICS_ENABLED=true liga): desligado,
+# o MetricsMiddleware não é carregado e nada é instrumentado. Com vários workers do
+# uvicorn, defina METRICS_DIR (um diretório local limpo a cada deploy): cada
+# processo grava seus valores ali a cada METRICS_FLUSH_INTERVAL segundos e o
+# /metrics soma todos
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true')
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 10
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# Perfil sob demanda (core.middleware.ProfilingMiddleware) para usuários staff,
+# pedido com o cabeçalho X-Profile: 1 ou ?profile=1. Desligado, o middleware não
+# é carregado. Os perfis ficam em PROFILING_DIR (os mais antigos além de
+# PROFILING_MAX_PROFILES são descartados) e são listados em /api/profiles/
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true')
+PROFILING_DIR = os.environ.get('PROFILING_DIR') or str(BASE_DIR / 'profiles')
+PROFILING_QUERY_PARAM = 'profile'
+PROFILING_MAX_PROFILES = 100
+PROFILING_MAX_QUERIES = 1000
+
+# Tamanho de página padrão das listagens de tarefas paginadas por cursor (ex: ?page_size=50)
+TASK_PAGE_SIZE = 100
+
+# Sincronização incremental (/api/sync/): intervalo repetido a cada sincronização
+# para cobrir transações concorrentes, e por quanto tempo as exclusões ficam
+# registradas (cursores mais antigos recebem o estado completo)
+SYNC_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+
+# Número máximo de sub-requisições em uma chamada a /api/batch/
+BATCH_MAX_REQUESTS = 10
+
+# Número máximo de operações em uma chamada a /api/tasks/bulk/
+TASK_BULK_MAX_OPERATIONS = 200
+
+# Tempo (s) do feed ICS em cache; o cache também é invalidado a cada alteração do usuário
+CALENDAR_FEED_CACHE_TIMEOUT = 3600
+
+# Dias no passado incluídos no feed ICS (tarefas avulsas)
+CALENDAR_FEED_PAST_DAYS = 90
+
+# Período máximo (dias) de uma exportação em /api/export/
+EXPORT_MAX_RANGE_DAYS = 3660
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
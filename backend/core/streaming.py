@@ -0,0 +1,32 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+
+async def iterate_in_thread(iterator):
+    """
+    Percorre um iterador síncrono (que pode acessar o banco) a partir de código assíncrono.
+
+    Cada bloco é obtido com sync_to_async na thread das views síncronas, então o
+    conteúdo é enviado ao cliente à medida que é gerado.
+    """
+    iterator = iter(iterator)
+    sentinel = object()
+    while True:
+        chunk = await sync_to_async(next, thread_sensitive=True)(iterator, sentinel)
+        if chunk is sentinel:
+            break
+        yield chunk
+
+
+def streaming_content(request, iterator):
+    """
+    Conteúdo para StreamingHttpResponse adequado ao servidor da requisição.
+
+    No ASGI (uvicorn) o Django consome iteradores síncronos inteiros antes de
+    enviar a resposta; nesse caso o iterador é convertido em assíncrono para que
+    a resposta seja de fato enviada em partes. No WSGI é usado como está.
+    Aceita tanto o HttpRequest quanto o Request do DRF.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return iterate_in_thread(iterator)
+    return iterator
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenRefreshView
 from app.accounts.views import EmailTokenObtainPairView, RegisterView
+from core.metrics import metrics_view
+from core.profiling import ProfileDetailView, ProfileDownloadView, ProfileListView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,4 +12,10 @@ urlpatterns = [
     path('api/auth/token/', EmailTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/register/', RegisterView.as_view(), name='register'),
+    # Métricas para o Prometheus (apenas METRICS_ALLOWED_IPS)
+    path('metrics', metrics_view, name='metrics'),
+    # Perfis sob demanda (apenas administradores; ver PROFILING_ENABLED)
+    path('api/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('api/profiles/<str:profile_id>/', ProfileDetailView.as_view(), name='profile-detail'),
+    path('api/profiles/<str:profile_id>/download/', ProfileDownloadView.as_view(), name='profile-download'),
 ]
\ No newline at end of file
@@ -1,5 +1,25 @@
 import apiClient from './ApiService';
 
+/**
+ * Buscar todas as páginas de uma listagem paginada por cursor
+ * @param {string} url - URL da listagem
+ * @returns {Promise} - Promessa com a resposta da primeira página e todos os resultados em `data`
+ */
+const fetchAllPages = async (url) => {
+  const response = await apiClient.get(url);
+  const results = [...response.data.results];
+  let next = response.data.next;
+
+  while (next) {
+    const cursor = new URL(next).searchParams.get('cursor');
+    const page = await apiClient.get(url, { params: { cursor } });
+    results.push(...page.data.results);
+    next = page.data.next;
+  }
+
+  return { ...response, data: results };
+};
+
 const TaskService = {
   getEnergyRecommendations: async () => {
     try {
@@ -209,7 +229,7 @@ const TaskService = {
      * @returns {Promise} - Promessa com a lista de tarefas no intervalo
      */
     getTasksByDateRange: async (startDate, endDate) => {
-      return apiClient.get(`/tasks/?date__gte=${startDate}&date__lte=${endDate}`);
+      return fetchAllPages(`/tasks/?date__gte=${startDate}&date__lte=${endDate}`);
     },
     
     /**
@@ -226,7 +246,16 @@ const TaskService = {
     },
   
     getTasksByGoal: async (goalId) => {
-      return apiClient.get(`/goals/${goalId}/related_tasks/`);
+      return fetchAllPages(`/goals/${goalId}/related_tasks/`);
+    },
+  
+    /**
+     * Buscar progresso acumulado por dia e previsão de conclusão de uma meta
+     * @param {number} goalId - ID da meta
+     * @returns {Promise} - Promessa com a série temporal e a previsão
+     */
+    getGoalTimeline: async (goalId) => {
+      return apiClient.get(`/goals/${goalId}/timeline/`);
     },
     
     /**